@@ -18,6 +18,8 @@ from browser_use.agent.views import AgentHistoryList as AgentHistoryList
 from browser_use.browser.browser import Browser as Browser
 from browser_use.browser.browser import BrowserConfig as BrowserConfig
 from browser_use.browser.context import BrowserContextConfig
+from browser_use.browser.pool import BrowserPool as BrowserPool
+from browser_use.browser.pool import BrowserPoolConfig as BrowserPoolConfig
 from browser_use.controller.service import Controller as Controller
 from browser_use.dom.service import DomService as DomService
 
@@ -25,6 +27,8 @@ __all__ = [
 	'Agent',
 	'Browser',
 	'BrowserConfig',
+	'BrowserPool',
+	'BrowserPoolConfig',
 	'Controller',
 	'DomService',
 	'SystemPrompt',
@@ -1,19 +1,33 @@
 from __future__ import annotations
 
+import asyncio
 import base64
+import functools
 import io
 import logging
 import os
 import platform
-from typing import TYPE_CHECKING
+import shutil
+import struct
+import subprocess
+import threading
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, BinaryIO
 
 from browser_use.agent.views import AgentHistoryList
+from browser_use.browser.screenshot_store import ScreenshotStore
 
 if TYPE_CHECKING:
 	from PIL import Image, ImageFont
 
 logger = logging.getLogger(__name__)
 
+HISTORY_EXPORT_FORMATS = ('gif', 'webp', 'mp4')
+_thread_fonts = threading.local()
+
 
 def decode_unicode_escapes_to_utf8(text: str) -> str:
 	"""Handle decoding any unicode escape sequences embedded in a string (needed to render non-ASCII languages like chinese or arabic in the GIF overlay text)"""
@@ -44,120 +58,316 @@ def create_history_gif(
 	goal_font_size: int = 44,
 	margin: int = 40,
 	line_spacing: float = 1.5,
+	workers: int | None = None,
 ) -> None:
-	"""Create a GIF from the agent's history with overlaid task and goal text."""
+	"""
+	Create a GIF, animated WebP or MP4 (by the extension of output_path) from the agent's history with overlaid task
+	and goal text. Frames are rendered by a pool of workers threads (0 renders them in the calling thread) and written
+	as soon as they are done, so only a few of them are in memory at once. WebP and MP4 are encoded by ffmpeg.
+	"""
 	if not history.history:
 		logger.warning('No history to create GIF from')
 		return
 
-	from PIL import Image, ImageFont
-
-	images = []
+	from PIL import Image
 
 	# if history is empty or first screenshot is None, we can't create a gif
-	if not history.history or not history.history[0].state.screenshot:
+	first_screenshot = history.screenshot(0)
+	if not first_screenshot:
 		logger.warning('No history or first screenshot to create GIF from')
 		return
 
-	# Try to load nicer fonts
+	image_format = os.path.splitext(output_path)[1].lower().lstrip('.') or 'gif'
+	if image_format not in HISTORY_EXPORT_FORMATS:
+		raise ValueError(f'Unsupported history export format {image_format}, use one of {", ".join(HISTORY_EXPORT_FORMATS)}')
+
+	style = _FrameStyle(
+		frame_size=Image.open(io.BytesIO(base64.b64decode(first_screenshot))).size,
+		font_size=font_size,
+		title_font_size=title_font_size,
+		margin=margin,
+		line_spacing=line_spacing,
+		show_logo=show_logo,
+		image_format=image_format,
+	)
+	jobs = _frame_jobs(task if show_task else None, history, show_goals)
+
+	frames = 0
+	writer = _GifWriter(output_path, duration) if image_format == 'gif' else _FFmpegWriter(output_path, duration, image_format)
 	try:
-		# Try different font options in order of preference
-		# ArialUni is a font that comes with Office and can render most non-alphabet characters
-		font_options = [
-			'Microsoft YaHei',  # 微软雅黑
-			'SimHei',  # 黑体
-			'SimSun',  # 宋体
-			'Noto Sans CJK SC',  # 思源黑体
-			'WenQuanYi Micro Hei',  # 文泉驿微米黑
-			'Helvetica',
-			'Arial',
-			'DejaVuSans',
-			'Verdana',
-		]
-		font_loaded = False
-
-		for font_name in font_options:
-			try:
-				if platform.system() == 'Windows':
-					# Need to specify the abs font path on Windows
-					font_name = os.path.join(os.getenv('WIN_FONT_DIR', 'C:\\Windows\\Fonts'), font_name + '.ttf')
-				regular_font = ImageFont.truetype(font_name, font_size)
-				title_font = ImageFont.truetype(font_name, title_font_size)
-				goal_font = ImageFont.truetype(font_name, goal_font_size)
-				font_loaded = True
-				break
-			except OSError:
-				continue
-
-		if not font_loaded:
-			raise OSError('No preferred fonts found')
-
-	except OSError:
-		regular_font = ImageFont.load_default()
-		title_font = ImageFont.load_default()
-
-		goal_font = regular_font
-
-	# Load logo if requested
-	logo = None
-	if show_logo:
+		for frame in _render_frames(jobs, style, workers):
+			writer.write(frame)
+			frames += 1
+	finally:
+		writer.close()
+
+	if frames:
+		logger.info(f'Created {image_format.upper()} at {output_path}')
+	else:
+		logger.warning('No images found in history to create GIF')
+
+
+def start_history_export(**kwargs: Any) -> asyncio.Task:
+	"""Runs create_history_gif in a thread, failures are logged"""
+
+	async def export() -> None:
 		try:
-			logo = Image.open('./static/browser-use.png')
-			# Resize logo to be small (e.g., 40px height)
-			logo_height = 150
-			aspect_ratio = logo.width / logo.height
-			logo_width = int(logo_height * aspect_ratio)
-			logo = logo.resize((logo_width, logo_height), Image.Resampling.LANCZOS)
+			await asyncio.to_thread(create_history_gif, **kwargs)
 		except Exception as e:
-			logger.warning(f'Could not load logo: {e}')
-
-	# Create task frame if requested
-	if show_task and task:
-		task_frame = _create_task_frame(
-			task,
-			history.history[0].state.screenshot,
-			title_font,  # type: ignore
-			regular_font,  # type: ignore
-			logo,
-			line_spacing,
-		)
-		images.append(task_frame)
+			logger.error(f'Failed to export history to {kwargs.get("output_path")}: {type(e).__name__}: {e}')
+
+	return asyncio.create_task(export())
+
+
+@dataclass
+class _FrameStyle:
+	"""Everything a worker needs besides the frame itself"""
+
+	frame_size: tuple[int, int]
+	font_size: int
+	title_font_size: int
+	margin: int
+	line_spacing: float
+	show_logo: bool
+	image_format: str
+
+
+@dataclass
+class _FrameJob:
+	# base64 screenshot, or the file it was saved to in a screenshot store
+	screenshot: str | None
+	screenshot_path: str | None
+	step_number: int = 0
+	goal: str | None = None
+	# renders the task frame instead of a step
+	task: str | None = None
+
 
-	# Process each history item
-	for i, item in enumerate(history.history, 1):
-		if not item.state.screenshot:
+@dataclass
+class _RenderedFrame:
+	size: tuple[int, int]
+	# a single frame GIF, or raw RGB pixels for ffmpeg
+	data: bytes
+
+
+def _frame_jobs(task: str | None, history: AgentHistoryList, show_goals: bool) -> Iterator[_FrameJob]:
+	"""Frames to render, screenshots saved to a screenshot store are loaded by the workers"""
+	screenshot_paths = history.screenshot_paths()
+	if task:
+		yield _FrameJob(None if screenshot_paths[0] else history.screenshot(0), screenshot_paths[0], task=task)
+
+	for i, item in enumerate(history.history):
+		screenshot = None if screenshot_paths[i] else history.screenshot(i)
+		if not screenshot and not screenshot_paths[i]:
 			continue
+		goal = item.model_output.current_state.next_goal if show_goals and item.model_output else None
+		yield _FrameJob(screenshot, screenshot_paths[i], step_number=i + 1, goal=goal)
 
-		# Convert base64 screenshot to PIL Image
-		img_data = base64.b64decode(item.state.screenshot)
-		image = Image.open(io.BytesIO(img_data))
 
-		if show_goals and item.model_output:
+def _render_frames(jobs: Iterator[_FrameJob], style: _FrameStyle, workers: int | None) -> Iterator[_RenderedFrame]:
+	"""Rendered frames in order, with at most two per worker in flight"""
+	if workers == 0:
+		for job in jobs:
+			frame = _render_frame(job, style)
+			if frame:
+				yield frame
+		return
+
+	workers = workers or os.cpu_count() or 1
+	# PIL releases the GIL while drawing, converting and encoding, so threads render in parallel. Processes would have
+	# to be spawned, as the browser and the event loop run threads, and spawning re-runs unguarded user scripts.
+	with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='history_export') as pool:
+		pending: deque[Future[_RenderedFrame | None]] = deque()
+		for job in jobs:
+			pending.append(pool.submit(_render_frame, job, style))
+			if len(pending) >= 2 * workers and (frame := pending.popleft().result()):
+				yield frame
+		while pending:
+			if frame := pending.popleft().result():
+				yield frame
+
+
+def _render_frame(job: _FrameJob, style: _FrameStyle) -> _RenderedFrame | None:
+	"""Runs in a worker thread"""
+	from PIL import Image, ImageOps
+
+	screenshot = job.screenshot or (ScreenshotStore.load(job.screenshot_path) if job.screenshot_path else None)
+	if not screenshot:
+		return None
+
+	regular_font, title_font = _load_fonts(style.font_size, style.title_font_size)
+	logo = _load_logo() if style.show_logo else None
+
+	if job.task is not None:
+		image = _create_task_frame(job.task, screenshot, title_font, regular_font, logo, style.line_spacing)
+	else:
+		image = Image.open(io.BytesIO(base64.b64decode(screenshot)))
+		if job.goal is not None:
 			image = _add_overlay_to_image(
 				image=image,
-				step_number=i,
-				goal_text=item.model_output.current_state.next_goal,
-				regular_font=regular_font,  # type: ignore
-				title_font=title_font,  # type: ignore
-				margin=margin,
+				step_number=job.step_number,
+				goal_text=job.goal,
+				regular_font=regular_font,
+				title_font=title_font,
+				margin=style.margin,
 				logo=logo,
 			)
 
-		images.append(image)
-
-	if images:
-		# Save the GIF
-		images[0].save(
-			output_path,
-			save_all=True,
-			append_images=images[1:],
-			duration=duration,
-			loop=0,
-			optimize=False,
-		)
-		logger.info(f'Created GIF at {output_path}')
-	else:
-		logger.warning('No images found in history to create GIF')
+	image = image.convert('RGB')
+	if image.size != style.frame_size:
+		# every frame has the size of the first one
+		image = ImageOps.pad(image, style.frame_size, color=(0, 0, 0))
+
+	if style.image_format == 'gif':
+		# quantizing is the expensive part of the GIF encoding, it runs here in parallel
+		output = io.BytesIO()
+		image.convert('P', palette=Image.Palette.ADAPTIVE).save(output, format='GIF')
+		return _RenderedFrame(image.size, output.getvalue())
+	return _RenderedFrame(image.size, image.tobytes())
+
+
+def _load_fonts(font_size: int, title_font_size: int) -> tuple[ImageFont.FreeTypeFont, ImageFont.FreeTypeFont]:
+	"""Regular and title font, loaded once per thread as FreeType faces can not be shared between threads"""
+	fonts = _thread_fonts.__dict__.setdefault('fonts', {})
+	if (font_size, title_font_size) not in fonts:
+		fonts[font_size, title_font_size] = _find_fonts(font_size, title_font_size)
+	return fonts[font_size, title_font_size]
+
+
+def _find_fonts(font_size: int, title_font_size: int) -> tuple[ImageFont.FreeTypeFont, ImageFont.FreeTypeFont]:
+	from PIL import ImageFont
+
+	# Try different font options in order of preference
+	# ArialUni is a font that comes with Office and can render most non-alphabet characters
+	font_options = [
+		'Microsoft YaHei',  # 微软雅黑
+		'SimHei',  # 黑体
+		'SimSun',  # 宋体
+		'Noto Sans CJK SC',  # 思源黑体
+		'WenQuanYi Micro Hei',  # 文泉驿微米黑
+		'Helvetica',
+		'Arial',
+		'DejaVuSans',
+		'Verdana',
+	]
+	for font_name in font_options:
+		try:
+			if platform.system() == 'Windows':
+				# Need to specify the abs font path on Windows
+				font_name = os.path.join(os.getenv('WIN_FONT_DIR', 'C:\\Windows\\Fonts'), font_name + '.ttf')
+			return ImageFont.truetype(font_name, font_size), ImageFont.truetype(font_name, title_font_size)
+		except OSError:
+			continue
+
+	return ImageFont.load_default(), ImageFont.load_default()  # type: ignore
+
+
+@functools.cache
+def _load_logo() -> Image.Image | None:
+	"""Logo resized to the frame overlay, loaded once"""
+	from PIL import Image
+
+	try:
+		logo = Image.open('./static/browser-use.png')
+		# Resize logo to be small (e.g., 40px height)
+		logo_height = 150
+		aspect_ratio = logo.width / logo.height
+		logo_width = int(logo_height * aspect_ratio)
+		return logo.resize((logo_width, logo_height), Image.Resampling.LANCZOS)
+	except Exception as e:
+		logger.warning(f'Could not load logo: {e}')
+		return None
+
+
+class _GifWriter:
+	"""
+	Writes an animated GIF one frame at a time. Every frame is a single frame GIF whose global color table
+	becomes the local color table of its image, so nothing but the file handle is kept between frames.
+	"""
+
+	def __init__(self, output_path: str, duration: int):
+		self.output_path = output_path
+		self.delay = max(duration // 10, 1)  # GIF delays are in hundredths of a second
+		self.file: BinaryIO | None = None
+
+	def write(self, frame: _RenderedFrame) -> None:
+		data = frame.data
+		if self.file is None:
+			self.file = open(self.output_path, 'wb')
+			width, height = frame.size
+			# logical screen without a global color table, then loop forever (NETSCAPE2.0 extension)
+			self.file.write(b'GIF89a' + struct.pack('<HHBBB', width, height, 0, 0, 0))
+			self.file.write(b'\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00')
+
+		flags = data[10]
+		offset = 13
+		color_table = b''
+		if flags & 0x80:
+			color_table = data[offset : offset + 3 * 2 ** ((flags & 0x07) + 1)]
+			offset += len(color_table)
+
+		# skip the extensions of the single frame, the graphic control extension is written below
+		while data[offset] == 0x21:
+			offset += 2
+			while data[offset]:
+				offset += data[offset] + 1
+			offset += 1
+		if data[offset] != 0x2C:
+			raise ValueError('Invalid GIF frame')
+
+		descriptor = bytearray(data[offset : offset + 10])
+		if color_table and not descriptor[9] & 0x80:
+			descriptor[9] |= 0x80 | (flags & 0x07)
+		else:
+			color_table = b''
+		self.file.write(b'\x21\xf9\x04\x00' + struct.pack('<H', self.delay) + b'\x00\x00')
+		self.file.write(bytes(descriptor) + color_table)
+		# image data up to the trailer
+		self.file.write(data[offset + 10 : data.rindex(b'\x3b')])
+
+	def close(self) -> None:
+		if self.file is not None:
+			self.file.write(b'\x3b')
+			self.file.close()
+
+
+class _FFmpegWriter:
+	"""Pipes raw RGB frames to ffmpeg, which encodes them while they arrive"""
+
+	CODEC_ARGS = {
+		'webp': ['-c:v', 'libwebp', '-lossless', '0', '-q:v', '75', '-loop', '0'],
+		# yuv420p needs even dimensions
+		'mp4': ['-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2'],
+	}
+
+	def __init__(self, output_path: str, duration: int, image_format: str):
+		self.ffmpeg = shutil.which('ffmpeg')
+		if not self.ffmpeg:
+			raise RuntimeError(f'ffmpeg is required to export history as {image_format}')
+		self.output_path = output_path
+		self.duration = duration
+		self.image_format = image_format
+		self.process: subprocess.Popen | None = None
+
+	def write(self, frame: _RenderedFrame) -> None:
+		if self.process is None:
+			width, height = frame.size
+			# fmt: off
+			command = [
+				self.ffmpeg, '-y', '-loglevel', 'error',
+				'-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}', '-framerate', f'1000/{self.duration}',
+				'-i', '-', *self.CODEC_ARGS[self.image_format], self.output_path,
+			]
+			# fmt: on
+			self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)  # type: ignore
+		self.process.stdin.write(frame.data)  # type: ignore
+
+	def close(self) -> None:
+		if self.process is None:
+			return
+		_, stderr = self.process.communicate()
+		if self.process.returncode:
+			raise RuntimeError(f'ffmpeg failed: {stderr.decode(errors="replace").strip()}')
 
 
 def _create_task_frame(
@@ -11,14 +11,25 @@ from langchain_core.messages import (
 )
 from pydantic import BaseModel
 
-from browser_use.agent.message_manager.views import MessageMetadata
+from browser_use.agent.message_manager.utils import estimate_image_tokens
+from browser_use.agent.message_manager.views import ManagedMessage, MessageMetadata
 from browser_use.agent.prompts import AgentMessagePrompt
 from browser_use.agent.views import ActionResult, AgentOutput, AgentStepInfo, MessageManagerState
+from browser_use.browser.utils.perceptual_hash import is_same_screenshot
 from browser_use.browser.views import BrowserState
 from browser_use.utils import time_execution_sync
 
 logger = logging.getLogger(__name__)
 
+# message_type of the last screenshot sent, kept in the history while later state messages refer to it
+SCREENSHOT_MESSAGE_TYPE = 'screenshot'
+
+# fixed text of AgentMessagePrompt around the interactive elements (headers, page markers, step info, date)
+STATE_MESSAGE_OVERHEAD_TOKENS = 100
+
+# interactive elements a state message keeps even when the history alone fills max_input_tokens
+MIN_ELEMENTS_TOKENS = 1000
+
 
 class MessageManagerSettings(BaseModel):
 	max_input_tokens: int = 128000
@@ -28,6 +39,8 @@ class MessageManagerSettings(BaseModel):
 	message_context: str | None = None
 	sensitive_data: dict[str, str] | None = None
 	available_file_paths: list[str] | None = None
+	# screenshots at most this many hash bits away from the last one sent are replaced by a text marker, None disables it
+	screenshot_dedup_threshold: int | None = None
 
 
 class MessageManager:
@@ -145,14 +158,51 @@ class MessageManager:
 						self._add_message_with_tokens(msg)
 					result = None  # if result in history, we dont want to add it again
 
+		# the image costs what its real size costs, not a fixed estimate
+		image_tokens = estimate_image_tokens(*state.screenshot_size) if state.screenshot_size else self.settings.image_tokens
+
+		unchanged_screenshot_step = self._get_unchanged_screenshot_step(state, step_info) if use_vision else None
+
 		# otherwise add state message and result to next message (which will not stay in memory)
 		state_message = AgentMessagePrompt(
 			state,
 			result,
 			include_attributes=self.settings.include_attributes,
 			step_info=step_info,
+			max_elements_tokens=self._get_elements_token_budget(
+				state, result, image_tokens if use_vision and unchanged_screenshot_step is None else 0
+			),
+			estimated_characters_per_token=self.settings.estimated_characters_per_token,
+			unchanged_screenshot_step=unchanged_screenshot_step,
 		).get_user_message(use_vision)
-		self._add_message_with_tokens(state_message)
+		self._add_message_with_tokens(state_message, image_tokens=image_tokens)
+
+	def _get_unchanged_screenshot_step(self, state: BrowserState, step_info: AgentStepInfo | None) -> int | None:
+		"""Step of the last screenshot sent if the current one looks the same, otherwise remembers the current one"""
+		if self.settings.screenshot_dedup_threshold is None or not state.screenshot or not step_info:
+			return None
+		# the marker only helps while the model can still see the image it points to
+		if self._get_retained_screenshot_index() is not None and is_same_screenshot(
+			self.state.screenshot_hash, state.screenshot_hash, self.settings.screenshot_dedup_threshold
+		):
+			return self.state.screenshot_step
+		self.state.screenshot_hash = state.screenshot_hash
+		self.state.screenshot_step = step_info.step_number + 1
+		return None
+
+	def _get_elements_token_budget(self, state: BrowserState, result: list[ActionResult] | None, image_tokens: int) -> int:
+		"""
+		Tokens left for the interactive elements of the next state message, image_tokens is 0 without a screenshot.
+
+		Never less than MIN_ELEMENTS_TOKENS, a page without elements leaves the model nothing to act on.
+		"""
+		budget = self.settings.max_input_tokens - self.state.history.current_tokens - STATE_MESSAGE_OVERHEAD_TOKENS
+		if state.screenshot:
+			budget -= image_tokens
+		budget -= self._count_text_tokens(state.url + str(state.tabs))
+		for r in result or []:
+			budget -= self._count_text_tokens((r.extracted_content or '') + (r.error or '').split('\n')[-1])
+		return max(budget, MIN_ELEMENTS_TOKENS)
 
 	def add_model_output(self, model_output: AgentOutput) -> None:
 		"""Add model output as AI message"""
@@ -195,18 +245,23 @@ class MessageManager:
 		return msg
 
 	def _add_message_with_tokens(
-		self, message: BaseMessage, position: int | None = None, message_type: str | None = None
+		self,
+		message: BaseMessage,
+		position: int | None = None,
+		message_type: str | None = None,
+		image_tokens: int | None = None,
 	) -> None:
 		"""Add message with token count metadata
 		position: None for last, -1 for second last, etc.
+		image_tokens: tokens of each image in the message, None for settings.image_tokens
 		"""
 
 		# filter out sensitive data from the message
 		if self.settings.sensitive_data:
 			message = self._filter_sensitive_data(message)
 
-		token_count = self._count_tokens(message)
-		metadata = MessageMetadata(tokens=token_count, message_type=message_type)
+		token_count = self._count_tokens(message, image_tokens)
+		metadata = MessageMetadata(tokens=token_count, message_type=message_type, image_tokens=image_tokens)
 		self.state.history.add_message(message, metadata, position)
 
 	@time_execution_sync('--filter_sensitive_data')
@@ -240,13 +295,13 @@ class MessageManager:
 					message.content[i] = item
 		return message
 
-	def _count_tokens(self, message: BaseMessage) -> int:
+	def _count_tokens(self, message: BaseMessage, image_tokens: int | None = None) -> int:
 		"""Count tokens in a message using the model's tokenizer"""
 		tokens = 0
 		if isinstance(message.content, list):
 			for item in message.content:
 				if 'image_url' in item:
-					tokens += self.settings.image_tokens
+					tokens += self.settings.image_tokens if image_tokens is None else image_tokens
 				elif isinstance(item, dict) and 'text' in item:
 					tokens += self._count_text_tokens(item['text'])
 		else:
@@ -272,14 +327,16 @@ class MessageManager:
 		# if list with image remove image
 		if isinstance(msg.message.content, list):
 			text = ''
+			# the image was counted with the cost of its own size when the message was added
+			image_tokens = self.settings.image_tokens if msg.metadata.image_tokens is None else msg.metadata.image_tokens
 			for item in msg.message.content:
 				if 'image_url' in item:
 					msg.message.content.remove(item)
-					diff -= self.settings.image_tokens
-					msg.metadata.tokens -= self.settings.image_tokens
-					self.state.history.current_tokens -= self.settings.image_tokens
+					diff -= image_tokens
+					msg.metadata.tokens -= image_tokens
+					self.state.history.current_tokens -= image_tokens
 					logger.debug(
-						f'Removed image with {self.settings.image_tokens} tokens - total tokens now: {self.state.history.current_tokens}/{self.settings.max_input_tokens}'
+						f'Removed image with {image_tokens} tokens - total tokens now: {self.state.history.current_tokens}/{self.settings.max_input_tokens}'
 					)
 				elif 'text' in item and isinstance(item, dict):
 					text += item['text']
@@ -319,8 +376,36 @@ class MessageManager:
 		)
 
 	def _remove_last_state_message(self) -> None:
-		"""Remove last state message from history"""
+		"""Remove last state message from history, with screenshot dedup its image stays for later steps"""
+		messages = self.state.history.messages
+		last = messages[-1] if messages else None
 		self.state.history.remove_last_state_message()
+		if (
+			self.settings.screenshot_dedup_threshold is not None
+			and last is not None
+			and last not in self.state.history.messages
+			and isinstance(last.message.content, list)
+		):
+			self._retain_screenshot(last)
+
+	def _retain_screenshot(self, state_message: ManagedMessage) -> None:
+		"""Keeps only the image of a removed state message, replacing the one kept before"""
+		images = [item for item in state_message.message.content if isinstance(item, dict) and 'image_url' in item]
+		if not images:
+			return
+		previous = self._get_retained_screenshot_index()
+		if previous is not None:
+			self.state.history.current_tokens -= self.state.history.messages.pop(previous).metadata.tokens
+		message = HumanMessage(content=[{'type': 'text', 'text': f'Screenshot of step {self.state.screenshot_step}:'}, *images])
+		self._add_message_with_tokens(
+			message, message_type=SCREENSHOT_MESSAGE_TYPE, image_tokens=state_message.metadata.image_tokens
+		)
+
+	def _get_retained_screenshot_index(self) -> int | None:
+		for index, managed_message in enumerate(self.state.history.messages):
+			if managed_message.metadata.message_type == SCREENSHOT_MESSAGE_TYPE:
+				return index
+		return None
 
 	def add_tool_message(self, content: str, message_type: str | None = None) -> None:
 		"""Add tool message to history"""
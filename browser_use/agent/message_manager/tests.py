@@ -3,8 +3,9 @@ from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langchain_openai import AzureChatOpenAI, ChatOpenAI
 
-from browser_use.agent.message_manager.service import MessageManager, MessageManagerSettings
-from browser_use.agent.views import ActionResult
+from browser_use.agent.message_manager.service import MIN_ELEMENTS_TOKENS, MessageManager, MessageManagerSettings
+from browser_use.agent.message_manager.views import MessageManagerState
+from browser_use.agent.views import ActionResult, AgentStepInfo
 from browser_use.browser.views import BrowserState, TabInfo
 from browser_use.dom.views import DOMElementNode, DOMTextNode
 
@@ -120,6 +121,117 @@ def test_add_state_with_non_memory_result(message_manager: MessageManager):
 	assert isinstance(messages[2], HumanMessage)
 
 
+def test_screenshot_tokens_are_counted_per_message():
+	"""The image cost of a screenshot follows its size and is what is subtracted when the image is cut"""
+	message_manager = MessageManager(
+		task='Test task',
+		system_message=SystemMessage(content='Test actions'),
+		settings=MessageManagerSettings(image_tokens=800),
+		state=MessageManagerState(),
+	)
+	state = BrowserState(
+		url='https://test.com',
+		title='Test Page',
+		element_tree=DOMElementNode(tag_name='div', attributes={}, children=[], is_visible=True, parent=None, xpath='//div'),
+		selector_map={},
+		tabs=[TabInfo(page_id=1, url='https://test.com', title='Test Page')],
+		screenshot='aGVsbG8=',
+		screenshot_size=(1280, 1100),
+	)
+	message_manager.add_state_message(state)
+
+	last = message_manager.state.history.messages[-1]
+	assert message_manager.settings.image_tokens == 800
+	assert last.metadata.image_tokens == 765
+	assert last.metadata.tokens == message_manager._count_tokens(last.message, 765)
+
+	# one token over the limit, only the image has to go
+	tokens_before = message_manager.state.history.current_tokens
+	message_manager.settings.max_input_tokens = tokens_before - 1
+	message_manager.cut_messages()
+	assert isinstance(last.message.content, str)
+	assert message_manager.state.history.current_tokens == tokens_before - 765
+	assert message_manager.state.history.current_tokens == sum(m.metadata.tokens for m in message_manager.state.history.messages)
+
+
+def _image_texts(message_manager: MessageManager) -> list[str]:
+	"""Text of every message in the history that carries an image"""
+	return [
+		m.message.content[0]['text']  # type: ignore
+		for m in message_manager.state.history.messages
+		if isinstance(m.message.content, list) and any('image_url' in item for item in m.message.content)
+	]
+
+
+def test_unchanged_screenshot_marker_points_to_a_retained_image():
+	"""A state message only replaces its screenshot by a marker while the earlier image is still in the history"""
+	message_manager = MessageManager(
+		task='Test task',
+		system_message=SystemMessage(content='Test actions'),
+		settings=MessageManagerSettings(screenshot_dedup_threshold=4),
+		state=MessageManagerState(),
+	)
+	state = BrowserState(
+		url='https://test.com',
+		title='Test Page',
+		element_tree=DOMElementNode(tag_name='div', attributes={}, children=[], is_visible=True, parent=None, xpath='//div'),
+		selector_map={},
+		tabs=[TabInfo(page_id=1, url='https://test.com', title='Test Page')],
+		screenshot='aGVsbG8=',
+		screenshot_hash=0b1010,
+	)
+
+	message_manager.add_state_message(state, step_info=AgentStepInfo(step_number=0, max_steps=10))
+	# the agent drops the state message after every model call, its image stays
+	message_manager._remove_last_state_message()
+	assert _image_texts(message_manager) == ['Screenshot of step 1:']
+
+	message_manager.add_state_message(state, step_info=AgentStepInfo(step_number=1, max_steps=10))
+	last = message_manager.get_messages()[-1]
+	assert isinstance(last.content, str) and 'screenshot of step 1' in last.content
+	message_manager._remove_last_state_message()
+	assert _image_texts(message_manager) == ['Screenshot of step 1:']
+
+	# once the image is gone, e.g. summarized into procedural memory, the screenshot is sent again
+	retained = message_manager._get_retained_screenshot_index()
+	assert retained is not None
+	message_manager.state.history.messages.pop(retained)
+	message_manager.add_state_message(state, step_info=AgentStepInfo(step_number=2, max_steps=10))
+	assert isinstance(message_manager.get_messages()[-1].content, list)
+	message_manager._remove_last_state_message()
+	assert _image_texts(message_manager) == ['Screenshot of step 3:']
+
+
+def test_elements_keep_a_minimum_budget_when_the_history_is_over_the_limit():
+	"""A history that alone exceeds max_input_tokens still leaves the state message its interactive elements"""
+	message_manager = MessageManager(
+		task='Test task',
+		system_message=SystemMessage(content='Test actions'),
+		settings=MessageManagerSettings(max_input_tokens=500, estimated_characters_per_token=3),
+		state=MessageManagerState(),
+	)
+	message_manager._add_message_with_tokens(HumanMessage(content='previous step ' * 500))
+	assert message_manager.state.history.current_tokens > message_manager.settings.max_input_tokens
+
+	body = DOMElementNode(tag_name='body', attributes={}, children=[], is_visible=True, parent=None, xpath='/body')
+	button = DOMElementNode(
+		tag_name='button', attributes={}, children=[], is_visible=True, parent=body, xpath='/body/button', highlight_index=0
+	)
+	button.children = [DOMTextNode(text='Save', is_visible=True, parent=button)]
+	body.children = [button]
+	state = BrowserState(
+		url='https://test.com',
+		title='Test Page',
+		element_tree=body,
+		selector_map={0: button},
+		tabs=[TabInfo(page_id=1, url='https://test.com', title='Test Page')],
+	)
+
+	assert message_manager._get_elements_token_budget(state, None, 0) == MIN_ELEMENTS_TOKENS
+	message_manager.add_state_message(state, use_vision=False)
+	assert '[0]<button >Save' in message_manager.get_messages()[-1].content
+
+
 @pytest.mark.skip('not sure how to fix this')
 @pytest.mark.parametrize('max_tokens', [100000, 10000, 5000])
 def test_token_overflow_handling_with_real_flow(message_manager: MessageManager, max_tokens):
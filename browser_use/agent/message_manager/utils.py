@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import json
 import logging
+import math
 import os
 import re
 from typing import Any
@@ -23,6 +24,16 @@ MODELS_WITHOUT_TOOL_SUPPORT_PATTERNS = [
 ]
 
 
+def estimate_image_tokens(width: int, height: int) -> int:
+	"""
+	Tokens of an image input, following the common tiling scheme: fit into 2048x2048, scale the shorter side
+	down to 768 and count 170 tokens per 512px tile plus 85 base tokens. A 1280x1100 screenshot costs 765.
+	"""
+	scale = min(1.0, 2048 / max(width, height), 768 / min(width, height))
+	tiles = math.ceil(width * scale / 512) * math.ceil(height * scale / 512)
+	return 85 + 170 * tiles
+
+
 def is_model_without_tool_support(model_name: str) -> bool:
 	return any(re.match(pattern, model_name) for pattern in MODELS_WITHOUT_TOOL_SUPPORT_PATTERNS)
 
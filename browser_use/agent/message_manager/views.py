@@ -19,6 +19,8 @@ class MessageMetadata(BaseModel):
 
 	tokens: int = 0
 	message_type: str | None = None
+	# tokens counted for each image of the message, None means MessageManagerSettings.image_tokens
+	image_tokens: int | None = None
 
 
 class ManagedMessage(BaseModel):
@@ -131,5 +133,8 @@ class MessageManagerState(BaseModel):
 
 	history: MessageHistory = Field(default_factory=MessageHistory)
 	tool_id: int = 1
+	# perceptual hash and step of the last screenshot sent as an image
+	screenshot_hash: int | None = None
+	screenshot_step: int | None = None
 
 	model_config = ConfigDict(arbitrary_types_allowed=True)
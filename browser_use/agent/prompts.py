@@ -66,14 +66,26 @@ class AgentMessagePrompt:
 		result: list['ActionResult'] | None = None,
 		include_attributes: list[str] | None = None,
 		step_info: Optional['AgentStepInfo'] = None,
+		max_elements_tokens: int | None = None,
+		estimated_characters_per_token: int = 3,
+		unchanged_screenshot_step: int | None = None,
 	):
 		self.state = state
 		self.result = result
 		self.include_attributes = include_attributes or []
 		self.step_info = step_info
+		# token budget of the interactive elements list, the list is cut at an element boundary once it is spent
+		self.max_elements_tokens = max_elements_tokens
+		self.estimated_characters_per_token = estimated_characters_per_token
+		# the screenshot looks like the one of this step, a marker is sent instead of the image
+		self.unchanged_screenshot_step = unchanged_screenshot_step
 
 	def get_user_message(self, use_vision: bool = True) -> HumanMessage:
-		elements_text = self.state.element_tree.clickable_elements_to_string(include_attributes=self.include_attributes)
+		elements_text = self.state.element_tree.clickable_elements_to_string(
+			include_attributes=self.include_attributes,
+			max_tokens=self.max_elements_tokens,
+			characters_per_token=self.estimated_characters_per_token,
+		)
 
 		has_content_above = (self.state.pixels_above or 0) > 0
 		has_content_below = (self.state.pixels_below or 0) > 0
@@ -122,6 +134,12 @@ Interactive elements from top layer of the current page inside the viewport:
 					error = result.error.split('\n')[-1]
 					state_description += f'\nAction error {i + 1}/{len(self.result)}: ...{error}'
 
+		if self.state.screenshot and use_vision is True and self.unchanged_screenshot_step is not None:
+			state_description += (
+				f'\nScreenshot unchanged: the page looks the same as in the screenshot of step {self.unchanged_screenshot_step}'
+			)
+			return HumanMessage(content=state_description)
+
 		if self.state.screenshot and use_vision is True:
 			# Format message for vision model
 			return HumanMessage(
@@ -129,7 +147,9 @@ Interactive elements from top layer of the current page inside the viewport:
 					{'type': 'text', 'text': state_description},
 					{
 						'type': 'image_url',
-						'image_url': {'url': f'data:image/png;base64,{self.state.screenshot}'},  # , 'detail': 'low'
+						'image_url': {
+							'url': f'data:{self.state.screenshot_mime_type};base64,{self.state.screenshot}'
+						},  # , 'detail': 'low'
 					},
 				]
 			)
@@ -12,6 +12,7 @@ from pathlib import Path
 from typing import Any, Generic, TypeVar
 import datetime
 
+import anyio
 from dotenv import load_dotenv
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import (
@@ -23,7 +24,7 @@ from langchain_core.messages import (
 # from lmnr.sdk.decorators import observe
 from pydantic import BaseModel, ValidationError
 
-from browser_use.agent.gif import create_history_gif
+from browser_use.agent.gif import start_history_export
 from browser_use.agent.memory.service import Memory
 from browser_use.agent.memory.views import MemoryConfig
 from browser_use.agent.message_manager.service import MessageManager, MessageManagerSettings
@@ -49,9 +50,12 @@ from browser_use.agent.views import (
 )
 from browser_use.browser.browser import Browser
 from browser_use.browser.context import BrowserContext
+from browser_use.browser.screenshot_store import ScreenshotStore
+from browser_use.browser.utils.perceptual_hash import is_same_screenshot
 from browser_use.browser.views import BrowserState, BrowserStateHistory
 from browser_use.controller.registry.views import ActionModel
 from browser_use.controller.service import Controller
+from browser_use.dom.diff_processor.service import DOMDiffProcessor
 from browser_use.dom.history_tree_processor.service import (
 	DOMHistoryElement,
 	HistoryTreeProcessor,
@@ -119,6 +123,8 @@ class Agent(Generic[Context]):
 		# Agent settings
 		use_vision: bool = True,
 		use_vision_for_planner: bool = False,
+		screenshot_dedup_threshold: int | None = None,
+		save_screenshots_path: str | None = None,
 		save_conversation_path: str | None = None,
 		save_conversation_path_encoding: str | None = 'utf-8',
 		max_failures: int = 5,
@@ -168,6 +174,8 @@ class Agent(Generic[Context]):
 		self.settings = AgentSettings(
 			use_vision=use_vision,
 			use_vision_for_planner=use_vision_for_planner,
+			screenshot_dedup_threshold=screenshot_dedup_threshold,
+			save_screenshots_path=save_screenshots_path,
 			save_conversation_path=save_conversation_path,
 			save_conversation_path_encoding=save_conversation_path_encoding,
 			max_failures=max_failures,
@@ -190,6 +198,10 @@ class Agent(Generic[Context]):
 			extend_planner_system_message=extend_planner_system_message,
 		)
 
+		self.screenshot_store = ScreenshotStore(save_screenshots_path) if save_screenshots_path else None
+		# GIF/video export of the last run, await it to wait for the file
+		self.history_export: asyncio.Task | None = None
+
 		# Memory settings
 		self.enable_memory = enable_memory
 		self.memory_config = memory_config
@@ -260,6 +272,7 @@ class Agent(Generic[Context]):
 				message_context=self.settings.message_context,
 				sensitive_data=sensitive_data,
 				available_file_paths=self.settings.available_file_paths,
+				screenshot_dedup_threshold=self.settings.screenshot_dedup_threshold,
 			),
 			state=self.state.message_manager_state,
 		)
@@ -443,7 +456,9 @@ class Agent(Generic[Context]):
 		tokens = 0
 
 		try:
-			state = await self.browser_context.get_state(cache_clickable_elements_hashes=True)
+			state = await self.browser_context.get_state(
+				cache_clickable_elements_hashes=True, hash_screenshot=self.settings.screenshot_dedup_threshold is not None
+			)
 			current_page = await self.browser_context.get_current_page()
 
 			# generate procedural memory if needed
@@ -601,7 +616,7 @@ class Agent(Generic[Context]):
 					step_end_time=step_end_time,
 					input_tokens=tokens,
 				)
-				self._make_history_item(model_output, state, result, metadata)
+				await self._make_history_item(model_output, state, result, metadata)
 
 	@time_execution_async('--handle_step_error (agent)')
 	async def _handle_step_error(self, error: Exception) -> list[ActionResult]:
@@ -648,7 +663,7 @@ class Agent(Generic[Context]):
 
 		return [ActionResult(error=error_msg, include_in_memory=True)]
 
-	def _make_history_item(
+	async def _make_history_item(
 		self,
 		model_output: AgentOutput | None,
 		state: BrowserState,
@@ -668,8 +683,28 @@ class Agent(Generic[Context]):
 			tabs=state.tabs,
 			interacted_element=interacted_elements,
 			screenshot=state.screenshot,
+			screenshot_hash=state.screenshot_hash,
 		)
 
+		# a screenshot that looks like the last stored one is kept as a reference to it
+		history = self.state.history.history
+		if self.settings.screenshot_dedup_threshold is not None and state.screenshot and history:
+			last_frame = history[-1].state.screenshot_ref
+			last_frame = len(history) - 1 if last_frame is None else last_frame
+			frame = history[last_frame].state
+			if (frame.screenshot or frame.screenshot_path) and is_same_screenshot(
+				frame.screenshot_hash, state.screenshot_hash, self.settings.screenshot_dedup_threshold
+			):
+				state_history.screenshot = None
+				state_history.screenshot_ref = last_frame
+
+		# only the path stays in memory, every distinct screenshot is written once
+		if self.screenshot_store and state_history.screenshot:
+			state_history.screenshot_path = await anyio.to_thread.run_sync(
+				self.screenshot_store.save, state_history.screenshot, state.screenshot_mime_type
+			)
+			state_history.screenshot = None
+
 		history_item = AgentHistory(model_output=model_output, result=result, state=state_history, metadata=metadata)
 
 		self.state.history.history.append(history_item)
@@ -741,7 +776,7 @@ class Agent(Generic[Context]):
 		
 		input_messages_str = f'{input_messages}'
 		input_messages_str = re.sub(  
-            r"'image_url': \{'url': 'data:image/png;base64,[^']*'",
+            r"'image_url': \{'url': 'data:image/[a-z]+;base64,[^']*'",
             "'image_url': {'url': 'data:image/png;base64,a.png'",
             input_messages_str
         )
@@ -1029,7 +1064,10 @@ class Agent(Generic[Context]):
 				if isinstance(self.settings.generate_gif, str):
 					output_path = self.settings.generate_gif
 
-				create_history_gif(task=self.task, history=self.state.history, output_path=output_path)
+				# rendered in the background from a copy of the history, run() does not wait for it
+				self.history_export = start_history_export(
+					task=self.task, history=AgentHistoryList(history=list(self.state.history.history)), output_path=output_path
+				)
 
 	# @observe(name='controller.multi_act')
 	@time_execution_async('--multi-act (agent)')
@@ -1041,29 +1079,27 @@ class Agent(Generic[Context]):
 		"""Execute multiple actions"""
 		results = []
 
-		cached_selector_map = await self.browser_context.get_selector_map()
-		cached_path_hashes = {e.hash.branch_path_hash for e in cached_selector_map.values()}
+		cached_state = await self.browser_context.get_cached_state()
 
 		await self.browser_context.remove_highlights()
 
 		for i, action in enumerate(actions):
 			if action.get_index() is not None and i != 0:
 				new_state = await self.browser_context.get_state(cache_clickable_elements_hashes=False)
-				new_selector_map = new_state.selector_map
+				diff = DOMDiffProcessor.diff(cached_state, new_state)
 
 				# Detect index change after previous action
-				orig_target = cached_selector_map.get(action.get_index())  # type: ignore
-				orig_target_hash = orig_target.hash.branch_path_hash if orig_target else None
-				new_target = new_selector_map.get(action.get_index())  # type: ignore
-				new_target_hash = new_target.hash.branch_path_hash if new_target else None
-				if orig_target_hash != new_target_hash:
+				orig_target = cached_state.selector_map.get(action.get_index()) if cached_state else None  # type: ignore
+				new_target = new_state.selector_map.get(action.get_index())  # type: ignore
+				counterpart = diff.get_counterpart(orig_target) if orig_target is not None else None
+				# the target is gone or another element took its index
+				if (orig_target is not None and counterpart is None) or counterpart is not new_target:
 					msg = f'Element index changed after action {i} / {len(actions)}, because page changed.'
 					logger.info(msg)
 					results.append(ActionResult(extracted_content=msg, include_in_memory=True))
 					break
 
-				new_path_hashes = {e.hash.branch_path_hash for e in new_selector_map.values()}
-				if check_for_new_elements and not new_path_hashes.issubset(cached_path_hashes):
+				if check_for_new_elements and diff.added:
 					# next action requires index but there are new elements on the page
 					msg = f'Something new appeared after action {i} / {len(actions)}'
 					logger.info(msg)
@@ -1258,7 +1294,16 @@ class Agent(Generic[Context]):
 		if not historical_element or not current_state.element_tree:
 			return action
 
-		current_element = HistoryTreeProcessor.find_history_element_in_tree(historical_element, current_state.element_tree)
+		# the hash index is built once per state and shared by all actions of the step
+		current_element = HistoryTreeProcessor.find_history_element_in_tree(
+			historical_element, current_state.element_tree, current_state.element_hashes
+		)
+		if current_element is None:
+			current_element = HistoryTreeProcessor.find_similar_element(historical_element, current_state.selector_map)
+			if current_element is not None:
+				logger.warning(
+					f'Element changed since recording, using closest match at index {current_element.highlight_index}'
+				)
 
 		if not current_element or current_element.highlight_index is None:
 			return None
@@ -1442,7 +1487,7 @@ class Agent(Generic[Context]):
 			planner_messages_str = f'{planner_messages}'
 				# 替换长base64图片数据为简化的占位符
 			planner_messages_str = re.sub(	
-				r"'image_url': \{'url': 'data:image/png;base64,[^']*'",
+				r"'image_url': \{'url': 'data:image/[a-z]+;base64,[^']*'",
 				"'image_url': {'url': 'data:image/png;base64,a.png'",
 				planner_messages_str
 			)
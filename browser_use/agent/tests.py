@@ -1,12 +1,15 @@
 import pytest
 
+from browser_use.agent.service import Agent
 from browser_use.agent.views import (
 	ActionResult,
 	AgentBrain,
 	AgentHistory,
 	AgentHistoryList,
 	AgentOutput,
+	AgentSettings,
 )
+from browser_use.browser.context import BrowserContextConfig
 from browser_use.browser.views import BrowserState, BrowserStateHistory, TabInfo
 from browser_use.controller.registry.service import Registry
 from browser_use.controller.views import ClickElementAction, DoneAction, ExtractPageContentAction
@@ -193,5 +196,83 @@ def test_action_creation(action_registry):
 	assert click_action.model_dump(exclude_none=True) == {'click_element': {'index': 1}}
 
 
+class _MultiActBrowserContext:
+	def __init__(self, cached_state: BrowserState, next_state: BrowserState):
+		self.cached_state = cached_state
+		self.next_state = next_state
+		self.config = BrowserContextConfig(wait_between_actions=0)
+
+	async def get_cached_state(self):
+		return self.cached_state
+
+	async def get_state(self, cache_clickable_elements_hashes: bool):
+		return self.next_state
+
+	async def remove_highlights(self):
+		pass
+
+
+class _MultiActController:
+	def __init__(self):
+		self.actions = []
+
+	async def act(self, action, browser_context, page_extraction_llm, sensitive_data, available_file_paths, context):
+		self.actions.append(action)
+		return ActionResult()
+
+
+class _MultiActAgent:
+	def __init__(self, browser_context: _MultiActBrowserContext):
+		self.browser_context = browser_context
+		self.controller = _MultiActController()
+		self.settings = AgentSettings()
+		self.sensitive_data = None
+		self.context = None
+
+	async def _raise_if_stopped_or_paused(self):
+		pass
+
+
+def _browser_state(*elements: DOMElementNode) -> BrowserState:
+	tree = DOMElementNode(tag_name='body', xpath='/body', attributes={}, children=list(elements), is_visible=True, parent=None)
+	for element in elements:
+		element.parent = tree
+	return BrowserState(
+		url='https://example.com',
+		title='Example Page',
+		tabs=[],
+		element_tree=tree,
+		selector_map={element.highlight_index: element for element in elements},  # type: ignore
+	)
+
+
+def _button(xpath: str, highlight_index: int, name: str) -> DOMElementNode:
+	return DOMElementNode(
+		tag_name='button',
+		xpath=xpath,
+		attributes={'name': name},
+		children=[],
+		is_visible=True,
+		parent=None,
+		highlight_index=highlight_index,
+	)
+
+
+async def test_multi_act_stops_when_the_target_was_removed(action_registry):
+	# the first click removes the target of the second one, no element takes its index
+	cached_state = _browser_state(_button('html/body/button[1]', 0, 'open'), _button('html/body/button[2]', 1, 'save'))
+	next_state = _browser_state(_button('html/body/button[1]', 0, 'open'))
+	agent = _MultiActAgent(_MultiActBrowserContext(cached_state, next_state))
+
+	results = await Agent.multi_act(
+		agent,  # type: ignore
+		[action_registry(click_element={'index': 0}), action_registry(click_element={'index': 1})],
+		check_for_new_elements=False,
+	)
+
+	assert len(agent.controller.actions) == 1
+	assert results[-1].extracted_content == 'Element index changed after action 1 / 2, because page changed.'
+
+
 # run this with:
 # pytest browser_use/agent/tests.py
@@ -42,6 +42,8 @@ class AgentSettings(BaseModel):
 
 	use_vision: bool = True
 	use_vision_for_planner: bool = False
+	screenshot_dedup_threshold: int | None = None
+	save_screenshots_path: str | None = None
 	save_conversation_path: str | None = None
 	save_conversation_path_encoding: str | None = 'utf-8'
 	max_failures: int = 5
@@ -356,8 +358,20 @@ class AgentHistoryList(BaseModel):
 		return [h.state.url if h.state.url is not None else None for h in self.history]
 
 	def screenshots(self) -> list[str | None]:
-		"""Get all screenshots from history"""
-		return [h.state.screenshot if h.state.screenshot is not None else None for h in self.history]
+		"""Get all screenshots from history, unchanged screenshots resolve to the earlier one they refer to"""
+		return [self.screenshot(i) for i in range(len(self.history))]
+
+	def screenshot(self, index: int) -> str | None:
+		"""Screenshot of one step, loaded from disk if it was saved to a screenshot store"""
+		return self._screenshot_state(index).get_screenshot()
+
+	def screenshot_paths(self) -> list[str | None]:
+		"""Files of the screenshots saved to a screenshot store, None for steps kept in memory"""
+		return [self._screenshot_state(i).screenshot_path for i in range(len(self.history))]
+
+	def _screenshot_state(self, index: int) -> BrowserStateHistory:
+		state = self.history[index].state
+		return self.history[state.screenshot_ref].state if state.screenshot_ref is not None else state
 
 	def action_names(self) -> list[str]:
 		"""Get all action names from history"""
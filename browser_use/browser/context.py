@@ -7,12 +7,15 @@ import base64
 import gc
 import json
 import logging
+import math
 import os
 import re
+import struct
 import time
 import uuid
-from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Literal
+from urllib.parse import urlparse
 
 import anyio
 from playwright._impl._errors import TimeoutError
@@ -21,21 +24,29 @@ from playwright.async_api import (
 	BrowserContext as PlaywrightBrowserContext,
 )
 from playwright.async_api import (
+	CDPSession,
 	ElementHandle,
 	FrameLocator,
 	Page,
+	Request,
 )
 from pydantic import BaseModel, ConfigDict, Field
 
+from browser_use.browser.network import BlockedResources, NetworkIdleTracker, ResourceBlocker, ResourceBlockingProfile
+from browser_use.browser.page_load_timings import PageLoadSample, PageLoadTimings, PageLoadWaits
+from browser_use.browser.screencast import ScreencastBuffer, ScreencastFrame
+from browser_use.browser.utils.perceptual_hash import decode_png_grayscale, difference_hash, hash_image
 from browser_use.browser.views import (
 	BrowserError,
 	BrowserState,
+	Screenshot,
 	TabInfo,
 	URLNotAllowedError,
 )
-from browser_use.dom.clickable_element_processor.service import ClickableElementProcessor
-from browser_use.dom.service import DomService
-from browser_use.dom.views import DOMElementNode, SelectorMap
+from browser_use.dom.diff_processor.service import DOMDiffProcessor
+from browser_use.dom.history_tree_processor.view import HashedDomElement
+from browser_use.dom.service import DomBackend, DomService, HighlightRenderer
+from browser_use.dom.views import DOMElementNode, DOMTreeArrays, SelectorMap
 from browser_use.utils import time_execution_async, time_execution_sync
 
 if TYPE_CHECKING:
@@ -43,6 +54,8 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+ScreenshotFormat = Literal['png', 'jpeg', 'webp']
+
 import platform
 
 BROWSER_NAVBAR_HEIGHT = {
@@ -75,6 +88,18 @@ class BrowserContextConfig(BaseModel):
 		maximum_wait_page_load_time: 5.0
 			Maximum time to wait for page load before proceeding anyway
 
+		adaptive_page_load_waits: False
+			Learn how long the pages of each domain take to settle and pick the minimum and network idle waits from the
+			observed percentiles, so fast domains do not pay the waits of slow ones. The configured waits are the
+			upper bounds, adaptive_page_load_min_wait the lower bound. maximum_wait_page_load_time stays the timeout.
+			See get_page_load_timings().
+
+		adaptive_page_load_min_wait: 0.1
+			Shortest page load wait the adaptive waits pick.
+
+		page_load_timings_file: None
+			JSON file the learned page load timings are loaded from and saved to on close, to keep them between runs.
+
 		wait_between_actions: 1.0
 			Time to wait between multiple per step actions
 
@@ -114,6 +139,55 @@ class BrowserContextConfig(BaseModel):
 		include_dynamic_attributes: bool = True
 			Include dynamic attributes in the CSS selector. If you want to reuse the css_selectors, it might be better to set this to False.
 
+		incremental_dom_updates: False
+			Track DOM mutations in the page and only re-extract the subtrees that changed since the last state on the same url.
+			Falls back to a full extraction after scrolling, resizing, navigation, when an overlay changed which elements are on top
+			or when too much of the page changed.
+
+		compact_dom_wire_format: False
+			Transfer the extracted DOM from the page as parallel arrays with a string table instead of one dict per node.
+			Reduces payload size and parsing work on large pages.
+
+		dom_backend: 'js'
+			How the DOM tree is extracted. 'js' walks the DOM with buildDomTree.js inside the page,
+			'cdp_snapshot' builds it from a single CDP DOMSnapshot.captureSnapshot call (chromium only, falls back to 'js').
+			'ax_tree' builds the element list from the accessibility tree (Accessibility.getFullAXTree): only interactive roles,
+			labelled with their accessible name, much smaller on form heavy pages. Main frame only, chromium only.
+
+		cross_origin_iframes: False
+			Also extract visible cross-origin iframes, each in its own execution context and concurrently with the page,
+			and merge them into the element tree with one highlight index space. Ad network frames are skipped.
+
+		highlight_renderer: 'dom'
+			How highlights are drawn. 'dom' creates an overlay div and a label per element, 'canvas' paints all of them onto
+			a single canvas, which is much cheaper to install and remove on pages with hundreds of interactive elements.
+
+		screenshot_format: 'png'
+			Image format of the state screenshots, 'png', 'jpeg' or 'webp'. jpeg and webp are encoded by chromium
+			(CDP Page.captureScreenshot) and are several times smaller than png.
+
+		screenshot_quality: None
+			Compression quality from 0 to 100 for 'jpeg' and 'webp', None uses the browser default.
+
+		screenshot_max_width: None
+		screenshot_max_height: None
+			Downscale screenshots to fit these pixel dimensions. The image token estimate follows the real size.
+
+		screencast: False
+			Stream the agent's current page with CDP Page.startScreencast and use the latest frame as the screenshot,
+			instead of capturing one per state. Frames from before an action or before the highlights were drawn are
+			not used. Chromium only, 'webp' is streamed as 'jpeg'.
+
+		screencast_frame_timeout: 0.5
+			Seconds to wait for a fresh screencast frame, the screenshot is captured normally if none arrives.
+			Chromium only sends frames when the page repaints.
+
+		block_resources: []
+			Request-blocking profiles to abort requests the agent does not need, any of 'ads' (ad networks and trackers),
+			'widgets' (chat, comment, push and share widgets), 'fonts', 'media' and 'images'. Images are blocked by
+			resource type since their size is unknown before they load, and then also miss from screenshots.
+			Playwright disables the HTTP cache of a context with request interception.
+
 		  http_credentials: None
 	  Dictionary with HTTP basic authentication credentials for corporate intranets (only supports one set of credentials for all URLs at the moment), e.g.
 	  {"username": "bill", "password": "pa55w0rd"}
@@ -150,6 +224,9 @@ class BrowserContextConfig(BaseModel):
 	minimum_wait_page_load_time: float = 0.25
 	wait_for_network_idle_page_load_time: float = 0.5
 	maximum_wait_page_load_time: float = 5
+	adaptive_page_load_waits: bool = False
+	adaptive_page_load_min_wait: float = 0.1
+	page_load_timings_file: str | None = None
 	wait_between_actions: float = 0.5
 
 	disable_security: bool = False  # disable_security=True is dangerous as any malicious URL visited could embed an iframe for the user's bank, and use their cookies to steal money
@@ -169,6 +246,18 @@ class BrowserContextConfig(BaseModel):
 	viewport_expansion: int = 0
 	allowed_domains: list[str] | None = None
 	include_dynamic_attributes: bool = True
+	incremental_dom_updates: bool = False
+	compact_dom_wire_format: bool = False
+	dom_backend: DomBackend = 'js'
+	cross_origin_iframes: bool = False
+	highlight_renderer: HighlightRenderer = 'dom'
+	screenshot_format: ScreenshotFormat = 'png'
+	screenshot_quality: int | None = Field(default=None, ge=0, le=100)
+	screenshot_max_width: int | None = None
+	screenshot_max_height: int | None = None
+	screencast: bool = False
+	screencast_frame_timeout: float = 0.5
+	block_resources: list[ResourceBlockingProfile] = Field(default_factory=list)
 	http_credentials: dict[str, str] | None = None
 
 	keep_alive: bool = Field(default=False, alias='_force_keep_context_alive')  # used to be called _force_keep_context_alive
@@ -187,13 +276,64 @@ class BrowserContextConfig(BaseModel):
 
 
 @dataclass
-class CachedStateClickableElementsHashes:
+class CachedStateForNewElements:
 	"""
-	Clickable elements hashes for the last state
+	Last state the clickable elements of the next state are compared against to find the new ones
+
+	Only the DOM is kept, as arrays, not the screenshot and page info of the BrowserState.
 	"""
 
 	url: str
-	hashes: set[str]
+	tree: DOMTreeArrays
+
+
+@dataclass
+class CachedLocator:
+	"""
+	Element resolved by get_locate_element, with the selectors that found it
+	"""
+
+	frame_selectors: list[str]
+	css_selector: str
+	element_handle: ElementHandle
+
+
+@dataclass
+class LocatorCache:
+	"""
+	Elements resolved by get_locate_element in one document, keyed by highlight index and element hash.
+
+	Cleared when the agent page navigates (other page or url), pruned to the surviving elements on every DOM refresh.
+	Dropped handles are disposed, so the page does not keep their elements alive.
+	"""
+
+	page: Page | None = None
+	url: str | None = None
+	locators: dict[tuple[int, HashedDomElement], CachedLocator] = field(default_factory=dict)
+
+	async def for_page(self, page: Page) -> dict[tuple[int, HashedDomElement], CachedLocator]:
+		if page is not self.page or page.url != self.url:
+			self.page, self.url = page, page.url
+			await self.dispose([locator.element_handle for locator in self.locators.values()])
+			self.locators.clear()
+		return self.locators
+
+	async def retain(self, selector_map: SelectorMap) -> None:
+		if not self.locators:
+			return
+		live_keys = {(index, element.hash) for index, element in selector_map.items()}
+		dropped = [locator.element_handle for key, locator in self.locators.items() if key not in live_keys]
+		self.locators = {key: locator for key, locator in self.locators.items() if key in live_keys}
+		await self.dispose(dropped)
+
+	@staticmethod
+	async def dispose(element_handles: list[ElementHandle]) -> None:
+		for element_handle in element_handles:
+			try:
+				await element_handle.dispose()
+			except Exception as e:
+				# the document of the handle is gone already
+				logger.debug(f'Failed to dispose element handle: {e}')
 
 
 class BrowserSession:
@@ -201,7 +341,30 @@ class BrowserSession:
 		self.context = context
 		self.cached_state = cached_state
 
-		self.cached_state_clickable_elements_hashes: CachedStateClickableElementsHashes | None = None
+		self.cached_state_for_new_elements: CachedStateForNewElements | None = None
+		self.locator_cache = LocatorCache()
+		self.screencast: ScreencastBuffer | None = None
+		self.resource_blocker: ResourceBlocker | None = None
+		# requests of every page are tracked from the moment it opens
+		self.network_idle_trackers: dict[Page, NetworkIdleTracker] = {}
+		# origins whose storage a soft reset clears
+		self.visited_origins: set[str] = set()
+
+	def get_network_idle_tracker(self, page: Page) -> NetworkIdleTracker:
+		"""The network tracker of page, installed when the page opens or the first time it is needed"""
+		tracker = self.network_idle_trackers.get(page)
+		if tracker is None:
+			tracker = self.network_idle_trackers[page] = NetworkIdleTracker(page)
+			tracker.attach()
+			page.once('close', lambda _: self.network_idle_trackers.pop(page, None))
+		return tracker
+
+	def record_visited_origin(self, request: Request) -> None:
+		if request.resource_type != 'document':
+			return
+		url = urlparse(request.url)
+		if url.scheme in ('http', 'https'):
+			self.visited_origins.add(f'{url.scheme}://{url.netloc}')
 
 
 @dataclass
@@ -227,6 +390,21 @@ class BrowserContext:
 
 		self.state = state or BrowserContextState()
 
+		# learned per domain, so it outlives the sessions of this context
+		self.page_load_timings = PageLoadTimings(
+			PageLoadWaits(
+				minimum=self.config.minimum_wait_page_load_time,
+				network_idle=self.config.wait_for_network_idle_page_load_time,
+				maximum=self.config.maximum_wait_page_load_time,
+			),
+			lower_bound=self.config.adaptive_page_load_min_wait,
+		)
+		if self.config.adaptive_page_load_waits and self.config.page_load_timings_file:
+			try:
+				self.page_load_timings.load(self.config.page_load_timings_file)
+			except Exception as e:
+				logger.warning(f'⚠️  Failed to load page load timings from {self.config.page_load_timings_file}: {e}')
+
 		# Initialize these as None - they'll be set up when needed
 		self.session: BrowserSession | None = None
 
@@ -261,6 +439,10 @@ class BrowserContext:
 				self._page_event_handler = None
 
 			await self.save_cookies()
+			await self.save_page_load_timings()
+
+			if self.session.screencast:
+				await self.session.screencast.stop()
 
 			if self.config.trace_path:
 				try:
@@ -318,6 +500,11 @@ class BrowserContext:
 			context=context,
 			cached_state=None,
 		)
+		context.on('page', self.session.get_network_idle_tracker)
+		context.on('request', self.session.record_visited_origin)
+		if self.config.block_resources:
+			self.session.resource_blocker = ResourceBlocker(self.config.block_resources)
+			await self.session.resource_blocker.install(context)
 
 		current_page = None
 		if self.browser.config.cdp_url:
@@ -475,6 +662,13 @@ class BrowserContext:
 		"""Legacy method for backwards compatibility, prefer get_agent_current_page()"""
 		return await self.get_agent_current_page()
 
+	async def get_blocked_resources(self) -> BlockedResources:
+		"""Requests the block_resources profiles aborted on the current page"""
+		session = await self.get_session()
+		if session.resource_blocker is None:
+			return BlockedResources()
+		return session.resource_blocker.get_blocked_resources(await self.get_agent_current_page())
+
 	async def _reconcile_tab_state(self) -> None:
 		"""Reconcile tab state when tabs might be out of sync.
 
@@ -581,6 +775,27 @@ class BrowserContext:
 		# If no pages, create one
 		return await session.context.new_page()
 
+	async def _load_cookies(self, context: PlaywrightBrowserContext):
+		"""Load cookies if they exist"""
+		if self.config.cookies_file and os.path.exists(self.config.cookies_file):
+			async with await anyio.open_file(self.config.cookies_file, 'r') as f:
+				try:
+					cookies = json.loads(await f.read())
+
+					valid_same_site_values = ['Strict', 'Lax', 'None']
+					for cookie in cookies:
+						if 'sameSite' in cookie:
+							if cookie['sameSite'] not in valid_same_site_values:
+								logger.warning(
+									f"Fixed invalid sameSite value '{cookie['sameSite']}' to 'None' for cookie {cookie.get('name')}"
+								)
+								cookie['sameSite'] = 'None'
+					logger.info(f'🍪  Loaded {len(cookies)} cookies from {self.config.cookies_file}')
+					await context.add_cookies(cookies)
+
+				except json.JSONDecodeError as e:
+					logger.error(f'Failed to parse cookies file: {str(e)}')
+
 	async def _create_context(self, browser: PlaywrightBrowser):
 		"""Creates a new browser context with anti-detection measures and loads cookies if available."""
 		if self.browser.config.cdp_url and len(browser.contexts) > 0 and not self.config.force_new_context:
@@ -649,25 +864,7 @@ class BrowserContext:
 		if not self.browser.config.headless:
 			await self._resize_window(context)
 
-		# Load cookies if they exist
-		if self.config.cookies_file and os.path.exists(self.config.cookies_file):
-			async with await anyio.open_file(self.config.cookies_file, 'r') as f:
-				try:
-					cookies = json.loads(await f.read())
-
-					valid_same_site_values = ['Strict', 'Lax', 'None']
-					for cookie in cookies:
-						if 'sameSite' in cookie:
-							if cookie['sameSite'] not in valid_same_site_values:
-								logger.warning(
-									f"Fixed invalid sameSite value '{cookie['sameSite']}' to 'None' for cookie {cookie.get('name')}"
-								)
-								cookie['sameSite'] = 'None'
-					logger.info(f'🍪  Loaded {len(cookies)} cookies from {self.config.cookies_file}')
-					await context.add_cookies(cookies)
-
-				except json.JSONDecodeError as e:
-					logger.error(f'Failed to parse cookies file: {str(e)}')
+		await self._load_cookies(context)
 
 		init_script = """
 			// check to make sure we're not inside the PDF viewer
@@ -740,174 +937,60 @@ class BrowserContext:
 		except Exception as e:
 			logger.debug(f'Failed to set viewport size for page: {e}')
 
-	async def _wait_for_stable_network(self):
+	async def _wait_for_stable_network(self, waits: PageLoadWaits):
+		session = await self.get_session()
 		page = await self.get_agent_current_page()
+		tracker = session.get_network_idle_tracker(page)
 
-		pending_requests = set()
-		last_activity = asyncio.get_event_loop().time()
-
-		# Define relevant resource types and content types
-		RELEVANT_RESOURCE_TYPES = {
-			'document',
-			'stylesheet',
-			'image',
-			'font',
-			'script',
-			'iframe',
-		}
-
-		RELEVANT_CONTENT_TYPES = {
-			'text/html',
-			'text/css',
-			'application/javascript',
-			'image/',
-			'font/',
-			'application/json',
-		}
-
-		# Additional patterns to filter out
-		IGNORED_URL_PATTERNS = {
-			# Analytics and tracking
-			'analytics',
-			'tracking',
-			'telemetry',
-			'beacon',
-			'metrics',
-			# Ad-related
-			'doubleclick',
-			'adsystem',
-			'adserver',
-			'advertising',
-			# Social media widgets
-			'facebook.com/plugins',
-			'platform.twitter',
-			'linkedin.com/embed',
-			# Live chat and support
-			'livechat',
-			'zendesk',
-			'intercom',
-			'crisp.chat',
-			'hotjar',
-			# Push notifications
-			'push-notifications',
-			'onesignal',
-			'pushwoosh',
-			# Background sync/heartbeat
-			'heartbeat',
-			'ping',
-			'alive',
-			# WebRTC and streaming
-			'webrtc',
-			'rtmp://',
-			'wss://',
-			# Common CDNs for dynamic content
-			'cloudfront.net',
-			'fastly.net',
-		}
-
-		async def on_request(request):
-			# Filter by resource type
-			if request.resource_type not in RELEVANT_RESOURCE_TYPES:
-				return
-
-			# Filter out streaming, websocket, and other real-time requests
-			if request.resource_type in {
-				'websocket',
-				'media',
-				'eventsource',
-				'manifest',
-				'other',
-			}:
-				return
-
-			# Filter out by URL patterns
-			url = request.url.lower()
-			if any(pattern in url for pattern in IGNORED_URL_PATTERNS):
-				return
-
-			# Filter out data URLs and blob URLs
-			if url.startswith(('data:', 'blob:')):
-				return
-
-			# Filter out requests with certain headers
-			headers = request.headers
-			if headers.get('purpose') == 'prefetch' or headers.get('sec-fetch-dest') in [
-				'video',
-				'audio',
-			]:
-				return
-
-			nonlocal last_activity
-			pending_requests.add(request)
-			last_activity = asyncio.get_event_loop().time()
-			# logger.debug(f'Request started: {request.url} ({request.resource_type})')
-
-		async def on_response(response):
-			request = response.request
-			if request not in pending_requests:
-				return
-
-			# Filter by content type if available
-			content_type = response.headers.get('content-type', '').lower()
-
-			# Skip if content type indicates streaming or real-time data
-			if any(
-				t in content_type
-				for t in [
-					'streaming',
-					'video',
-					'audio',
-					'webm',
-					'mp4',
-					'event-stream',
-					'websocket',
-					'protobuf',
-				]
-			):
-				pending_requests.remove(request)
-				return
+		start = asyncio.get_running_loop().time()
+		idle = await tracker.wait_for_idle(waits.network_idle, waits.maximum)
+		if self.config.adaptive_page_load_waits:
+			self._record_page_load(page, tracker.activity_since(start), start, idle)
 
-			# Only process relevant content types
-			if not any(ct in content_type for ct in RELEVANT_CONTENT_TYPES):
-				pending_requests.remove(request)
-				return
-
-			# Skip if response is too large (likely not essential for page load)
-			content_length = response.headers.get('content-length')
-			if content_length and int(content_length) > 5 * 1024 * 1024:  # 5MB
-				pending_requests.remove(request)
-				return
+		if not idle:
+			logger.debug(
+				f'Network timeout after {waits.maximum}s with {len(tracker.pending_requests)} '
+				f'pending requests: {[r.url for r in tracker.pending_requests]}'
+			)
+			return
 
-			nonlocal last_activity
-			pending_requests.remove(request)
-			last_activity = asyncio.get_event_loop().time()
-			# logger.debug(f'Request resolved: {request.url} ({content_type})')
+		logger.debug(f'⚖️  Network stabilized for {waits.network_idle} seconds')
 
-		# Attach event listeners
-		page.on('request', on_request)
-		page.on('response', on_response)
+	def _get_page_load_waits(self, url: str) -> PageLoadWaits:
+		if not self.config.adaptive_page_load_waits:
+			return PageLoadWaits(
+				minimum=self.config.minimum_wait_page_load_time,
+				network_idle=self.config.wait_for_network_idle_page_load_time,
+				maximum=self.config.maximum_wait_page_load_time,
+			)
+		return self.page_load_timings.get_waits(self._get_domain(url))
 
+	def _record_page_load(self, page: Page, activity: list[float], start: float, idle: bool) -> None:
+		domain = self._get_domain(page.url)
+		if not domain:
+			return
+		times = [start, *activity]
+		quiet_gap = max((later - earlier for earlier, later in zip(times, times[1:])), default=0.0)
+		# a wait that timed out counts as settling at the end of it
+		settle_time = times[-1] - start if idle else asyncio.get_running_loop().time() - start
+		self.page_load_timings.record(domain, PageLoadSample(settle_time=settle_time, quiet_gap=quiet_gap))
+
+	@staticmethod
+	def _get_domain(url: str) -> str:
+		return urlparse(url).hostname or ''
+
+	def get_page_load_timings(self) -> dict[str, dict]:
+		"""Per domain page load statistics learned by adaptive_page_load_waits and the waits picked from them"""
+		return self.page_load_timings.table()
+
+	async def save_page_load_timings(self) -> None:
+		"""Saves the learned page load timings to page_load_timings_file"""
+		if not (self.config.adaptive_page_load_waits and self.config.page_load_timings_file):
+			return
 		try:
-			# Wait for idle time
-			start_time = asyncio.get_event_loop().time()
-			while True:
-				await asyncio.sleep(0.1)
-				now = asyncio.get_event_loop().time()
-				if len(pending_requests) == 0 and (now - last_activity) >= self.config.wait_for_network_idle_page_load_time:
-					break
-				if now - start_time > self.config.maximum_wait_page_load_time:
-					logger.debug(
-						f'Network timeout after {self.config.maximum_wait_page_load_time}s with {len(pending_requests)} '
-						f'pending requests: {[r.url for r in pending_requests]}'
-					)
-					break
-
-		finally:
-			# Clean up event listeners
-			page.remove_listener('request', on_request)
-			page.remove_listener('response', on_response)
-
-		logger.debug(f'⚖️  Network stabilized for {self.config.wait_for_network_idle_page_load_time} seconds')
+			await anyio.to_thread.run_sync(self.page_load_timings.save, self.config.page_load_timings_file)
+		except Exception as e:
+			logger.warning(f'❌  Failed to save page load timings: {e}')
 
 	async def _wait_for_page_and_frames_load(self, timeout_overwrite: float | None = None):
 		"""
@@ -917,10 +1000,11 @@ class BrowserContext:
 		"""
 		# Start timing
 		start_time = time.time()
+		waits = self._get_page_load_waits(self.agent_current_page.url if self.agent_current_page else '')
 
 		# Wait for page load
 		try:
-			await self._wait_for_stable_network()
+			await self._wait_for_stable_network(waits)
 
 			# Check if the loaded URL is allowed
 			page = await self.get_agent_current_page()
@@ -933,7 +1017,7 @@ class BrowserContext:
 
 		# Calculate remaining time to meet minimum WAIT_TIME
 		elapsed = time.time() - start_time
-		remaining = max((timeout_overwrite or self.config.minimum_wait_page_load_time) - elapsed, 0)
+		remaining = max((timeout_overwrite or waits.minimum) - elapsed, 0)
 
 		logger.debug(f'--Page loaded in {elapsed:.2f} seconds, waiting for additional {remaining:.2f} seconds')
 
@@ -1165,36 +1249,33 @@ class BrowserContext:
 		return structure
 
 	@time_execution_sync('--get_state')  # This decorator might need to be updated to handle async
-	async def get_state(self, cache_clickable_elements_hashes: bool) -> BrowserState:
+	async def get_state(self, cache_clickable_elements_hashes: bool, hash_screenshot: bool = False) -> BrowserState:
 		"""Get the current state of the browser
 
 		cache_clickable_elements_hashes: bool
 			If True, cache the clickable elements hashes for the current state. This is used to calculate which elements are new to the llm (from last message) -> reduces token usage.
+		hash_screenshot: bool
+			If True, set the perceptual hash of the screenshot (BrowserState.screenshot_hash) to detect unchanged pages.
 		"""
 		await self._wait_for_page_and_frames_load()
 		session = await self.get_session()
-		updated_state = await self._get_updated_state()
+		updated_state = await self._get_updated_state(hash_screenshot=hash_screenshot)
 
 		# Find out which elements are new
 		# Do this only if url has not changed
 		if cache_clickable_elements_hashes:
-			# if we are on the same url as the last state, we can use the cached hashes
-			if (
-				session.cached_state_clickable_elements_hashes
-				and session.cached_state_clickable_elements_hashes.url == updated_state.url
-			):
+			# if we are on the same url as the last state, compare against it
+			previous = session.cached_state_for_new_elements
+			previous_state = previous.tree.to_state() if previous and previous.url == updated_state.url else None
+			updated_state.dom_diff = DOMDiffProcessor.diff(previous_state, updated_state)
+			if previous_state is not None:
 				# Pointers, feel free to edit in place
-				updated_state_clickable_elements = ClickableElementProcessor.get_clickable_elements(updated_state.element_tree)
-
-				for dom_element in updated_state_clickable_elements:
-					dom_element.is_new = (
-						ClickableElementProcessor.hash_dom_element(dom_element)
-						not in session.cached_state_clickable_elements_hashes.hashes  # see which elements are new from the last state where we cached the hashes
-					)
-			# in any case, we need to cache the new hashes
-			session.cached_state_clickable_elements_hashes = CachedStateClickableElementsHashes(
+				for dom_element in updated_state.selector_map.values():
+					dom_element.is_new = updated_state.dom_diff.is_new(dom_element)
+			# in any case, this state is the one to compare the next one against
+			session.cached_state_for_new_elements = CachedStateForNewElements(
 				url=updated_state.url,
-				hashes=ClickableElementProcessor.get_clickable_elements_hashes(updated_state.element_tree),
+				tree=DOMTreeArrays.from_tree(updated_state.element_tree),
 			)
 
 		session.cached_state = updated_state
@@ -1205,7 +1286,7 @@ class BrowserContext:
 
 		return session.cached_state
 
-	async def _get_updated_state(self, focus_element: int = -1) -> BrowserState:
+	async def _get_updated_state(self, focus_element: int = -1, hash_screenshot: bool = False) -> BrowserState:
 		"""Update and return state."""
 		session = await self.get_session()
 
@@ -1220,12 +1301,29 @@ class BrowserContext:
 
 		try:
 			await self.remove_highlights()
-			dom_service = DomService(page)
+			dom_service = DomService(
+				page,
+				incremental=self.config.incremental_dom_updates,
+				compact_output=self.config.compact_dom_wire_format,
+				backend=self.config.dom_backend,
+				cross_origin_iframes=self.config.cross_origin_iframes,
+				highlight_renderer=self.config.highlight_renderer,
+			)
+
+			# only patch the cached tree if it was extracted from the same document
+			previous_state = None
+			if self.config.incremental_dom_updates and session.cached_state and session.cached_state.url == page.url:
+				previous_state = session.cached_state
+
 			content = await dom_service.get_clickable_elements(
 				focus_element=focus_element,
 				viewport_expansion=self.config.viewport_expansion,
 				highlight_elements=self.config.highlight_elements,
+				previous_state=previous_state,
 			)
+			if self.config.highlight_elements:
+				# the screenshot has to show the highlights
+				self.invalidate_screencast()
 
 			tabs_info = await self.get_tabs_info()
 
@@ -1249,7 +1347,8 @@ class BrowserContext:
 			# 		)
 			# 	)
 
-			screenshot_b64 = await self.take_screenshot()
+			screenshot = await self.capture_screenshot()
+			screenshot_hash = await self._hash_screenshot(page, screenshot) if hash_screenshot else None
 			pixels_above, pixels_below = await self.get_scroll_info(page)
 
 			# Find the agent's active tab ID
@@ -1260,13 +1359,19 @@ class BrowserContext:
 						agent_current_page_id = tab_info.page_id
 						break
 
+			# handles of elements that are still the same stay valid, everything else is resolved again
+			await session.locator_cache.retain(content.selector_map)
+
 			self.current_state = BrowserState(
 				element_tree=content.element_tree,
 				selector_map=content.selector_map,
 				url=page.url,
 				title=await page.title(),
 				tabs=tabs_info,
-				screenshot=screenshot_b64,
+				screenshot=screenshot.data,
+				screenshot_mime_type=screenshot.mime_type,
+				screenshot_size=(screenshot.width, screenshot.height),
+				screenshot_hash=screenshot_hash,
 				pixels_above=pixels_above,
 				pixels_below=pixels_below,
 			)
@@ -1285,23 +1390,147 @@ class BrowserContext:
 		"""
 		Returns a base64 encoded screenshot of the current page.
 		"""
+		return (await self.capture_screenshot(full_page)).data
+
+	async def capture_screenshot(self, full_page: bool = False) -> Screenshot:
+		"""
+		Screenshot of the current page in the configured format and size, with its mime type and pixel dimensions.
+		"""
 		page = await self.get_agent_current_page()
 
+		if self.config.screencast and not full_page:
+			frame = await self._get_screencast_frame(page)
+			if frame:
+				return Screenshot(frame.data, frame.mime_type, frame.width, frame.height)
+
 		# We no longer force tabs to the foreground as it disrupts user focus
 		# await page.bring_to_front()
 		await page.wait_for_load_state()
 
+		if not full_page and (
+			self.config.screenshot_format != 'png' or self.config.screenshot_max_width or self.config.screenshot_max_height
+		):
+			try:
+				return await self._capture_screenshot_cdp(page)
+			except Exception as e:
+				# CDP is chromium only
+				logger.debug(f'CDP screenshot failed, falling back to Playwright: {type(e).__name__}: {e}')
+
 		screenshot = await page.screenshot(
 			full_page=full_page,
 			animations='disabled',
 			caret='initial',
 		)
 
-		screenshot_b64 = base64.b64encode(screenshot).decode('utf-8')
+		# width and height are the first fields of the PNG IHDR chunk
+		width, height = struct.unpack('>II', screenshot[16:24])
+		return Screenshot(base64.b64encode(screenshot).decode('utf-8'), 'image/png', width, height)
+
+	async def _capture_screenshot_cdp(self, page: Page) -> Screenshot:
+		"""Viewport screenshot encoded and downscaled by the browser, the returned data is already base64"""
+		screenshot_format = self.config.screenshot_format
+		cdp_session = await page.context.new_cdp_session(page)
+		try:
+			viewport, device_pixel_ratio = await self._get_visual_viewport(cdp_session)
+			width, height = viewport['clientWidth'], viewport['clientHeight']
+
+			# clip.scale is relative to the device pixels, keep the image within the configured dimensions
+			scale = min(
+				1.0,
+				(self.config.screenshot_max_width or math.inf) / (width * device_pixel_ratio),
+				(self.config.screenshot_max_height or math.inf) / (height * device_pixel_ratio),
+			)
+			params = {
+				'format': screenshot_format,
+				'clip': {'x': viewport['pageX'], 'y': viewport['pageY'], 'width': width, 'height': height, 'scale': scale},
+			}
+			if self.config.screenshot_quality is not None and screenshot_format != 'png':
+				params['quality'] = self.config.screenshot_quality
+			result = await cdp_session.send('Page.captureScreenshot', params)
+		finally:
+			await cdp_session.detach()
+
+		return Screenshot(
+			result['data'],
+			f'image/{screenshot_format}',
+			round(width * device_pixel_ratio * scale),
+			round(height * device_pixel_ratio * scale),
+		)
 
-		# await self.remove_highlights()
+	async def _get_screencast_frame(self, page: Page) -> ScreencastFrame | None:
+		"""Latest fresh screencast frame of page, starts streaming it if needed"""
+		session = await self.get_session()
+		if session.screencast is None:
+			session.screencast = ScreencastBuffer(
+				image_format='png' if self.config.screenshot_format == 'png' else 'jpeg',
+				quality=self.config.screenshot_quality,
+				max_width=self.config.screenshot_max_width,
+				max_height=self.config.screenshot_max_height,
+			)
+		if session.screencast.page is not page:
+			try:
+				await session.screencast.start(page)
+			except Exception as e:
+				# CDP is chromium only
+				logger.debug(f'Failed to start screencast: {type(e).__name__}: {e}')
+				return None
+		return await session.screencast.latest_frame(self.config.screencast_frame_timeout)
+
+	def invalidate_screencast(self) -> None:
+		"""The page is about to change, the next screenshot waits for a screencast frame painted after this"""
+		if self.session and self.session.screencast:
+			self.session.screencast.invalidate()
+
+	@staticmethod
+	async def _get_visual_viewport(cdp_session: CDPSession) -> tuple[dict, float]:
+		"""Visual viewport in CSS pixels and the device pixel ratio"""
+		layout_metrics = await cdp_session.send('Page.getLayoutMetrics')
+		viewport = layout_metrics['cssVisualViewport']
+		return viewport, layout_metrics.get('visualViewport', viewport)['clientWidth'] / viewport['clientWidth']
+
+	@time_execution_async('--hash_screenshot')
+	async def _hash_screenshot(self, page: Page, screenshot: Screenshot) -> int | None:
+		"""Perceptual hash of the captured screenshot, decoded off the event loop"""
+		try:
+			return await anyio.to_thread.run_sync(hash_image, base64.b64decode(screenshot.data))
+		except ImportError:
+			# without Pillow only small PNGs can be decoded, let the browser render a thumbnail of the same viewport
+			return await self.get_screenshot_hash(page)
+		except Exception as e:
+			logger.debug(f'Failed to hash screenshot: {type(e).__name__}: {e}')
+			return None
 
-		return screenshot_b64
+	@time_execution_async('--get_screenshot_hash')
+	async def get_screenshot_hash(self, page: Page, thumbnail_width: int = 64) -> int | None:
+		"""
+		Perceptual hash (dHash) of the viewport, compare two of them with hamming_distance.
+		The browser renders a thumbnail a few dozen pixels wide, which is cheap to decode in python.
+		Returns None if it can not be computed, CDP is chromium only.
+		"""
+		try:
+			cdp_session = await page.context.new_cdp_session(page)
+			try:
+				viewport, device_pixel_ratio = await self._get_visual_viewport(cdp_session)
+				width, height = viewport['clientWidth'], viewport['clientHeight']
+				result = await cdp_session.send(
+					'Page.captureScreenshot',
+					{
+						'format': 'png',
+						'clip': {
+							'x': viewport['pageX'],
+							'y': viewport['pageY'],
+							'width': width,
+							'height': height,
+							'scale': min(1.0, thumbnail_width / (width * device_pixel_ratio)),
+						},
+					},
+				)
+			finally:
+				await cdp_session.detach()
+			return difference_hash(*decode_png_grayscale(base64.b64decode(result['data'])))
+		except Exception as e:
+			logger.debug(f'Failed to hash screenshot: {type(e).__name__}: {e}')
+			return None
 
 	@time_execution_async('--remove_highlights')
 	async def remove_highlights(self):
@@ -1311,9 +1540,17 @@ class BrowserContext:
 		"""
 		try:
 			page = await self.get_agent_current_page()
-			await page.evaluate(
-				"""
+			# highlights of separately extracted cross-origin iframes live inside the frame documents
+			frames = page.frames if self.config.cross_origin_iframes else [page.main_frame]
+			await asyncio.gather(
+				*(
+					frame.evaluate(
+						"""
 				try {
+					// Release the scroll/resize listeners of the overlays, this also removes the overlay container or canvas
+					(window._highlightCleanupFunctions || []).forEach(fn => fn());
+					window._highlightCleanupFunctions = [];
+
 					// Remove the highlight container and all its contents
 					const container = document.getElementById('playwright-highlight-container');
 					if (container) {
@@ -1329,6 +1566,10 @@ class BrowserContext:
 					console.error('Failed to remove highlights:', e);
 				}
 				"""
+					)
+					for frame in frames
+				),
+				return_exceptions=True,
 			)
 		except Exception as e:
 			logger.debug(f'⚠  Failed to remove highlights (this is usually ok): {str(e)}')
@@ -1524,7 +1765,52 @@ class BrowserContext:
 	@time_execution_async('--get_locate_element')
 	async def get_locate_element(self, element: DOMElementNode) -> ElementHandle | None:
 		current_frame = await self.get_agent_current_page()
+		session = await self.get_session()
+		locators = await session.locator_cache.for_page(current_frame)
+
+		cache_key = (element.highlight_index, element.hash) if element.highlight_index is not None else None
+		cached = locators.get(cache_key) if cache_key is not None else None
+		if cached is not None:
+			if await self._is_attached(cached.element_handle):
+				if not cached.frame_selectors:
+					# the page may have scrolled since the element was located
+					try:
+						if await self._is_visible(cached.element_handle):
+							await cached.element_handle.scroll_into_view_if_needed()
+					except Exception as e:
+						logger.error(f'❌  Failed to locate element: {str(e)}')
+						return None
+				return cached.element_handle
+			# same element, re-rendered: the selectors are still right, only the handle is stale
+			await session.locator_cache.dispose([cached.element_handle])
+			frame_selectors, css_selector = cached.frame_selectors, cached.css_selector
+		else:
+			frame_selectors, css_selector = self._css_selectors_for_element(element)
+
+		# Process all iframe parents in sequence
+		for frame_selector in frame_selectors:
+			current_frame = current_frame.frame_locator(frame_selector)
+
+		try:
+			if isinstance(current_frame, FrameLocator):
+				element_handle = await current_frame.locator(css_selector).element_handle()
+			else:
+				# Try to scroll into view if hidden
+				element_handle = await current_frame.query_selector(css_selector)
+				if element_handle:
+					is_visible = await self._is_visible(element_handle)
+					if is_visible:
+						await element_handle.scroll_into_view_if_needed()
+		except Exception as e:
+			logger.error(f'❌  Failed to locate element: {str(e)}')
+			return None
+
+		if element_handle and cache_key is not None:
+			locators[cache_key] = CachedLocator(frame_selectors, css_selector, element_handle)
+		return element_handle
 
+	def _css_selectors_for_element(self, element: DOMElementNode) -> tuple[list[str], str]:
+		"""Selectors of the iframe ancestors from top to bottom, and of the element inside the innermost one"""
 		# Start with the target element and collect all parents
 		parents: list[DOMElementNode] = []
 		current = element
@@ -1536,35 +1822,23 @@ class BrowserContext:
 		# Reverse the parents list to process from top to bottom
 		parents.reverse()
 
-		# Process all iframe parents in sequence
-		iframes = [item for item in parents if item.tag_name == 'iframe']
-		for parent in iframes:
-			css_selector = self._enhanced_css_selector_for_element(
-				parent,
-				include_dynamic_attributes=self.config.include_dynamic_attributes,
-			)
-			current_frame = current_frame.frame_locator(css_selector)
-
+		frame_selectors = [
+			self._enhanced_css_selector_for_element(parent, include_dynamic_attributes=self.config.include_dynamic_attributes)
+			for parent in parents
+			if parent.tag_name == 'iframe'
+		]
 		css_selector = self._enhanced_css_selector_for_element(
 			element, include_dynamic_attributes=self.config.include_dynamic_attributes
 		)
+		return frame_selectors, css_selector
 
+	@staticmethod
+	async def _is_attached(element_handle: ElementHandle) -> bool:
 		try:
-			if isinstance(current_frame, FrameLocator):
-				element_handle = await current_frame.locator(css_selector).element_handle()
-				return element_handle
-			else:
-				# Try to scroll into view if hidden
-				element_handle = await current_frame.query_selector(css_selector)
-				if element_handle:
-					is_visible = await self._is_visible(element_handle)
-					if is_visible:
-						await element_handle.scroll_into_view_if_needed()
-					return element_handle
-				return None
-		except Exception as e:
-			logger.error(f'❌  Failed to locate element: {str(e)}')
-			return None
+			return await element_handle.evaluate('el => el.isConnected')
+		except Exception:
+			# the handle's execution context is gone, e.g. after a reload
+			return False
 
 	@time_execution_async('--get_locate_element_by_xpath')
 	async def get_locate_element_by_xpath(self, xpath: str) -> ElementHandle | None:
@@ -2379,6 +2653,11 @@ class BrowserContext:
 
 	# region - Helper methods for easier access to the DOM
 
+	async def get_cached_state(self) -> BrowserState | None:
+		"""Last state returned by get_state, without fetching a new one"""
+		session = await self.get_session()
+		return session.cached_state
+
 	async def get_selector_map(self) -> SelectorMap:
 		session = await self.get_session()
 		if session.cached_state is None:
@@ -2461,6 +2740,61 @@ class BrowserContext:
 		session.cached_state = None
 		self.state.target_id = None
 
+	@time_execution_async('--soft_reset')
+	async def soft_reset(self):
+		"""
+		Reset the context to a fresh state without closing it, to reuse it for the next task.
+
+		Clears cookies, local storage, IndexedDB, service workers and the cache via CDP and replaces all tabs by a
+		single blank one. Unlike close() and a new context this does not pay for the context and page creation, init
+		scripts, permissions and cookie loading again. Browsers without CDP get a new context instead.
+		"""
+		if self.browser.config.browser_class != 'chromium':
+			await self.close()
+			await self.get_session()
+			return
+
+		session = await self.get_session()
+		context = session.context
+		await self.save_cookies()
+		# the screencast streams the agent tab, which is closed below
+		if session.screencast:
+			await session.screencast.stop()
+
+		# a new tab also drops the session storage and in-memory state of the old ones
+		old_pages = context.pages
+		page = await context.new_page()
+		for old_page in old_pages:
+			try:
+				await old_page.close()
+			except Exception as e:
+				logger.debug(f'Failed to close tab during soft reset: {e}')
+
+		cdp_session = await context.new_cdp_session(page)
+		try:
+			await asyncio.gather(
+				cdp_session.send('Network.clearBrowserCache'),
+				*(
+					cdp_session.send('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+					for origin in session.visited_origins
+				),
+			)
+		finally:
+			await cdp_session.detach()
+		session.visited_origins.clear()
+
+		await context.clear_cookies()
+		await self._load_cookies(context)
+		await context.clear_permissions()
+		await context.grant_permissions(self.config.permissions)
+
+		session.cached_state = None
+		session.cached_state_for_new_elements = None
+		self.state.target_id = None
+		self.agent_current_page = page
+		self.human_current_page = page
+		await self.set_viewport_size(page)
+
 	async def _get_unique_filename(self, directory, filename):
 		"""Generate a unique filename by appending (1), (2), etc., if a file already exists."""
 		base, ext = os.path.splitext(filename)
@@ -0,0 +1,367 @@
+import asyncio
+import logging
+import math
+import re
+from collections import Counter, deque
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Literal
+
+from playwright.async_api import BrowserContext, Page, Request, Response, Route
+
+logger = logging.getLogger(__name__)
+
+# requests that make up the page, everything else does not delay network idle
+RELEVANT_RESOURCE_TYPES = {
+	'document',
+	'stylesheet',
+	'image',
+	'font',
+	'script',
+	'iframe',
+}
+
+RELEVANT_CONTENT_TYPES = {
+	'text/html',
+	'text/css',
+	'application/javascript',
+	'image/',
+	'font/',
+	'application/json',
+}
+
+# streaming and real-time responses never count as activity
+STREAMING_CONTENT_TYPES = {
+	'streaming',
+	'video',
+	'audio',
+	'webm',
+	'mp4',
+	'event-stream',
+	'websocket',
+	'protobuf',
+}
+
+IGNORED_URL_PATTERNS = {
+	# Analytics and tracking
+	'analytics',
+	'tracking',
+	'telemetry',
+	'beacon',
+	'metrics',
+	# Ad-related
+	'doubleclick',
+	'adsystem',
+	'adserver',
+	'advertising',
+	# Social media widgets
+	'facebook.com/plugins',
+	'platform.twitter',
+	'linkedin.com/embed',
+	# Live chat and support
+	'livechat',
+	'zendesk',
+	'intercom',
+	'crisp.chat',
+	'hotjar',
+	# Push notifications
+	'push-notifications',
+	'onesignal',
+	'pushwoosh',
+	# Background sync/heartbeat
+	'heartbeat',
+	'ping',
+	'alive',
+	# WebRTC and streaming
+	'webrtc',
+	'rtmp://',
+	'wss://',
+	# Common CDNs for dynamic content
+	'cloudfront.net',
+	'fastly.net',
+}
+
+# hosts (and their subdomains) of ad networks and trackers, blocked by the 'ads' profile
+AD_AND_TRACKER_DOMAINS = {
+	'doubleclick.net',
+	'googlesyndication.com',
+	'googleadservices.com',
+	'google-analytics.com',
+	'googletagmanager.com',
+	'googletagservices.com',
+	'adservice.google.com',
+	'adnxs.com',
+	'adsrvr.org',
+	'adroll.com',
+	'amazon-adsystem.com',
+	'criteo.com',
+	'criteo.net',
+	'taboola.com',
+	'outbrain.com',
+	'pubmatic.com',
+	'rubiconproject.com',
+	'openx.net',
+	'scorecardresearch.com',
+	'quantserve.com',
+	'moatads.com',
+	'hotjar.com',
+	'clarity.ms',
+	'mixpanel.com',
+	'segment.io',
+	'segment.com',
+	'connect.facebook.net',
+	'bat.bing.com',
+	'nr-data.net',
+}
+
+# hosts of heavy third-party widgets the agent never needs, blocked by the 'widgets' profile
+WIDGET_DOMAINS = {
+	'intercom.io',
+	'intercomcdn.com',
+	'zdassets.com',
+	'zopim.com',
+	'livechatinc.com',
+	'crisp.chat',
+	'drift.com',
+	'driftt.com',
+	'tawk.to',
+	'disqus.com',
+	'disquscdn.com',
+	'onesignal.com',
+	'pushwoosh.com',
+	'platform.twitter.com',
+	'addthis.com',
+	'sharethis.com',
+}
+
+# responses above this size are not essential for the page load
+MAX_RELEVANT_CONTENT_LENGTH = 5 * 1024 * 1024
+
+
+def compile_substring_matcher(patterns: Iterable[str]) -> re.Pattern[str]:
+	"""One regex that finds any of the patterns in a lowercased string, instead of a substring scan per pattern"""
+	return re.compile('|'.join(re.escape(pattern.lower()) for pattern in sorted(patterns, key=len, reverse=True)))
+
+
+def compile_url_matcher(domains: Iterable[str] = (), patterns: Iterable[str] = ()) -> re.Pattern[str]:
+	"""
+	One regex for lowercased URLs that matches a host equal to or below one of the domains, or any of the substring
+	patterns. Domains only match the host, so 'criteo.com' does not block 'example.com/criteo.com-review'.
+	"""
+	alternatives = []
+	domains = sorted(domains, key=len, reverse=True)
+	if domains:
+		hosts = '|'.join(re.escape(domain.lower()) for domain in domains)
+		alternatives.append(rf'^[a-z][a-z0-9+.-]*://(?:[^/?#@]*@)?(?:[^/?#:]*\.)?(?:{hosts})(?=[:/?#]|$)')
+	patterns = sorted(patterns, key=len, reverse=True)
+	if patterns:
+		alternatives.append(compile_substring_matcher(patterns).pattern)
+	# a matcher without anything to match never matches
+	return re.compile('|'.join(alternatives) or r'(?!)')
+
+
+# blocked requests never finish loading, so network idle ignores them too
+IGNORED_URL_MATCHER = compile_url_matcher(AD_AND_TRACKER_DOMAINS | WIDGET_DOMAINS, IGNORED_URL_PATTERNS)
+STREAMING_CONTENT_TYPE_MATCHER = compile_substring_matcher(STREAMING_CONTENT_TYPES)
+RELEVANT_CONTENT_TYPE_MATCHER = compile_substring_matcher(RELEVANT_CONTENT_TYPES)
+
+
+class NetworkIdleTracker:
+	"""
+	Tracks the relevant in-flight requests of one page for as long as the page lives.
+
+	Listeners are installed once, so requests started before a wait are known too, and wait_for_idle() wakes up on
+	request events or exactly when the idle time has passed instead of polling.
+	"""
+
+	def __init__(self, page: Page, ignored_url_matcher: re.Pattern[str] = IGNORED_URL_MATCHER):
+		self.page = page
+		self.ignored_url_matcher = ignored_url_matcher
+		self.pending_requests: set[Request] = set()
+		self.last_activity = -math.inf
+		# recent activity, to learn how long the quiet gaps between requests of a page load get
+		self.activity_times: deque[float] = deque(maxlen=256)
+		self._activity = asyncio.Event()
+
+	def attach(self) -> None:
+		self.page.on('request', self._on_request)
+		self.page.on('response', self._on_response)
+		self.page.on('requestfailed', self._on_request_failed)
+
+	def detach(self) -> None:
+		self.page.remove_listener('request', self._on_request)
+		self.page.remove_listener('response', self._on_response)
+		self.page.remove_listener('requestfailed', self._on_request_failed)
+		self.pending_requests.clear()
+
+	async def wait_for_idle(self, idle_time: float, timeout: float) -> bool:
+		"""
+		Waits until no relevant request was pending for idle_time seconds, counted from the call at the earliest.
+		Returns False if that did not happen within timeout seconds.
+		"""
+		loop = asyncio.get_running_loop()
+		start = loop.time()
+		deadline = start + timeout
+		while True:
+			now = loop.time()
+			idle_left = math.inf if self.pending_requests else max(self.last_activity, start) + idle_time - now
+			if idle_left <= 0:
+				return True
+			if now >= deadline:
+				return False
+
+			self._activity.clear()
+			try:
+				await asyncio.wait_for(self._activity.wait(), min(idle_left, deadline - now))
+			except asyncio.TimeoutError:
+				pass
+
+	def _is_relevant(self, request: Request) -> bool:
+		# websocket, media, eventsource, manifest and other are not relevant resource types either
+		if request.resource_type not in RELEVANT_RESOURCE_TYPES:
+			return False
+
+		url = request.url.lower()
+		# data and blob URLs never hit the network
+		if url.startswith(('data:', 'blob:')) or self.ignored_url_matcher.search(url):
+			return False
+
+		headers = request.headers
+		return headers.get('purpose') != 'prefetch' and headers.get('sec-fetch-dest') not in ('video', 'audio')
+
+	def _on_request(self, request: Request) -> None:
+		if not self._is_relevant(request):
+			return
+		self.pending_requests.add(request)
+		self._record_activity()
+
+	def _on_response(self, response: Response) -> None:
+		request = response.request
+		if request not in self.pending_requests:
+			return
+		self.pending_requests.remove(request)
+
+		content_type = response.headers.get('content-type', '').lower()
+		content_length = response.headers.get('content-length')
+		if (
+			STREAMING_CONTENT_TYPE_MATCHER.search(content_type)
+			or not RELEVANT_CONTENT_TYPE_MATCHER.search(content_type)
+			or (content_length and content_length.isdigit() and int(content_length) > MAX_RELEVANT_CONTENT_LENGTH)
+		):
+			# finished, but not page content, so it is no activity either
+			self._activity.set()
+			return
+		self._record_activity()
+
+	def _on_request_failed(self, request: Request) -> None:
+		# aborted and failed requests never get a response
+		if request in self.pending_requests:
+			self.pending_requests.remove(request)
+			self._activity.set()
+
+	def activity_since(self, start: float) -> list[float]:
+		"""Loop times of the relevant activity from start on"""
+		return [time for time in self.activity_times if time >= start]
+
+	def _record_activity(self) -> None:
+		self.last_activity = asyncio.get_running_loop().time()
+		self.activity_times.append(self.last_activity)
+		self._activity.set()
+
+
+ResourceBlockingProfile = Literal['ads', 'widgets', 'fonts', 'media', 'images']
+
+PROFILE_DOMAINS: dict[ResourceBlockingProfile, set[str]] = {
+	'ads': AD_AND_TRACKER_DOMAINS,
+	'widgets': WIDGET_DOMAINS,
+}
+
+PROFILE_RESOURCE_TYPES: dict[ResourceBlockingProfile, set[str]] = {
+	'fonts': {'font'},
+	'media': {'media'},
+	'images': {'image'},
+}
+
+# aborted requests are never downloaded, so the bytes saved are estimated from typical transfer sizes
+ESTIMATED_RESOURCE_BYTES = {
+	'document': 60_000,
+	'script': 40_000,
+	'stylesheet': 15_000,
+	'image': 50_000,
+	'font': 35_000,
+	'media': 500_000,
+	'xhr': 2_000,
+	'fetch': 2_000,
+}
+DEFAULT_ESTIMATED_RESOURCE_BYTES = 5_000
+
+
+@dataclass
+class BlockedResources:
+	"""Requests a ResourceBlocker aborted on one page"""
+
+	count: int = 0
+	estimated_bytes_saved: int = 0
+	by_resource_type: Counter[str] = field(default_factory=Counter)
+
+	def add(self, resource_type: str) -> None:
+		self.count += 1
+		self.estimated_bytes_saved += ESTIMATED_RESOURCE_BYTES.get(resource_type, DEFAULT_ESTIMATED_RESOURCE_BYTES)
+		self.by_resource_type[resource_type] += 1
+
+
+class ResourceBlocker:
+	"""
+	Aborts the requests of the given blocking profiles for every page of a browser context and counts them per page.
+
+	The top level document is never blocked, so navigating to a blocked domain still works.
+	"""
+
+	def __init__(self, profiles: Iterable[ResourceBlockingProfile]):
+		profiles = set(profiles)
+		self.url_matcher = compile_url_matcher(set().union(*(PROFILE_DOMAINS.get(profile, ()) for profile in profiles)))
+		self.resource_types: set[str] = set().union(*(PROFILE_RESOURCE_TYPES.get(profile, ()) for profile in profiles))
+		self.blocked: dict[Page, BlockedResources] = {}
+
+	async def install(self, context: BrowserContext) -> None:
+		await context.route('**/*', self._handle_route)
+
+	def get_blocked_resources(self, page: Page) -> BlockedResources:
+		return self.blocked.get(page) or BlockedResources()
+
+	def should_block(self, request: Request) -> bool:
+		if request.resource_type in self.resource_types:
+			return True
+		if not self.url_matcher.search(request.url.lower()):
+			return False
+		if request.resource_type != 'document':
+			return True
+		# iframes of blocked domains are blocked, the page itself is not
+		try:
+			return request.frame.parent_frame is not None
+		except Exception:
+			return False
+
+	async def _handle_route(self, route: Route, request: Request) -> None:
+		if not self.should_block(request):
+			await route.fallback()
+			return
+		await route.abort('blockedbyclient')
+		self._record(request)
+
+	def _record(self, request: Request) -> None:
+		try:
+			page = request.frame.page
+		except Exception:
+			# service worker requests belong to no page
+			return
+		blocked = self.blocked.get(page)
+		if blocked is None:
+			blocked = self.blocked[page] = BlockedResources()
+			page.once('close', lambda _: self._on_page_close(page))
+		blocked.add(request.resource_type)
+
+	def _on_page_close(self, page: Page) -> None:
+		blocked = self.blocked.pop(page, None)
+		if blocked:
+			logger.debug(f'🚫  Blocked {blocked.count} requests (~{blocked.estimated_bytes_saved // 1024} KB) on {page.url}')
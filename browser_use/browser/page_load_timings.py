@@ -0,0 +1,107 @@
+import json
+import math
+import os
+import tempfile
+from collections import deque
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+# page loads a domain needs before its waits are tuned
+MIN_SAMPLES = 5
+MAX_SAMPLES = 50
+
+
+@dataclass
+class PageLoadWaits:
+	"""Seconds to wait for a page load, the same as the wait times of BrowserContextConfig"""
+
+	minimum: float
+	network_idle: float
+	maximum: float
+
+
+@dataclass
+class PageLoadSample:
+	"""
+	One observed page load.
+
+	settle_time: seconds from the start of the wait until the last relevant network activity, the whole wait if it timed out
+	quiet_gap: longest pause between relevant network activity before the page settled
+	"""
+
+	settle_time: float
+	quiet_gap: float
+
+
+def percentile(values: list[float], fraction: float) -> float:
+	"""Nearest-rank percentile of a non-empty list"""
+	ordered = sorted(values)
+	return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+class PageLoadTimings:
+	"""
+	Learns how long the pages of each domain take to settle and picks page load waits from the observed percentiles.
+
+	Only the minimum and network idle waits adapt, the configured waits are their upper bounds and lower_bound the
+	shortest wait picked. The configured maximum stays the timeout, so a slow page load of a fast domain still gets
+	the time it needs. A domain keeps the configured waits until MIN_SAMPLES page loads were observed.
+	"""
+
+	def __init__(self, upper_bounds: PageLoadWaits, lower_bound: float):
+		self.upper_bounds = upper_bounds
+		self.lower_bound = lower_bound
+		self.samples: dict[str, deque[PageLoadSample]] = {}
+
+	def record(self, domain: str, sample: PageLoadSample) -> None:
+		self.samples.setdefault(domain, deque(maxlen=MAX_SAMPLES)).append(sample)
+
+	def get_waits(self, domain: str) -> PageLoadWaits:
+		samples = self.samples.get(domain)
+		if not samples or len(samples) < MIN_SAMPLES:
+			return self.upper_bounds
+
+		settle_times = [sample.settle_time for sample in samples]
+		# the quiet window has to outlast the pauses a loading page makes, with a margin for the ones not seen yet
+		network_idle = self._bound(2 * percentile([sample.quiet_gap for sample in samples], 0.9), self.upper_bounds.network_idle)
+		return PageLoadWaits(
+			minimum=self._bound(percentile(settle_times, 0.9), self.upper_bounds.minimum),
+			network_idle=network_idle,
+			maximum=self.upper_bounds.maximum,
+		)
+
+	def table(self) -> dict[str, dict]:
+		"""The learned statistics and the picked waits of every domain, for inspection"""
+		table = {}
+		for domain, samples in self.samples.items():
+			settle_times = [sample.settle_time for sample in samples]
+			table[domain] = {
+				'samples': len(samples),
+				'settle_time_p50': percentile(settle_times, 0.5),
+				'settle_time_p95': percentile(settle_times, 0.95),
+				'quiet_gap_p90': percentile([sample.quiet_gap for sample in samples], 0.9),
+				'waits': asdict(self.get_waits(domain)),
+			}
+		return table
+
+	def load(self, path: str | Path) -> None:
+		"""Adds the samples saved to path, if the file exists"""
+		path = Path(path)
+		if not path.exists():
+			return
+		for domain, samples in json.loads(path.read_text()).items():
+			for sample in samples:
+				self.record(domain, PageLoadSample(**sample))
+
+	def save(self, path: str | Path) -> None:
+		path = Path(path)
+		path.parent.mkdir(parents=True, exist_ok=True)
+		data = {domain: [asdict(sample) for sample in samples] for domain, samples in self.samples.items()}
+		# another context saving at the same time never leaves a partial file behind
+		fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+		with os.fdopen(fd, 'w') as f:
+			json.dump(data, f)
+		os.replace(tmp_path, path)
+
+	def _bound(self, wait: float, upper_bound: float) -> float:
+		return min(max(wait, self.lower_bound), upper_bound)
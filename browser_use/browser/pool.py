@@ -0,0 +1,329 @@
+"""
+Warm pool of browsers and browser contexts that are leased to agents.
+"""
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+import psutil
+from playwright.async_api import Browser as PlaywrightBrowser
+from pydantic import BaseModel, ConfigDict, Field
+
+from browser_use.browser.browser import Browser, BrowserConfig
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+from browser_use.browser.views import BrowserError
+from browser_use.utils import time_execution_async
+
+logger = logging.getLogger(__name__)
+
+LAUNCH_ATTEMPTS = 3
+LAUNCH_RETRY_DELAY = 1.0
+
+
+class BrowserPoolConfig(BaseModel):
+	"""
+	Configuration for the BrowserPool.
+
+	Default values:
+		browsers: 1
+			Number of browsers launched up front and kept running.
+
+		contexts_per_browser: 1
+			Number of browser contexts kept warm in each browser, browsers * contexts_per_browser leases can be
+			active at the same time.
+
+		max_leases_per_browser: 50
+			A browser is closed and replaced by a new one after it was leased this many times.
+
+		max_browser_memory_mb: None
+			A browser whose processes use more memory than this (resident set size) is replaced when a lease is
+			returned. Only measured for local Chromium browsers.
+
+		health_check_timeout: 5.0
+			Seconds a browser has to answer the CDP health check before a lease, it is replaced otherwise.
+
+		browser_config: BrowserConfig()
+			Configuration of the pooled browsers, keep_alive is ignored as the pool owns them.
+
+		context_config: None
+			Configuration of the pooled contexts, defaults to browser_config.new_context_config.
+	"""
+
+	model_config = ConfigDict(arbitrary_types_allowed=True, extra='ignore', validate_assignment=True)
+
+	browsers: int = Field(default=1, ge=1)
+	contexts_per_browser: int = Field(default=1, ge=1)
+	max_leases_per_browser: int = Field(default=50, ge=1)
+	max_browser_memory_mb: int | None = None
+	health_check_timeout: float = 5.0
+	browser_config: BrowserConfig = Field(default_factory=BrowserConfig)
+	context_config: BrowserContextConfig | None = None
+
+
+class PooledBrowser:
+	"""A browser of the pool with its contexts and how often it was leased"""
+
+	def __init__(self, browser: Browser):
+		self.browser = browser
+		self.contexts: list[BrowserContext] = []
+		self.leases = 0
+		self.active_leases = 0
+		self.retired = False
+
+
+@dataclass
+class BrowserLease:
+	"""A browser and one of its contexts, leased to a single agent until it is released"""
+
+	browser: Browser
+	context: BrowserContext
+	pooled_browser: PooledBrowser
+
+
+class BrowserPool:
+	"""
+	Keeps browsers and browser contexts running so an agent does not pay the browser start for every task.
+
+	A lease hands out a healthy context, returning it resets the context's storage for the next one. Browsers are
+	replaced after max_leases_per_browser leases, above max_browser_memory_mb or when the health check fails.
+	Browsers are launched one at a time, so replacing several of them never starts a launch storm. A failed
+	replacement launch is retried, once no browser is left acquire() raises a BrowserError instead of waiting.
+
+	Usage:
+		pool = BrowserPool(BrowserPoolConfig(browsers=2, browser_config=BrowserConfig(headless=True)))
+		await pool.start()
+		async with pool.lease() as lease:
+			agent = Agent(task=task, llm=llm, browser=lease.browser, browser_context=lease.context)
+			await agent.run()
+		await pool.close()
+	"""
+
+	def __init__(self, config: BrowserPoolConfig | None = None):
+		self.config = config or BrowserPoolConfig()
+		self.browser_config = self.config.browser_config.model_copy(update={'keep_alive': False})
+		self.context_config = (self.config.context_config or self.browser_config.new_context_config).model_copy(
+			update={'keep_alive': False}
+		)
+		self.browsers: list[PooledBrowser] = []
+		self.closed = False
+		self._idle_contexts: asyncio.Queue[tuple[PooledBrowser, BrowserContext]] = asyncio.Queue()
+		self._launch_lock = asyncio.Lock()
+		# set whenever a context becomes idle or the pool loses capacity, wakes up waiting acquire() calls
+		self._pool_changed = asyncio.Event()
+		# retired browsers whose replacement has not been launched yet
+		self._pending_replacements = 0
+		self._replacements: set[asyncio.Task] = set()
+		self._launch_error: Exception | None = None
+
+	@time_execution_async('--start (browser pool)')
+	async def start(self) -> None:
+		"""Launches the browsers and their contexts"""
+		for _ in range(self.config.browsers - len(self.browsers)):
+			await self._launch()
+
+	async def close(self) -> None:
+		"""Closes all browsers, including leased ones"""
+		self.closed = True
+		self._pool_changed.set()
+		if self._replacements:
+			await asyncio.gather(*self._replacements, return_exceptions=True)
+		browsers, self.browsers = self.browsers, []
+		for pooled_browser in browsers:
+			pooled_browser.retired = True
+			await self._close_browser(pooled_browser)
+
+	@asynccontextmanager
+	async def lease(self) -> AsyncIterator[BrowserLease]:
+		"""Leases a browser context for the duration of the block"""
+		lease = await self.acquire()
+		try:
+			yield lease
+		finally:
+			await self.release(lease)
+
+	async def acquire(self) -> BrowserLease:
+		"""Waits for a healthy idle browser context, prefer lease() which also releases it"""
+		while True:
+			pooled_browser, context = await self._get_idle_context()
+			if pooled_browser.retired:
+				continue
+			try:
+				healthy = await self._is_healthy(pooled_browser)
+			except BaseException:
+				# cancelled while checking, the context is still idle
+				self._put_idle(pooled_browser, context)
+				raise
+			if not healthy:
+				logger.warning('⚠️  Pooled browser failed the health check, replacing it')
+				await self._retire(pooled_browser)
+				continue
+
+			pooled_browser.leases += 1
+			pooled_browser.active_leases += 1
+			return BrowserLease(browser=pooled_browser.browser, context=context, pooled_browser=pooled_browser)
+
+	async def release(self, lease: BrowserLease) -> None:
+		"""Resets the leased context and returns it to the pool, or replaces its browser if it is due"""
+		pooled_browser = lease.pooled_browser
+		pooled_browser.active_leases -= 1
+		if pooled_browser.retired:
+			if pooled_browser.active_leases == 0:
+				await self._replace(pooled_browser)
+			return
+
+		if pooled_browser.leases >= self.config.max_leases_per_browser:
+			logger.debug(f'♻️  Replacing pooled browser after {pooled_browser.leases} leases')
+			await self._retire(pooled_browser)
+			return
+		memory = await self._get_memory_usage(pooled_browser)
+		if memory and memory > self.config.max_browser_memory_mb * 1024**2:  # type: ignore
+			logger.debug(f'♻️  Replacing pooled browser using {memory // 1024**2} MB')
+			await self._retire(pooled_browser)
+			return
+
+		try:
+			await self._reset_context(lease.context)
+		except Exception as e:
+			logger.warning(f'⚠️  Failed to reset pooled browser context, replacing its browser: {e}')
+			await self._retire(pooled_browser)
+			return
+		self._put_idle(pooled_browser, lease.context)
+
+	async def _get_idle_context(self) -> tuple[PooledBrowser, BrowserContext]:
+		"""Waits for an idle context, raises once the pool is closed or has no browsers left to wait for"""
+		while self._idle_contexts.empty():
+			if self.closed:
+				raise BrowserError('BrowserPool is closed')
+			if not self.browsers and not self._pending_replacements and not self._launch_lock.locked():
+				raise BrowserError(f'BrowserPool has no browsers left, the last launch failed with: {self._launch_error}')
+			self._pool_changed.clear()
+			await self._pool_changed.wait()
+		return self._idle_contexts.get_nowait()
+
+	def _put_idle(self, pooled_browser: PooledBrowser, context: BrowserContext) -> None:
+		self._idle_contexts.put_nowait((pooled_browser, context))
+		self._pool_changed.set()
+
+	async def _launch(self) -> PooledBrowser:
+		async with self._launch_lock:
+			pooled_browser = await self._start_browser()
+			if self.closed:
+				await self._close_browser(pooled_browser)
+				raise BrowserError('BrowserPool is closed')
+			self.browsers.append(pooled_browser)
+			for context in pooled_browser.contexts:
+				self._put_idle(pooled_browser, context)
+			return pooled_browser
+
+	async def _start_browser(self) -> PooledBrowser:
+		browser = Browser(config=self.browser_config)
+		pooled_browser = PooledBrowser(browser)
+		try:
+			await browser.get_playwright_browser()
+			for _ in range(self.config.contexts_per_browser):
+				context = BrowserContext(browser=browser, config=self.context_config)
+				await context.get_session()
+				pooled_browser.contexts.append(context)
+		except Exception:
+			await browser.close()
+			raise
+		return pooled_browser
+
+	async def _retire(self, pooled_browser: PooledBrowser) -> None:
+		"""Takes the browser out of the pool, it is closed and replaced once its last lease is released"""
+		if pooled_browser.retired:
+			return
+		pooled_browser.retired = True
+		self._pending_replacements += 1
+		if pooled_browser in self.browsers:
+			self.browsers.remove(pooled_browser)
+		if pooled_browser.active_leases == 0:
+			await self._replace(pooled_browser)
+
+	async def _replace(self, pooled_browser: PooledBrowser) -> None:
+		"""Closes a retired browser and launches its replacement, cancelling the caller does not stop it"""
+		replacement = asyncio.create_task(self._close_and_relaunch(pooled_browser))
+		self._replacements.add(replacement)
+		replacement.add_done_callback(self._replacements.discard)
+		await asyncio.shield(replacement)
+
+	async def _close_and_relaunch(self, pooled_browser: PooledBrowser) -> None:
+		try:
+			await self._close_browser(pooled_browser)
+			for attempt in range(1, LAUNCH_ATTEMPTS + 1):
+				if self.closed:
+					return
+				try:
+					await self._launch()
+					return
+				except Exception as e:
+					self._launch_error = e
+					if attempt < LAUNCH_ATTEMPTS:
+						logger.warning(f'⚠️  Failed to launch a replacement browser (attempt {attempt}/{LAUNCH_ATTEMPTS}): {e}')
+						await asyncio.sleep(LAUNCH_RETRY_DELAY * attempt)
+			logger.error(
+				f'❌  Failed to launch a browser to replace a pooled one, {len(self.browsers)} browsers left: {self._launch_error}'
+			)
+		finally:
+			self._pending_replacements -= 1
+			self._pool_changed.set()
+
+	@staticmethod
+	async def _close_browser(pooled_browser: PooledBrowser) -> None:
+		for context in pooled_browser.contexts:
+			try:
+				await context.close()
+			except Exception as e:
+				logger.debug(f'Failed to close pooled browser context: {e}')
+		try:
+			await pooled_browser.browser.close()
+		except Exception as e:
+			logger.debug(f'Failed to close pooled browser: {e}')
+
+	@staticmethod
+	async def _reset_context(context: BrowserContext) -> None:
+		await context.soft_reset()
+
+	async def _is_healthy(self, pooled_browser: PooledBrowser) -> bool:
+		playwright_browser = pooled_browser.browser.playwright_browser
+		if playwright_browser is None or not playwright_browser.is_connected():
+			return False
+		if self.browser_config.browser_class != 'chromium':
+			return True
+		try:
+			await asyncio.wait_for(self._get_process_info(playwright_browser), self.config.health_check_timeout)
+		except Exception as e:
+			logger.debug(f'Pooled browser health check failed: {e}')
+			return False
+		return True
+
+	async def _get_memory_usage(self, pooled_browser: PooledBrowser) -> int | None:
+		"""Resident memory in bytes of the processes of a local Chromium browser, None if it cannot be measured"""
+		playwright_browser = pooled_browser.browser.playwright_browser
+		if self.config.max_browser_memory_mb is None or self.browser_config.browser_class != 'chromium' or not playwright_browser:
+			return None
+		try:
+			processes = await asyncio.wait_for(self._get_process_info(playwright_browser), self.config.health_check_timeout)
+		except Exception as e:
+			logger.debug(f'Failed to get pooled browser processes: {e}')
+			return None
+
+		memory = 0
+		for process in processes:
+			try:
+				memory += psutil.Process(process['id']).memory_info().rss
+			except psutil.Error:
+				# remote browser, or the process just exited
+				continue
+		return memory or None
+
+	@staticmethod
+	async def _get_process_info(playwright_browser: PlaywrightBrowser) -> list[dict]:
+		cdp_session = await playwright_browser.new_browser_cdp_session()
+		try:
+			return (await cdp_session.send('SystemInfo.getProcessInfo'))['processInfo']
+		finally:
+			await cdp_session.detach()
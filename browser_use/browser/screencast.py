@@ -0,0 +1,164 @@
+import asyncio
+import base64
+import logging
+import struct
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Literal
+
+from playwright.async_api import CDPSession, Page
+
+logger = logging.getLogger(__name__)
+
+# JPEG start of frame markers, the ones that carry the image dimensions
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# base64 characters decoded to find the image dimensions, chromium writes them in the first few hundred bytes
+IMAGE_HEADER_BASE64_LENGTH = 4096
+
+
+@dataclass
+class ScreencastFrame:
+	"""A frame of a CDP screencast, base64 encoded"""
+
+	data: str
+	mime_type: str
+	width: int
+	height: int
+	timestamp: float
+	# ScreencastBuffer.generation when the frame arrived
+	generation: int
+
+
+def image_size(data: bytes) -> tuple[int, int]:
+	"""Width and height of a PNG or JPEG image, read from its header"""
+	if data.startswith(b'\x89PNG'):
+		return struct.unpack('>II', data[16:24])
+
+	# walk the JPEG segments up to the start of frame
+	offset = 2
+	while offset + 9 <= len(data):
+		if data[offset] != 0xFF:
+			raise ValueError('Invalid JPEG segment')
+		marker = data[offset + 1]
+		if marker in JPEG_SOF_MARKERS:
+			height, width = struct.unpack('>HH', data[offset + 5 : offset + 9])
+			return width, height
+		offset += 2 + struct.unpack('>H', data[offset + 2 : offset + 4])[0]
+	raise ValueError('No JPEG start of frame found')
+
+
+class ScreencastBuffer:
+	"""
+	Keeps the latest frames of a CDP Page.startScreencast stream of one page.
+
+	Chromium only sends a frame when the page repaints. invalidate() marks the frames received so far as stale,
+	latest_frame() then waits for the next one, so a state never shows the page from before an action.
+	Frames still in flight are recognized by their swap timestamp, which assumes the browser runs on the same clock.
+	"""
+
+	def __init__(
+		self,
+		image_format: Literal['jpeg', 'png'] = 'jpeg',
+		quality: int | None = None,
+		max_width: int | None = None,
+		max_height: int | None = None,
+		max_frames: int = 4,
+	):
+		self.image_format = image_format
+		self.quality = quality
+		self.max_width = max_width
+		self.max_height = max_height
+		self.frames: deque[ScreencastFrame] = deque(maxlen=max_frames)
+		self.generation = 0
+		self.invalidated_at = 0.0
+		self.page: Page | None = None
+		self._cdp_session: CDPSession | None = None
+		self._fresh_frame = asyncio.Event()
+		self._pending_acks: set[asyncio.Task] = set()
+
+	async def start(self, page: Page) -> None:
+		"""Stream frames of page, replacing the page streamed so far"""
+		await self.stop()
+		self.page = page
+		self._cdp_session = await page.context.new_cdp_session(page)
+		self._cdp_session.on('Page.screencastFrame', self._on_frame)
+		params: dict = {'format': self.image_format}
+		if self.quality is not None and self.image_format == 'jpeg':
+			params['quality'] = self.quality
+		if self.max_width:
+			params['maxWidth'] = self.max_width
+		if self.max_height:
+			params['maxHeight'] = self.max_height
+		await self._cdp_session.send('Page.startScreencast', params)
+
+	async def stop(self) -> None:
+		cdp_session, self._cdp_session = self._cdp_session, None
+		self.page = None
+		self.invalidate()
+		self.frames.clear()
+		if cdp_session is None:
+			return
+		try:
+			await cdp_session.send('Page.stopScreencast')
+			await cdp_session.detach()
+		except Exception as e:
+			# the page is usually closed already
+			logger.debug(f'Failed to stop screencast: {type(e).__name__}: {e}')
+
+	def invalidate(self) -> None:
+		"""Frames received so far no longer show the page, e.g. because an action runs"""
+		self.generation += 1
+		self.invalidated_at = time.time()
+		self._fresh_frame.clear()
+
+	async def latest_frame(self, timeout: float) -> ScreencastFrame | None:
+		"""The latest frame received since the last invalidate(), waiting up to timeout seconds for one"""
+		if not self._is_fresh():
+			try:
+				await asyncio.wait_for(self._fresh_frame.wait(), timeout)
+			except asyncio.TimeoutError:
+				return None
+		return self.frames[-1] if self._is_fresh() else None
+
+	def _is_fresh(self) -> bool:
+		return bool(self.frames) and self.frames[-1].generation == self.generation
+
+	def _on_frame(self, params: dict) -> None:
+		cdp_session = self._cdp_session
+		if cdp_session is None:
+			return
+		# chromium sends the next frame only after this one is acknowledged
+		ack = asyncio.create_task(cdp_session.send('Page.screencastFrameAck', {'sessionId': params['sessionId']}))
+		self._pending_acks.add(ack)
+		ack.add_done_callback(self._on_ack_done)
+
+		try:
+			# the header is enough, no need to decode the whole frame
+			width, height = image_size(base64.b64decode(params['data'][:IMAGE_HEADER_BASE64_LENGTH]))
+		except (ValueError, struct.error):
+			try:
+				width, height = image_size(base64.b64decode(params['data']))
+			except (ValueError, struct.error) as e:
+				logger.debug(f'Skipping screencast frame: {e}')
+				return
+		timestamp = params.get('metadata', {}).get('timestamp') or time.time()
+		# painted before the last invalidate(), only delivered after it
+		in_flight = timestamp < self.invalidated_at
+		self.frames.append(
+			ScreencastFrame(
+				data=params['data'],
+				mime_type=f'image/{self.image_format}',
+				width=width,
+				height=height,
+				timestamp=timestamp,
+				generation=self.generation - 1 if in_flight else self.generation,
+			)
+		)
+		if not in_flight:
+			self._fresh_frame.set()
+
+	def _on_ack_done(self, ack: asyncio.Task) -> None:
+		self._pending_acks.discard(ack)
+		if not ack.cancelled() and ack.exception():
+			logger.debug(f'Failed to acknowledge screencast frame: {ack.exception()}')
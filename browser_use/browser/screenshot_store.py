@@ -0,0 +1,38 @@
+import base64
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+
+class ScreenshotStore:
+	"""
+	Writes screenshots to a directory, each file named by the hash of its content.
+
+	A screenshot is written once no matter how many steps show it, and the history only keeps the path.
+	"""
+
+	def __init__(self, directory: str | Path):
+		self.directory = Path(directory)
+
+	def save(self, screenshot: str, mime_type: str = 'image/png') -> str:
+		"""Stores a base64 encoded screenshot and returns its path"""
+		data = base64.b64decode(screenshot)
+		extension = mime_type.split('/')[-1]
+		path = self.directory / f'{hashlib.sha256(data).hexdigest()}.{extension}'
+		if not path.exists():
+			self.directory.mkdir(parents=True, exist_ok=True)
+			# a concurrent run writing the same screenshot never leaves a partial file behind
+			fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+			with os.fdopen(fd, 'wb') as f:
+				f.write(data)
+			os.replace(tmp_path, path)
+		return str(path)
+
+	@staticmethod
+	def load(path: str | Path) -> str | None:
+		"""The base64 encoded screenshot stored at path, None if it is gone"""
+		try:
+			return base64.b64encode(Path(path).read_bytes()).decode('utf-8')
+		except FileNotFoundError:
+			return None
@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+from browser_use.browser import pool as pool_module
+from browser_use.browser.pool import BrowserPool, BrowserPoolConfig, PooledBrowser
+from browser_use.browser.views import BrowserError
+
+
+class _Context:
+	def __init__(self):
+		self.resets = 0
+
+
+class _FakeBrowserPool(BrowserPool):
+	"""Pool whose browsers are counted instead of launched"""
+
+	def __init__(self, config: BrowserPoolConfig):
+		super().__init__(config)
+		self.launched: list[PooledBrowser] = []
+		self.closed_browsers: list[PooledBrowser] = []
+		self.unhealthy: set[PooledBrowser] = set()
+		self.memory = 0
+		self.failing_launches = 0
+		self.health_check: asyncio.Event | None = None
+
+	async def _start_browser(self) -> PooledBrowser:
+		if self.failing_launches:
+			self.failing_launches -= 1
+			raise RuntimeError('browser crashed on launch')
+		pooled_browser = PooledBrowser(browser=object())  # type: ignore
+		pooled_browser.contexts = [_Context() for _ in range(self.config.contexts_per_browser)]  # type: ignore
+		self.launched.append(pooled_browser)
+		return pooled_browser
+
+	async def _close_browser(self, pooled_browser: PooledBrowser) -> None:
+		self.closed_browsers.append(pooled_browser)
+
+	async def _reset_context(self, context: _Context) -> None:  # type: ignore
+		context.resets += 1
+
+	async def _is_healthy(self, pooled_browser: PooledBrowser) -> bool:
+		if self.health_check:
+			await self.health_check.wait()
+		return pooled_browser not in self.unhealthy
+
+	async def _get_memory_usage(self, pooled_browser: PooledBrowser) -> int | None:
+		return self.memory
+
+
+async def test_leases_reuse_warm_contexts_and_recycle_browsers():
+	pool = _FakeBrowserPool(
+		BrowserPoolConfig(browsers=1, contexts_per_browser=2, max_leases_per_browser=3, max_browser_memory_mb=100)
+	)
+	await pool.start()
+	first_browser = pool.launched[0]
+
+	async with pool.lease() as lease:
+		context = lease.context
+		assert lease.pooled_browser is first_browser
+	assert context.resets == 1  # type: ignore
+
+	# both contexts are leased at once, a third lease waits for one to be returned
+	second = await pool.acquire()
+	third = await pool.acquire()
+	waiting = asyncio.create_task(pool.acquire())
+	await asyncio.sleep(0)
+	assert not waiting.done()
+
+	# the third lease of the browser retires it, it is closed when its last lease comes back
+	await pool.release(second)
+	assert first_browser.retired and not pool.closed_browsers
+	await pool.release(third)
+	assert pool.closed_browsers == [first_browser]
+	assert len(pool.launched) == 2 and pool.browsers == [pool.launched[1]]
+
+	fourth = await waiting
+	assert fourth.pooled_browser is pool.launched[1]
+
+	# too much memory replaces the browser on return
+	pool.memory = 200 * 1024**2
+	await pool.release(fourth)
+	assert len(pool.launched) == 3
+	pool.memory = 0
+
+	# an unhealthy browser is replaced before it is leased
+	pool.unhealthy.add(pool.launched[2])
+	async with pool.lease() as lease:
+		assert lease.pooled_browser is pool.launched[3]
+
+	await pool.close()
+	assert pool.closed_browsers[-1] is pool.launched[3]
+
+
+async def test_failed_replacement_launches_are_retried(monkeypatch):
+	monkeypatch.setattr(pool_module, 'LAUNCH_RETRY_DELAY', 0)
+	pool = _FakeBrowserPool(BrowserPoolConfig(browsers=1, max_leases_per_browser=1))
+	await pool.start()
+
+	pool.failing_launches = pool_module.LAUNCH_ATTEMPTS - 1
+	async with pool.lease():
+		pass
+	async with pool.lease() as lease:
+		assert lease.pooled_browser is pool.launched[1]
+
+
+async def test_acquire_fails_once_no_browser_is_left(monkeypatch):
+	monkeypatch.setattr(pool_module, 'LAUNCH_RETRY_DELAY', 0)
+	pool = _FakeBrowserPool(BrowserPoolConfig(browsers=1, max_leases_per_browser=1))
+	await pool.start()
+
+	lease = await pool.acquire()
+	waiting = asyncio.create_task(pool.acquire())
+	await asyncio.sleep(0)
+	assert not waiting.done()
+
+	# every replacement launch fails, the waiting acquire has nothing left to wait for
+	pool.failing_launches = pool_module.LAUNCH_ATTEMPTS
+	await pool.release(lease)
+	with pytest.raises(BrowserError):
+		await waiting
+	with pytest.raises(BrowserError):
+		await pool.acquire()
+
+
+async def test_cancelled_acquire_returns_the_context():
+	pool = _FakeBrowserPool(BrowserPoolConfig(browsers=1))
+	await pool.start()
+
+	pool.health_check = asyncio.Event()
+	acquiring = asyncio.create_task(pool.acquire())
+	await asyncio.sleep(0)
+	acquiring.cancel()
+	with pytest.raises(asyncio.CancelledError):
+		await acquiring
+
+	pool.health_check.set()
+	lease = await asyncio.wait_for(pool.acquire(), 1)
+	assert lease.pooled_browser is pool.launched[0]
@@ -0,0 +1,43 @@
+from browser_use.browser.context import CachedLocator, LocatorCache
+from browser_use.dom.views import DOMElementNode
+
+
+class _Page:
+	def __init__(self, url: str):
+		self.url = url
+
+
+class _ElementHandle:
+	def __init__(self):
+		self.disposed = False
+
+	async def dispose(self):
+		self.disposed = True
+
+
+def _button(highlight_index: int, xpath: str) -> DOMElementNode:
+	return DOMElementNode(
+		tag_name='button', xpath=xpath, attributes={}, children=[], is_visible=True, parent=None, highlight_index=highlight_index
+	)
+
+
+async def test_locator_cache_is_scoped_to_the_document_and_the_surviving_elements():
+	cache = LocatorCache()
+	page = _Page('https://shop.example.com/cart')
+	save, remove = _button(0, 'html/body/button[1]'), _button(1, 'html/body/button[2]')
+
+	locators = await cache.for_page(page)  # type: ignore
+	handles = {}
+	for element in (save, remove):
+		handles[element.highlight_index] = _ElementHandle()
+		locators[(element.highlight_index, element.hash)] = CachedLocator([], element.xpath, handles[element.highlight_index])  # type: ignore
+	assert await cache.for_page(page) is locators and len(locators) == 2  # type: ignore
+
+	# after a DOM refresh only elements with the same index and hash keep their handle, the others are disposed
+	await cache.retain({0: _button(0, 'html/body/button[1]'), 1: _button(1, 'html/body/div/button')})
+	assert list(cache.locators) == [(0, save.hash)]
+	assert handles[1].disposed and not handles[0].disposed
+
+	page.url = 'https://shop.example.com/checkout'
+	assert await cache.for_page(page) == {}  # type: ignore
+	assert handles[0].disposed
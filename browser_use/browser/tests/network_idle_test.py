@@ -0,0 +1,72 @@
+import asyncio
+
+from browser_use.browser.network import IGNORED_URL_MATCHER, NetworkIdleTracker, compile_substring_matcher
+
+
+class _Page:
+	def __init__(self):
+		self.listeners: dict[str, list] = {}
+
+	def on(self, event: str, listener) -> None:
+		self.listeners.setdefault(event, []).append(listener)
+
+	def remove_listener(self, event: str, listener) -> None:
+		self.listeners[event].remove(listener)
+
+	def emit(self, event: str, arg) -> None:
+		for listener in self.listeners.get(event, []):
+			listener(arg)
+
+
+class _Request:
+	def __init__(self, url: str, resource_type: str = 'script'):
+		self.url = url
+		self.resource_type = resource_type
+		self.headers: dict[str, str] = {}
+
+
+class _Response:
+	def __init__(self, request: _Request, content_type: str = 'application/javascript'):
+		self.request = request
+		self.headers = {'content-type': content_type}
+
+
+def test_ignored_url_patterns_are_one_matcher():
+	assert IGNORED_URL_MATCHER.search('https://www.google-analytics.com/collect')
+	assert IGNORED_URL_MATCHER.search('wss://chat.example.com/socket')
+	assert not IGNORED_URL_MATCHER.search('https://shop.example.com/app.js')
+	assert compile_substring_matcher(['Ads.', 'ads.example']).search('https://ads.example.com/x').group() == 'ads.example'
+
+
+async def test_wait_for_idle_follows_request_events():
+	page = _Page()
+	tracker = NetworkIdleTracker(page)  # type: ignore
+	tracker.attach()
+
+	# nothing in flight, idle once the idle time has passed since the call
+	assert await tracker.wait_for_idle(0.01, timeout=1)
+
+	app, tracker_pixel, chat = (
+		_Request('https://shop.example.com/app.js'),
+		_Request('https://metrics.example.com/pixel.gif', 'image'),
+		_Request('https://shop.example.com/chat', 'websocket'),
+	)
+	for request in (app, tracker_pixel, chat):
+		page.emit('request', request)
+	assert tracker.pending_requests == {app}
+	assert not await tracker.wait_for_idle(0.01, timeout=0.05)
+
+	# the waiter wakes up on the response instead of polling
+	waiter = asyncio.create_task(tracker.wait_for_idle(0.01, timeout=1))
+	await asyncio.sleep(0.02)
+	page.emit('response', _Response(app))
+	assert await waiter
+
+	failed = _Request('https://shop.example.com/styles.css', 'stylesheet')
+	page.emit('request', failed)
+	page.emit('requestfailed', failed)
+	assert not tracker.pending_requests
+
+	tracker.detach()
+	page.emit('request', _Request('https://shop.example.com/late.js'))
+	assert not tracker.pending_requests
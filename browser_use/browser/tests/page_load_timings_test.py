@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from browser_use.browser.page_load_timings import MIN_SAMPLES, PageLoadSample, PageLoadTimings, PageLoadWaits, percentile
+
+CONFIGURED_WAITS = PageLoadWaits(minimum=0.25, network_idle=0.5, maximum=5)
+
+
+def test_percentile_is_nearest_rank():
+	assert percentile([3, 1, 2], 0.5) == 2
+	assert percentile([1, 2, 3, 4], 0.9) == 4
+	assert percentile([7], 0.95) == 7
+
+
+def test_waits_follow_the_observed_page_loads_within_bounds(tmp_path: Path):
+	timings = PageLoadTimings(CONFIGURED_WAITS, lower_bound=0.1)
+	for _ in range(MIN_SAMPLES - 1):
+		timings.record('intranet.local', PageLoadSample(settle_time=0.02, quiet_gap=0.01))
+		timings.record('news.example.com', PageLoadSample(settle_time=2.5, quiet_gap=0.4))
+
+	# too few page loads, the configured waits are used
+	assert timings.get_waits('intranet.local') == CONFIGURED_WAITS
+	assert timings.get_waits('unknown.example.com') == CONFIGURED_WAITS
+
+	timings.record('intranet.local', PageLoadSample(settle_time=0.05, quiet_gap=0.08))
+	timings.record('news.example.com', PageLoadSample(settle_time=5, quiet_gap=0.5))
+
+	# a fast domain gets waits down to the lower bound, a slow one keeps the configured upper bounds
+	# the maximum is a timeout and never shrinks
+	assert timings.get_waits('intranet.local') == PageLoadWaits(minimum=0.1, network_idle=0.16, maximum=5)
+	assert timings.get_waits('news.example.com') == CONFIGURED_WAITS
+
+	table = timings.table()
+	assert table['intranet.local']['samples'] == MIN_SAMPLES
+	assert table['news.example.com']['settle_time_p95'] == 5
+
+	saved = tmp_path / 'timings' / 'page_load_timings.json'
+	timings.save(saved)
+	reloaded = PageLoadTimings(CONFIGURED_WAITS, lower_bound=0.1)
+	reloaded.load(saved)
+	reloaded.load(tmp_path / 'missing.json')
+	assert reloaded.table() == table
@@ -0,0 +1,79 @@
+import struct
+import zlib
+
+import pytest
+
+from browser_use.browser.utils.perceptual_hash import (
+	decode_png_grayscale,
+	difference_hash,
+	hamming_distance,
+	hash_image,
+	is_same_screenshot,
+)
+
+
+def _paeth(left: int, up: int, up_left: int) -> int:
+	p = left + up - up_left
+	pa, pb, pc = abs(p - left), abs(p - up), abs(p - up_left)
+	return left if pa <= pb and pa <= pc else up if pb <= pc else up_left
+
+
+def _png(pixels: list[list[tuple[int, int, int]]]) -> bytes:
+	"""RGB PNG that cycles through all five row filters"""
+	width, height = len(pixels[0]), len(pixels)
+	raw = bytearray()
+	previous = bytes(width * 3)
+	for y, row in enumerate(pixels):
+		line = bytes(channel for pixel in row for channel in pixel)
+		filter_type = y % 5
+		filtered = bytearray()
+		for i, value in enumerate(line):
+			left = line[i - 3] if i >= 3 else 0
+			up_left = previous[i - 3] if i >= 3 else 0
+			predictor = [0, left, previous[i], (left + previous[i]) >> 1, _paeth(left, previous[i], up_left)][filter_type]
+			filtered.append((value - predictor) & 0xFF)
+		raw += bytes([filter_type]) + filtered
+		previous = line
+
+	def chunk(chunk_type: bytes, data: bytes) -> bytes:
+		return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+
+	header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+	return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(bytes(raw))) + chunk(b'IEND', b'')
+
+
+def _page(button_color: tuple[int, int, int]) -> list[list[tuple[int, int, int]]]:
+	pixels = [[(250, 250, 250) if (x // 8 + y // 8) % 2 else (30, 60, 90) for x in range(64)] for y in range(40)]
+	for y in range(30, 38):
+		for x in range(40, 60):
+			pixels[y][x] = button_color
+	return pixels
+
+
+def test_png_is_decoded_to_luma():
+	width, height, luma = decode_png_grayscale(_png(_page((0, 0, 0))))
+
+	assert (width, height, len(luma)) == (64, 40, 64 * 40)
+	assert luma[0] == (299 * 30 + 587 * 60 + 114 * 90) // 1000
+	assert luma[8] == 250 and luma[31 * 64 + 41] == 0
+
+
+def test_unchanged_page_is_detected_by_hash_distance():
+	page = difference_hash(*decode_png_grayscale(_png(_page((0, 0, 0)))))
+	same_page = difference_hash(*decode_png_grayscale(_png(_page((0, 0, 0)))))
+	hovered = difference_hash(*decode_png_grayscale(_png(_page((20, 20, 20)))))
+	changed = difference_hash(*decode_png_grayscale(_png(_page((255, 255, 255)))))
+
+	assert page == same_page
+	assert hamming_distance(page, hovered) < hamming_distance(page, changed)
+	assert is_same_screenshot(page, same_page, 0) and not is_same_screenshot(page, changed, 4)
+	assert not is_same_screenshot(page, None, 4)
+
+
+def test_captured_screenshot_is_hashed_like_the_decoded_png():
+	pytest.importorskip('PIL')
+	# 68x64 splits evenly into the 17x16 hash cells, so box-resizing averages the same pixels
+	pixels = [[(250, 250, 250) if (x // 4 + y // 8) % 2 else (30, 60, 90) for x in range(68)] for y in range(64)]
+	image = _png(pixels)
+
+	assert hamming_distance(hash_image(image), difference_hash(*decode_png_grayscale(image))) <= 4
@@ -0,0 +1,85 @@
+from browser_use.browser.network import ESTIMATED_RESOURCE_BYTES, IGNORED_URL_MATCHER, ResourceBlocker, compile_url_matcher
+
+
+class _Page:
+	def __init__(self):
+		self.url = 'https://shop.example.com/'
+		self.listeners: dict[str, list] = {}
+
+	def once(self, event: str, listener) -> None:
+		self.listeners.setdefault(event, []).append(listener)
+
+	def emit(self, event: str) -> None:
+		for listener in self.listeners.pop(event, []):
+			listener(self)
+
+
+class _Frame:
+	def __init__(self, page: _Page, parent_frame: '_Frame | None' = None):
+		self.page = page
+		self.parent_frame = parent_frame
+
+
+class _Request:
+	def __init__(self, frame: _Frame, url: str, resource_type: str = 'script'):
+		self.frame = frame
+		self.url = url
+		self.resource_type = resource_type
+
+
+class _Route:
+	def __init__(self):
+		self.outcome: str | None = None
+
+	async def abort(self, error_code: str | None = None) -> None:
+		self.outcome = error_code
+
+	async def fallback(self) -> None:
+		self.outcome = 'continued'
+
+
+def test_url_matcher_matches_domains_by_host():
+	matcher = compile_url_matcher(['doubleclick.net'])
+
+	assert matcher.search('https://doubleclick.net/')
+	assert matcher.search('https://stats.g.doubleclick.net:443/collect')
+	assert not matcher.search('https://notdoubleclick.net/')
+	assert not matcher.search('https://example.com/?ref=doubleclick.net')
+	assert not compile_url_matcher().search('https://example.com/')
+	# the blocked domains never delay network idle either
+	assert IGNORED_URL_MATCHER.search('https://widget.intercom.io/widget/abc')
+
+
+async def test_blocked_requests_are_aborted_and_counted_per_page():
+	blocker = ResourceBlocker(['ads', 'fonts'])
+	page, other_page = _Page(), _Page()
+	main_frame = _Frame(page)
+	ad_frame = _Frame(page, parent_frame=main_frame)
+
+	requests = {
+		'app': _Request(main_frame, 'https://shop.example.com/app.js'),
+		'analytics': _Request(main_frame, 'https://www.google-analytics.com/analytics.js'),
+		'font': _Request(main_frame, 'https://fonts.example.com/inter.woff2', 'font'),
+		'ad_iframe': _Request(ad_frame, 'https://ad.doubleclick.net/ad.html', 'document'),
+		'navigation': _Request(_Frame(other_page), 'https://doubleclick.net/', 'document'),
+	}
+	routes = {name: _Route() for name in requests}
+	for name, request in requests.items():
+		await blocker._handle_route(routes[name], request)  # type: ignore
+
+	assert {name: route.outcome for name, route in routes.items()} == {
+		'app': 'continued',
+		'analytics': 'blockedbyclient',
+		'font': 'blockedbyclient',
+		'ad_iframe': 'blockedbyclient',
+		'navigation': 'continued',
+	}
+
+	blocked = blocker.get_blocked_resources(page)  # type: ignore
+	assert blocked.count == 3
+	assert blocked.by_resource_type == {'script': 1, 'font': 1, 'document': 1}
+	assert blocked.estimated_bytes_saved == sum(ESTIMATED_RESOURCE_BYTES[kind] for kind in ('script', 'font', 'document'))
+	assert blocker.get_blocked_resources(other_page).count == 0  # type: ignore
+
+	page.emit('close')
+	assert page not in blocker.blocked
@@ -0,0 +1,54 @@
+import asyncio
+import base64
+import struct
+import time
+
+from browser_use.browser.screencast import ScreencastBuffer, image_size
+
+
+class _CDPSession:
+	def __init__(self):
+		self.acks: list[int] = []
+
+	async def send(self, method: str, params: dict | None = None):
+		self.acks.append(params['sessionId'])  # type: ignore
+
+
+def _jpeg(width: int, height: int) -> bytes:
+	app0 = b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00' + bytes(9)
+	sof0 = b'\xff\xc0' + struct.pack('>HBHHB', 11, 8, height, width, 1) + bytes(3)
+	return b'\xff\xd8' + app0 + sof0 + b'\xff\xd9'
+
+
+def _frame(session_id: int, timestamp: float, width: int = 1280) -> dict:
+	data = base64.b64encode(_jpeg(width, 720)).decode()
+	return {'data': data, 'sessionId': session_id, 'metadata': {'timestamp': timestamp}}
+
+
+def test_image_size_reads_png_and_jpeg_headers():
+	png = b'\x89PNG\r\n\x1a\n' + struct.pack('>I4sII', 13, b'IHDR', 800, 600)
+
+	assert image_size(png) == (800, 600)
+	assert image_size(_jpeg(1280, 720)) == (1280, 720)
+
+
+async def test_latest_frame_waits_for_a_frame_painted_after_invalidation():
+	buffer = ScreencastBuffer()
+	cdp_session = _CDPSession()
+	buffer._cdp_session = cdp_session  # type: ignore
+
+	buffer._on_frame(_frame(1, time.time()))
+	frame = await buffer.latest_frame(timeout=0.01)
+	assert frame is not None and (frame.width, frame.height, frame.mime_type) == (1280, 720, 'image/jpeg')
+
+	# an action runs, the frame painted before it is no longer the page
+	buffer.invalidate()
+	assert await buffer.latest_frame(timeout=0.01) is None
+	buffer._on_frame(_frame(2, buffer.invalidated_at - 1, width=640))
+	assert await buffer.latest_frame(timeout=0.01) is None
+
+	buffer._on_frame(_frame(3, time.time(), width=320))
+	frame = await buffer.latest_frame(timeout=0.01)
+	assert frame is not None and frame.width == 320
+	await asyncio.sleep(0)
+	assert cdp_session.acks == [1, 2, 3]
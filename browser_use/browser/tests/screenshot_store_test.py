@@ -0,0 +1,38 @@
+import base64
+from pathlib import Path
+
+from browser_use.agent.views import AgentHistory, AgentHistoryList
+from browser_use.browser.screenshot_store import ScreenshotStore
+from browser_use.browser.views import BrowserStateHistory
+
+
+def _step(**screenshot) -> AgentHistory:
+	state = BrowserStateHistory(url='https://example.com', title='Example', tabs=[], interacted_element=[None], **screenshot)
+	return AgentHistory(model_output=None, result=[], state=state)
+
+
+def test_screenshots_are_written_once_and_loaded_lazily(tmp_path: Path):
+	store = ScreenshotStore(tmp_path / 'run')
+	home, search = base64.b64encode(b'home page').decode(), base64.b64encode(b'search results').decode()
+
+	home_path = store.save(home)
+	assert store.save(home) == home_path
+	search_path = store.save(search, 'image/jpeg')
+	assert search_path.endswith('.jpeg')
+	assert sorted(path.name for path in (tmp_path / 'run').iterdir()) == sorted([Path(home_path).name, Path(search_path).name])
+
+	history = AgentHistoryList(
+		history=[
+			_step(screenshot_path=home_path),
+			_step(screenshot_ref=0),
+			_step(screenshot_path=search_path),
+			_step(screenshot=home),
+		]
+	)
+	assert history.screenshots() == [home, home, search, home]
+	assert history.screenshot_paths() == [home_path, home_path, search_path, None]
+
+	saved = tmp_path / 'history.json'
+	history.save_to_file(saved)
+	# only the step kept in memory writes the image into the json
+	assert saved.read_text().count(home) == 1
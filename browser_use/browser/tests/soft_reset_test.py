@@ -0,0 +1,114 @@
+import json
+from pathlib import Path
+
+from browser_use.browser.browser import BrowserConfig
+from browser_use.browser.context import BrowserContext, BrowserContextConfig, BrowserSession
+
+
+class _Browser:
+	def __init__(self):
+		self.config = BrowserConfig()
+
+
+class _Page:
+	def __init__(self, context: '_PlaywrightContext'):
+		self.context = context
+		self.viewport_size: dict | None = None
+
+	async def close(self):
+		self.context.open_pages.remove(self)
+
+	async def set_viewport_size(self, viewport_size: dict):
+		self.viewport_size = viewport_size
+
+
+class _CDPSession:
+	def __init__(self, calls: list):
+		self.calls = calls
+
+	async def send(self, method: str, params: dict | None = None):
+		self.calls.append((method, params))
+
+	async def detach(self):
+		self.calls.append(('detach', None))
+
+
+class _PlaywrightContext:
+	"""Records the calls a soft reset makes instead of talking to a browser"""
+
+	def __init__(self):
+		self.open_pages: list[_Page] = []
+		self.calls: list = []
+		self.task_cookies = [{'name': 'session', 'value': 'task', 'domain': 'example.com', 'path': '/'}]
+
+	@property
+	def pages(self) -> list[_Page]:
+		# a copy, like playwright
+		return list(self.open_pages)
+
+	async def new_page(self) -> _Page:
+		page = _Page(self)
+		self.open_pages.append(page)
+		return page
+
+	async def new_cdp_session(self, page: _Page) -> _CDPSession:
+		assert page in self.pages
+		return _CDPSession(self.calls)
+
+	async def cookies(self) -> list[dict]:
+		return self.task_cookies
+
+	async def clear_cookies(self):
+		self.calls.append(('clear_cookies', None))
+
+	async def add_cookies(self, cookies: list[dict]):
+		self.calls.append(('add_cookies', cookies))
+
+	async def clear_permissions(self):
+		self.calls.append(('clear_permissions', None))
+
+	async def grant_permissions(self, permissions: list[str]):
+		self.calls.append(('grant_permissions', permissions))
+
+
+class _Screencast:
+	def __init__(self):
+		self.stopped = False
+
+	async def stop(self):
+		self.stopped = True
+
+
+async def test_soft_reset_replaces_tabs_and_clears_the_visited_origins(tmp_path: Path):
+	cookies_file = tmp_path / 'cookies.json'
+	config = BrowserContextConfig(cookies_file=str(cookies_file), permissions=['clipboard-read'], no_viewport=False)
+	browser_context = BrowserContext(browser=_Browser(), config=config)  # type: ignore
+	playwright_context = _PlaywrightContext()
+	session = browser_context.session = BrowserSession(playwright_context)  # type: ignore
+
+	old_pages = [await playwright_context.new_page(), await playwright_context.new_page()]
+	browser_context.agent_current_page = browser_context.human_current_page = old_pages[1]  # type: ignore
+	session.visited_origins.update({'https://example.com', 'https://login.example.com'})
+	screencast = session.screencast = _Screencast()  # type: ignore
+
+	await browser_context.soft_reset()
+
+	# one fresh tab replaces all old ones and becomes the agent and human tab
+	assert len(playwright_context.pages) == 1 and playwright_context.pages[0] not in old_pages
+	page = playwright_context.pages[0]
+	assert browser_context.agent_current_page is page and browser_context.human_current_page is page
+	assert page.viewport_size == {'width': config.window_width, 'height': config.window_height}
+	assert screencast.stopped
+
+	# the cache and the storage of every visited origin are cleared
+	cleared_origins = {params['origin'] for method, params in playwright_context.calls if method == 'Storage.clearDataForOrigin'}
+	assert cleared_origins == {'https://example.com', 'https://login.example.com'}
+	assert ('Network.clearBrowserCache', None) in playwright_context.calls
+	assert not session.visited_origins
+
+	# cookies are saved, cleared and loaded again from the cookies file, permissions are granted again
+	assert json.loads(cookies_file.read_text()) == playwright_context.task_cookies
+	calls = [method for method, _ in playwright_context.calls]
+	assert calls.index('clear_cookies') < calls.index('add_cookies')
+	assert calls.index('clear_permissions') < calls.index('grant_permissions')
+	assert ('grant_permissions', ['clipboard-read']) in playwright_context.calls
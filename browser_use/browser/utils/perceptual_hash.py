@@ -0,0 +1,115 @@
+import io
+import struct
+import zlib
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# channels per pixel of the 8 bit PNG color types
+PNG_CHANNELS = {0: 1, 2: 3, 4: 2, 6: 4}
+
+
+def decode_png_grayscale(data: bytes) -> tuple[int, int, list[int]]:
+	"""
+	Width, height and row-major luma values of an 8 bit, non interlaced PNG.
+	Pure python, meant for thumbnails of a few thousand pixels.
+	"""
+	if not data.startswith(PNG_SIGNATURE):
+		raise ValueError('Not a PNG image')
+
+	width = height = channels = 0
+	idat = bytearray()
+	offset = len(PNG_SIGNATURE)
+	while offset < len(data):
+		length, chunk_type = struct.unpack('>I4s', data[offset : offset + 8])
+		chunk = data[offset + 8 : offset + 8 + length]
+		offset += length + 12
+		if chunk_type == b'IHDR':
+			width, height, bit_depth, color_type, _, _, interlace = struct.unpack('>IIBBBBB', chunk)
+			if bit_depth != 8 or interlace or color_type not in PNG_CHANNELS:
+				raise ValueError(f'Unsupported PNG: bit depth {bit_depth}, color type {color_type}, interlace {interlace}')
+			channels = PNG_CHANNELS[color_type]
+		elif chunk_type == b'IDAT':
+			idat += chunk
+		elif chunk_type == b'IEND':
+			break
+
+	raw = zlib.decompress(bytes(idat))
+	stride = width * channels
+	previous = bytearray(stride)
+	luma: list[int] = []
+	for y in range(height):
+		start = y * (stride + 1)
+		row = _unfilter(raw[start], bytearray(raw[start + 1 : start + 1 + stride]), previous, channels)
+		if channels >= 3:
+			luma.extend((299 * row[i] + 587 * row[i + 1] + 114 * row[i + 2]) // 1000 for i in range(0, stride, channels))
+		else:
+			luma.extend(row[0:stride:channels])
+		previous = row
+	return width, height, luma
+
+
+def _unfilter(filter_type: int, row: bytearray, previous: bytearray, bpp: int) -> bytearray:
+	if filter_type == 1:  # sub
+		for i in range(bpp, len(row)):
+			row[i] = (row[i] + row[i - bpp]) & 0xFF
+	elif filter_type == 2:  # up
+		for i in range(len(row)):
+			row[i] = (row[i] + previous[i]) & 0xFF
+	elif filter_type == 3:  # average
+		for i in range(len(row)):
+			left = row[i - bpp] if i >= bpp else 0
+			row[i] = (row[i] + ((left + previous[i]) >> 1)) & 0xFF
+	elif filter_type == 4:  # paeth
+		for i in range(len(row)):
+			left = row[i - bpp] if i >= bpp else 0
+			up_left = previous[i - bpp] if i >= bpp else 0
+			up = previous[i]
+			p = left + up - up_left
+			pa, pb, pc = abs(p - left), abs(p - up), abs(p - up_left)
+			predictor = left if pa <= pb and pa <= pc else up if pb <= pc else up_left
+			row[i] = (row[i] + predictor) & 0xFF
+	elif filter_type != 0:
+		raise ValueError(f'Unknown PNG filter type {filter_type}')
+	return row
+
+
+def difference_hash(width: int, height: int, luma: list[int], hash_size: int = 16) -> int:
+	"""
+	dHash of a grayscale image: box-average it down to (hash_size + 1) x hash_size cells
+	and set one bit per cell that is brighter than its right neighbour.
+	"""
+	columns, rows = hash_size + 1, hash_size
+	cells = []
+	for row in range(rows):
+		y0 = row * height // rows
+		y1 = max((row + 1) * height // rows, y0 + 1)
+		for column in range(columns):
+			x0 = column * width // columns
+			x1 = max((column + 1) * width // columns, x0 + 1)
+			total = sum(sum(luma[y * width + x0 : y * width + x1]) for y in range(y0, y1))
+			cells.append(total / ((y1 - y0) * (x1 - x0)))
+
+	bits = 0
+	for row in range(rows):
+		for column in range(hash_size):
+			index = row * columns + column
+			bits = (bits << 1) | (cells[index] > cells[index + 1])
+	return bits
+
+
+def hash_image(data: bytes, hash_size: int = 16) -> int:
+	"""dHash of an encoded screenshot in any format Pillow reads (PNG, JPEG, WebP), raises ImportError without Pillow"""
+	from PIL import Image
+
+	with Image.open(io.BytesIO(data)) as image:
+		# box-averaging down to the hash cells gives the same cells as difference_hash does on the full image
+		cells = image.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BOX)
+	return difference_hash(hash_size + 1, hash_size, list(cells.getdata()), hash_size)
+
+
+def hamming_distance(first: int, second: int) -> int:
+	return (first ^ second).bit_count()
+
+
+def is_same_screenshot(first: int | None, second: int | None, threshold: int) -> bool:
+	"""Whether two screenshot hashes are at most threshold bits apart, False if either is missing"""
+	return first is not None and second is not None and hamming_distance(first, second) <= threshold
@@ -3,6 +3,8 @@ from typing import Any
 
 from pydantic import BaseModel
 
+from browser_use.browser.screenshot_store import ScreenshotStore
+from browser_use.dom.diff_processor.view import DOMStateDiff
 from browser_use.dom.history_tree_processor.service import DOMHistoryElement
 from browser_use.dom.views import DOMState
 
@@ -23,9 +25,28 @@ class BrowserState(DOMState):
 	title: str
 	tabs: list[TabInfo]
 	screenshot: str | None = None
+	screenshot_mime_type: str = 'image/png'
+	# width and height of the screenshot in pixels, after any downscaling
+	screenshot_size: tuple[int, int] | None = None
+	# perceptual hash of the screenshot, see BrowserContext.get_screenshot_hash
+	screenshot_hash: int | None = None
 	pixels_above: int = 0
 	pixels_below: int = 0
 	browser_errors: list[str] = field(default_factory=list)
+	# interactive elements changed since the last state of the same url, set by get_state(cache_clickable_elements_hashes=True)
+	dom_diff: DOMStateDiff | None = None
+
+
+@dataclass
+class Screenshot:
+	"""
+	Screenshot as captured by BrowserContext, base64 encoded
+	"""
+
+	data: str
+	mime_type: str
+	width: int
+	height: int
 
 
 @dataclass
@@ -35,11 +56,25 @@ class BrowserStateHistory:
 	tabs: list[TabInfo]
 	interacted_element: list[DOMHistoryElement | None] | list[None]
 	screenshot: str | None = None
+	screenshot_hash: int | None = None
+	# index of the earlier history item whose screenshot looks the same, stored instead of the screenshot
+	screenshot_ref: int | None = None
+	# file of the screenshot in a ScreenshotStore, stored instead of the screenshot
+	screenshot_path: str | None = None
+
+	def get_screenshot(self) -> str | None:
+		"""The base64 encoded screenshot, loaded from the screenshot store if it was saved there"""
+		if self.screenshot is None and self.screenshot_path:
+			return ScreenshotStore.load(self.screenshot_path)
+		return self.screenshot
 
 	def to_dict(self) -> dict[str, Any]:
 		data = {}
 		data['tabs'] = [tab.model_dump() for tab in self.tabs]
 		data['screenshot'] = self.screenshot
+		data['screenshot_hash'] = self.screenshot_hash
+		data['screenshot_ref'] = self.screenshot_ref
+		data['screenshot_path'] = self.screenshot_path
 		data['interacted_element'] = [el.to_dict() if el else None for el in self.interacted_element]
 		data['url'] = self.url
 		data['title'] = self.title
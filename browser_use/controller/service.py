@@ -1422,6 +1422,8 @@ class Controller(Generic[Context]):
 		try:
 			for action_name, params in action.model_dump(exclude_unset=True).items():
 				if params is not None:
+					# screenshots taken after the action have to show its effect
+					browser_context.invalidate_screencast()
 					# with Laminar.start_as_current_span(
 					# 	name=action_name,
 					# 	input={
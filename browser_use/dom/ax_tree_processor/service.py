@@ -0,0 +1,151 @@
+from collections import Counter, defaultdict
+
+from browser_use.dom.views import DOMElementNode, DOMTextNode, SelectorMap, intern_attributes
+
+ELEMENT_NODE = 1
+
+# roles that become highlighted elements, the accessibility counterpart of the interactive checks in buildDomTree.js
+AX_INTERACTIVE_ROLES = {
+	'button',
+	'link',
+	'textbox',
+	'searchbox',
+	'combobox',
+	'listbox',
+	'option',
+	'checkbox',
+	'radio',
+	'switch',
+	'slider',
+	'spinbutton',
+	'tab',
+	'menuitem',
+	'menuitemcheckbox',
+	'menuitemradio',
+	'treeitem',
+}
+AX_TEXT_ROLE = 'StaticText'
+
+
+def _ax_value(ax_value: dict | None):
+	return ax_value.get('value') if ax_value else None
+
+
+class AXTreeProcessor:
+	"""
+	Builds the DOMElementNode tree and selector map from Accessibility.getFullAXTree and DOM.getDocument results.
+
+	Only nodes with an interactive role become elements, each carrying its accessible name as text, so the tree is
+	a fraction of the DOM on form heavy pages. Static text outside of them is kept as text nodes. Every element keeps
+	the tag, attributes and xpath of its DOM node, so actions locate it exactly like a buildDomTree.js element.
+	Only the main frame is covered, iframe documents are not descended into.
+	"""
+
+	def __init__(self, ax_nodes: list[dict], document: dict):
+		self.ax_nodes = {node['nodeId']: node for node in ax_nodes}
+		self.root_id = next((node['nodeId'] for node in ax_nodes if not node.get('parentId')), None)
+		self.dom_elements = self._index_dom_elements(document)
+
+	def interactive_xpaths(self) -> list[str]:
+		"""Xpaths of the elements build() creates, in the same order"""
+		xpaths = []
+		stack = [self.root_id]
+		while stack:
+			ax_node = self.ax_nodes.get(stack.pop())
+			if ax_node is None:
+				continue
+			dom_element = self._interactive_dom_element(ax_node)
+			if dom_element is not None:
+				xpaths.append(dom_element[2])
+			stack.extend(reversed(ax_node.get('childIds', [])))
+		return xpaths
+
+	def build(self, in_viewport: dict[str, bool] | None = None) -> tuple[DOMElementNode, SelectorMap]:
+		"""
+		in_viewport: whether the element with that xpath gets a highlight index, None highlights all of them.
+		"""
+		root = DOMElementNode(
+			tag_name='body', xpath='/body', attributes={}, children=[], is_visible=True, parent=None, is_top_element=True
+		)
+		selector_map: SelectorMap = {}
+
+		stack: list[tuple[str | None, DOMElementNode, bool]] = [(self.root_id, root, False)]
+		while stack:
+			node_id, parent, inside_element = stack.pop()
+			ax_node = self.ax_nodes.get(node_id)  # type: ignore
+			if ax_node is None:
+				continue
+
+			dom_element = self._interactive_dom_element(ax_node)
+			if dom_element is not None:
+				tag_name, attributes, xpath = dom_element
+				highlighted = in_viewport is None or in_viewport.get(xpath, True)
+				element = DOMElementNode(
+					tag_name=tag_name,
+					xpath=xpath,
+					attributes=attributes,
+					children=[],
+					is_visible=True,
+					parent=parent,
+					is_interactive=True,
+					is_top_element=True,
+					is_in_viewport=highlighted,
+					highlight_index=len(selector_map) if highlighted else None,
+				)
+				name = (_ax_value(ax_node.get('name')) or '').strip()
+				if name:
+					element.children.append(DOMTextNode(text=name, is_visible=True, parent=element))
+				parent.children.append(element)
+				if element.highlight_index is not None:
+					selector_map[element.highlight_index] = element
+				parent, inside_element = element, True
+
+			elif _ax_value(ax_node.get('role')) == AX_TEXT_ROLE and not ax_node.get('ignored'):
+				# the accessible name of an element already contains its text
+				name = (_ax_value(ax_node.get('name')) or '').strip()
+				if name and not inside_element:
+					parent.children.append(DOMTextNode(text=name, is_visible=True, parent=parent))
+				# only inline text boxes below
+				continue
+
+			stack.extend((child_id, parent, inside_element) for child_id in reversed(ax_node.get('childIds', [])))
+
+		return root, selector_map
+
+	def _interactive_dom_element(self, ax_node: dict) -> tuple[str, dict[str, str], str] | None:
+		if ax_node.get('ignored') or _ax_value(ax_node.get('role')) not in AX_INTERACTIVE_ROLES:
+			return None
+		for ax_property in ax_node.get('properties', []):
+			if ax_property['name'] == 'disabled' and _ax_value(ax_property.get('value')):
+				return None
+		return self.dom_elements.get(ax_node.get('backendDOMNodeId'))  # type: ignore
+
+	@staticmethod
+	def _index_dom_elements(document: dict) -> dict[int, tuple[str, dict[str, str], str]]:
+		"""Tag, attributes and xpath of every element by backendNodeId, xpaths follow getXPathTree in buildDomTree.js"""
+		elements = {}
+		# xpaths restart below documents and shadow roots
+		stack: list[tuple[dict, str]] = [(document, '')]
+		while stack:
+			node, xpath = stack.pop()
+			element_children = [child for child in node.get('children', []) if child.get('nodeType') == ELEMENT_NODE]
+			# only elements with a parent element get a position, see getElementPosition
+			has_parent_element = node.get('nodeType') == ELEMENT_NODE
+			tag_counts = Counter(child['nodeName'].lower() for child in element_children)
+			tag_positions: defaultdict[str, int] = defaultdict(int)
+
+			for child in element_children:
+				tag_name = child['nodeName'].lower()
+				tag_positions[tag_name] += 1
+				segment = (
+					f'{tag_name}[{tag_positions[tag_name]}]' if has_parent_element and tag_counts[tag_name] > 1 else tag_name
+				)
+				child_xpath = f'{xpath}/{segment}' if xpath else segment
+				raw_attributes = child.get('attributes', [])
+				attributes = intern_attributes(dict(zip(raw_attributes[::2], raw_attributes[1::2])))
+				elements[child['backendNodeId']] = (tag_name, attributes, child_xpath)
+				stack.append((child, child_xpath))
+
+			stack.extend((shadow_root, '') for shadow_root in node.get('shadowRoots', []))
+
+		return elements
@@ -4,11 +4,21 @@
     focusHighlightIndex: -1,
     viewportExpansion: 0,
     debugMode: false,
+    trackMutations: false,
+    incremental: false,
+    startHighlightIndex: 0,
+    maxIncrementalRoots: 50,
+    compactOutput: false,
+    highlightRenderer: 'dom',
   }
 ) => {
   Node_ELEMENT_NODE = 1;
   Node_TEXT_NODE = 3;
   const { doHighlightElements, focusHighlightIndex, viewportExpansion, debugMode } = args;
+  const trackMutations = args.trackMutations || false;
+  const maxIncrementalRoots = args.maxIncrementalRoots ?? 50;
+  // 'dom' draws a div and a label per element, 'canvas' paints all highlights onto one canvas
+  const highlightRenderer = args.highlightRenderer || 'dom';
   let highlightIndex = 0; // Reset highlight index
 
   // Add timing stack to handle recursion
@@ -33,6 +43,10 @@
   // Only initialize performance tracking if in debug mode
   const PERF_METRICS = debugMode ? {
     buildDomTreeCalls: 0,
+    phases: {
+      readPass: 0,       // walk: layout reads and interactivity checks, no DOM writes
+      highlightPass: 0,  // batched overlay measuring and insertion after the walk
+    },
     timings: {
       buildDomTree: 0,
       highlightElement: 0,
@@ -219,6 +233,60 @@
   // Add a WeakMap cache for XPath strings
   const xpathCache = new WeakMap();
 
+  /**
+   * Persistent per-document tracker that records which subtrees changed between calls.
+   * Installed once (on window) and reused by every following buildDomTree call on the same document.
+   */
+  function installMutationTracker() {
+    if (window._browserUseDomTracker) return window._browserUseDomTracker;
+
+    const tracker = {
+      dirty: new Set(),        // elements whose subtree changed since the last walk
+      layoutDirty: true,       // scroll/resize/first run -> geometry of everything may have changed
+      hasFrames: false,        // iframe contents are not observed, so pages with iframes always rebuild fully
+      elements: new Map(),     // highlightIndex -> element from the last walk
+      covered: new Set(),      // visible interactive candidates that another element was on top of
+      observer: null,
+    };
+
+    const isOwnNode = (node) => {
+      if (!node) return false;
+      if (node.id === HIGHLIGHT_CONTAINER_ID) return true;
+      const parent = node.parentElement;
+      return !!(parent && parent.closest && parent.closest(`#${HIGHLIGHT_CONTAINER_ID}`));
+    };
+
+    tracker.processRecords = (records) => {
+      for (const record of records) {
+        // our own highlight overlays and bookkeeping attributes are not page changes
+        if (record.type === 'attributes' && record.attributeName === 'browser-user-highlight-id') continue;
+        if (record.type === 'childList' &&
+          [...record.addedNodes, ...record.removedNodes].every(isOwnNode)) continue;
+
+        const target = record.target.nodeType === Node_ELEMENT_NODE ? record.target : record.target.parentElement;
+        if (!target || isOwnNode(target)) continue;
+        tracker.dirty.add(target);
+      }
+    };
+
+    tracker.observer = new MutationObserver(tracker.processRecords);
+    tracker.observer.observe(document.documentElement, {
+      subtree: true,
+      childList: true,
+      attributes: true,
+      characterData: true,
+    });
+
+    const markLayoutDirty = () => { tracker.layoutDirty = true; };
+    window.addEventListener('scroll', markLayoutDirty, { capture: true, passive: true });
+    window.addEventListener('resize', markLayoutDirty, { passive: true });
+
+    window._browserUseDomTracker = tracker;
+    return tracker;
+  }
+
+  const tracker = trackMutations ? installMutationTracker() : null;
+
   // Initialize once and reuse
   const viewportObserver = new IntersectionObserver(
     (entries) => {
@@ -230,231 +298,280 @@
   );
 
   /**
-   * Highlights an element in the DOM and returns the index of the next element.
+   * Highlights are drawn in two phases. During the walk (read pass) highlightElement only queues the
+   * element, flushHighlights() then measures all queued elements and inserts every overlay with a single
+   * DOM write, so overlay writes never force a relayout between two layout reads of the walk.
    */
-  function highlightElement(element, index, parentIframe = null) {
-    pushTiming('highlighting');
-    
-    if (!element) return index;
+  const pendingHighlights = [];
+
+  const HIGHLIGHT_COLORS = [
+    "#FF0000",
+    "#00FF00",
+    "#0000FF",
+    "#FFA500",
+    "#800080",
+    "#008080",
+    "#FF69B4",
+    "#4B0082",
+    "#FF4500",
+    "#2E8B57",
+    "#DC143C",
+    "#4682B4",
+  ];
+  const LABEL_WIDTH = 20;
+  const LABEL_HEIGHT = 16;
 
-    // Store overlays and the single label for updating
-    const overlays = [];
-    let label = null;
-    let labelWidth = 20;
-    let labelHeight = 16;
-    let cleanupFn = null;
+  /**
+   * Queues an element for highlighting and returns the index of the next element.
+   */
+  function highlightElement(element, index, parentIframe = null) {
+    if (element) pendingHighlights.push({ element, index, parentIframe });
+    return index + 1;
+  }
 
-    try {
-      // Create or get highlight container
-      let container = document.getElementById(HIGHLIGHT_CONTAINER_ID);
-      if (!container) {
-        container = document.createElement("div");
-        container.id = HIGHLIGHT_CONTAINER_ID;
-        container.style.position = "fixed";
-        container.style.pointerEvents = "none";
-        container.style.top = "0";
-        container.style.left = "0";
-        container.style.width = "100%";
-        container.style.height = "100%";
-        container.style.zIndex = "2147483640";
-        container.style.backgroundColor = 'transparent';
-        document.body.appendChild(container);
-      }
+  /**
+   * Read only: client rects of a queued element and the offset of its iframe.
+   * The first flush reuses the rects cached during the walk, repaints on scroll measure fresh ones.
+   */
+  function measureHighlight(item, useCache) {
+    const rects = useCache ? getCachedClientRects(item.element) : item.element.getClientRects();
+    const offset = { x: 0, y: 0 };
+    if (item.parentIframe) {
+      const iframeRect = useCache ? getCachedBoundingRect(item.parentIframe) : item.parentIframe.getBoundingClientRect();
+      offset.x = iframeRect.left;
+      offset.y = iframeRect.top;
+    }
+    return { rects: rects ? Array.from(rects) : [], offset };
+  }
 
-      // Get element client rects
-      const rects = element.getClientRects(); // Use getClientRects()
-
-      if (!rects || rects.length === 0) return index; // Exit if no rects
-
-      // Generate a color based on the index
-      const colors = [
-        "#FF0000",
-        "#00FF00",
-        "#0000FF",
-        "#FFA500",
-        "#800080",
-        "#008080",
-        "#FF69B4",
-        "#4B0082",
-        "#FF4500",
-        "#2E8B57",
-        "#DC143C",
-        "#4682B4",
-      ];
-      const colorIndex = index % colors.length;
-      const baseColor = colors[colorIndex];
-      const backgroundColor = baseColor + "1A"; // 10% opacity version of the color
-
-      // Get iframe offset if necessary
-      let iframeOffset = { x: 0, y: 0 };
-      if (parentIframe) {
-        const iframeRect = parentIframe.getBoundingClientRect(); // Keep getBoundingClientRect for iframe offset
-        iframeOffset.x = iframeRect.left;
-        iframeOffset.y = iframeRect.top;
+  /**
+   * Write only: positions the overlays and the label of one highlight from measured geometry.
+   */
+  function positionHighlight(entry, geometry, viewportWidth, viewportHeight) {
+    const { rects, offset } = geometry;
+
+    entry.overlays.forEach((overlay, i) => {
+      const rect = rects[i];
+      if (!rect || rect.width === 0 || rect.height === 0) {
+        overlay.style.display = 'none';
+        return;
       }
+      overlay.style.top = `${rect.top + offset.y}px`;
+      overlay.style.left = `${rect.left + offset.x}px`;
+      overlay.style.width = `${rect.width}px`;
+      overlay.style.height = `${rect.height}px`;
+      overlay.style.display = 'block';
+    });
 
-      // Create fragment to hold overlay elements
-      const fragment = document.createDocumentFragment();
+    if (rects.length === 0) {
+      entry.label.style.display = 'none';
+      return;
+    }
 
-      // Create highlight overlays for each client rect
-      for (const rect of rects) {
-        if (rect.width === 0 || rect.height === 0) continue; // Skip empty rects
+    const labelPosition = getLabelPosition(rects[0], offset, viewportWidth, viewportHeight);
+    entry.label.style.top = `${labelPosition.top}px`;
+    entry.label.style.left = `${labelPosition.left}px`;
+    entry.label.style.display = 'block';
+  }
 
-        const overlay = document.createElement("div");
-        overlay.style.position = "fixed";
-        overlay.style.border = `2px solid ${baseColor}`;
-        overlay.style.backgroundColor = backgroundColor;
-        overlay.style.pointerEvents = "none";
-        overlay.style.boxSizing = "border-box";
+  /**
+   * Label position relative to the first rect of a highlight, kept inside the viewport.
+   */
+  function getLabelPosition(firstRect, offset, viewportWidth, viewportHeight) {
+    const firstRectTop = firstRect.top + offset.y;
+    const firstRectLeft = firstRect.left + offset.x;
 
-        const top = rect.top + iframeOffset.y;
-        const left = rect.left + iframeOffset.x;
+    let labelTop = firstRectTop + 2;
+    let labelLeft = firstRectLeft + firstRect.width - LABEL_WIDTH - 2;
 
-        overlay.style.top = `${top}px`;
-        overlay.style.left = `${left}px`;
-        overlay.style.width = `${rect.width}px`;
-        overlay.style.height = `${rect.height}px`;
+    // Adjust label position if first rect is too small
+    if (firstRect.width < LABEL_WIDTH + 4 || firstRect.height < LABEL_HEIGHT + 4) {
+      labelTop = firstRectTop - LABEL_HEIGHT - 2;
+      labelLeft = firstRectLeft + firstRect.width - LABEL_WIDTH; // Align with right edge
+      if (labelLeft < offset.x) labelLeft = firstRectLeft; // Prevent going off-left
+    }
 
-        fragment.appendChild(overlay);
-        overlays.push({ element: overlay, initialRect: rect }); // Store overlay and its rect
-      }
+    return {
+      top: Math.max(0, Math.min(labelTop, viewportHeight - LABEL_HEIGHT)),
+      left: Math.max(0, Math.min(labelLeft, viewportWidth - LABEL_WIDTH)),
+    };
+  }
 
-      // Create and position a single label relative to the first rect
-      const firstRect = rects[0];
-      label = document.createElement("div");
-      label.className = "playwright-highlight-label";
-      label.style.position = "fixed";
-      label.style.background = baseColor;
-      label.style.color = "white";
-      label.style.padding = "1px 4px";
-      label.style.borderRadius = "4px";
-      label.style.fontSize = `${Math.min(12, Math.max(8, firstRect.height / 2))}px`;
-      label.textContent = index;
-
-      labelWidth = label.offsetWidth > 0 ? label.offsetWidth : labelWidth; // Update actual width if possible
-      labelHeight = label.offsetHeight > 0 ? label.offsetHeight : labelHeight; // Update actual height if possible
-
-      const firstRectTop = firstRect.top + iframeOffset.y;
-      const firstRectLeft = firstRect.left + iframeOffset.x;
-
-      let labelTop = firstRectTop + 2;
-      let labelLeft = firstRectLeft + firstRect.width - labelWidth - 2;
-
-      // Adjust label position if first rect is too small
-      if (firstRect.width < labelWidth + 4 || firstRect.height < labelHeight + 4) {
-        labelTop = firstRectTop - labelHeight - 2;
-        labelLeft = firstRectLeft + firstRect.width - labelWidth; // Align with right edge
-        if (labelLeft < iframeOffset.x) labelLeft = firstRectLeft; // Prevent going off-left
+  /**
+   * Canvas renderer: paints every box and label onto one fixed canvas instead of creating two divs per
+   * element. Installing and removing it is a single DOM operation, scrolling triggers at most one
+   * repaint per animation frame.
+   */
+  function drawHighlightCanvas(items, geometries) {
+    const canvas = document.createElement("canvas");
+    canvas.id = HIGHLIGHT_CONTAINER_ID;
+    canvas.style.position = "fixed";
+    canvas.style.pointerEvents = "none";
+    canvas.style.top = "0";
+    canvas.style.left = "0";
+    canvas.style.width = "100%";
+    canvas.style.height = "100%";
+    canvas.style.zIndex = "2147483640";
+    const context = canvas.getContext("2d");
+
+    const paint = (currentGeometries) => {
+      const ratio = window.devicePixelRatio || 1;
+      const viewportWidth = window.innerWidth;
+      const viewportHeight = window.innerHeight;
+      if (canvas.width !== Math.round(viewportWidth * ratio) || canvas.height !== Math.round(viewportHeight * ratio)) {
+        canvas.width = Math.round(viewportWidth * ratio);
+        canvas.height = Math.round(viewportHeight * ratio);
       }
+      context.setTransform(ratio, 0, 0, ratio, 0, 0);
+      context.clearRect(0, 0, viewportWidth, viewportHeight);
+      context.textBaseline = "top";
+
+      items.forEach((item, i) => {
+        const { rects, offset } = currentGeometries[i];
+        if (rects.length === 0) return;
+
+        const baseColor = HIGHLIGHT_COLORS[item.index % HIGHLIGHT_COLORS.length];
+        context.lineWidth = 2;
+        context.strokeStyle = baseColor;
+        context.fillStyle = baseColor + "1A"; // 10% opacity version of the color
+        for (const rect of rects) {
+          if (rect.width === 0 || rect.height === 0) continue;
+          const left = rect.left + offset.x;
+          const top = rect.top + offset.y;
+          context.fillRect(left, top, rect.width, rect.height);
+          // inset by half the line width to match the border-box divs of the dom renderer
+          context.strokeRect(left + 1, top + 1, rect.width - 2, rect.height - 2);
+        }
 
-      // Ensure label stays within viewport bounds slightly better
-      labelTop = Math.max(0, Math.min(labelTop, window.innerHeight - labelHeight));
-      labelLeft = Math.max(0, Math.min(labelLeft, window.innerWidth - labelWidth));
-
+        const label = getLabelPosition(rects[0], offset, viewportWidth, viewportHeight);
+        const text = String(item.index);
+        context.font = `${Math.min(12, Math.max(8, rects[0].height / 2))}px sans-serif`;
+        const labelWidth = Math.max(LABEL_WIDTH, context.measureText(text).width + 8);
+        context.fillStyle = baseColor;
+        context.beginPath();
+        if (context.roundRect) context.roundRect(label.left, label.top, labelWidth, LABEL_HEIGHT, 4);
+        else context.rect(label.left, label.top, labelWidth, LABEL_HEIGHT);
+        context.fill();
+        context.fillStyle = "white";
+        context.fillText(text, label.left + 4, label.top + 2);
+      });
+    };
 
-      label.style.top = `${labelTop}px`;
-      label.style.left = `${labelLeft}px`;
+    paint(geometries);
+    document.body.appendChild(canvas);
 
-      fragment.appendChild(label);
+    let scheduledFrame = null;
+    const scheduleRepaint = () => {
+      if (scheduledFrame !== null) return;
+      scheduledFrame = requestAnimationFrame(() => {
+        scheduledFrame = null;
+        paint(items.map(item => measureHighlight(item, false)));
+      });
+    };
+    window.addEventListener('scroll', scheduleRepaint, { capture: true, passive: true });
+    window.addEventListener('resize', scheduleRepaint, { passive: true });
+
+    (window._highlightCleanupFunctions = window._highlightCleanupFunctions || []).push(() => {
+      window.removeEventListener('scroll', scheduleRepaint, { capture: true });
+      window.removeEventListener('resize', scheduleRepaint);
+      if (scheduledFrame !== null) cancelAnimationFrame(scheduledFrame);
+      canvas.remove();
+    });
+  }
 
-      // Update positions on scroll/resize
-      const updatePositions = () => {
-        const newRects = element.getClientRects(); // Get fresh rects
-        let newIframeOffset = { x: 0, y: 0 };
+  /**
+   * Draws all queued highlights: measures everything first, then builds the overlays off-document
+   * and attaches them with one append. A single throttled listener repaints all of them on scroll/resize.
+   */
+  function flushHighlights() {
+    if (pendingHighlights.length === 0) return;
+    pushTiming('highlighting');
 
-        if (parentIframe) {
-          const iframeRect = parentIframe.getBoundingClientRect(); // Keep getBoundingClientRect for iframe
-          newIframeOffset.x = iframeRect.left;
-          newIframeOffset.y = iframeRect.top;
-        }
+    try {
+      // listeners and overlays of the previous call are stale now
+      cleanupHighlights();
+
+      // Read phase
+      const geometries = pendingHighlights.map(item => measureHighlight(item, true));
+      const viewportWidth = window.innerWidth;
+      const viewportHeight = window.innerHeight;
+
+      // Write phase
+      if (highlightRenderer === 'canvas') {
+        drawHighlightCanvas([...pendingHighlights], geometries);
+        return;
+      }
 
-        // Update each overlay
-        overlays.forEach((overlayData, i) => {
-          if (i < newRects.length) { // Check if rect still exists
-            const newRect = newRects[i];
-            const newTop = newRect.top + newIframeOffset.y;
-            const newLeft = newRect.left + newIframeOffset.x;
-
-            overlayData.element.style.top = `${newTop}px`;
-            overlayData.element.style.left = `${newLeft}px`;
-            overlayData.element.style.width = `${newRect.width}px`;
-            overlayData.element.style.height = `${newRect.height}px`;
-            overlayData.element.style.display = (newRect.width === 0 || newRect.height === 0) ? 'none' : 'block';
-          } else {
-            // If fewer rects now, hide extra overlays
-            overlayData.element.style.display = 'none';
-          }
+      const container = document.createElement("div");
+      container.id = HIGHLIGHT_CONTAINER_ID;
+      container.style.position = "fixed";
+      container.style.pointerEvents = "none";
+      container.style.top = "0";
+      container.style.left = "0";
+      container.style.width = "100%";
+      container.style.height = "100%";
+      container.style.zIndex = "2147483640";
+      container.style.backgroundColor = 'transparent';
+
+      const entries = [];
+      pendingHighlights.forEach((item, i) => {
+        const geometry = geometries[i];
+        if (geometry.rects.length === 0) return;
+
+        const baseColor = HIGHLIGHT_COLORS[item.index % HIGHLIGHT_COLORS.length];
+        const backgroundColor = baseColor + "1A"; // 10% opacity version of the color
+
+        const overlays = geometry.rects.map(() => {
+          const overlay = document.createElement("div");
+          overlay.style.position = "fixed";
+          overlay.style.border = `2px solid ${baseColor}`;
+          overlay.style.backgroundColor = backgroundColor;
+          overlay.style.pointerEvents = "none";
+          overlay.style.boxSizing = "border-box";
+          container.appendChild(overlay);
+          return overlay;
         });
 
-        // If there are fewer new rects than overlays, hide the extras
-        if (newRects.length < overlays.length) {
-          for (let i = newRects.length; i < overlays.length; i++) {
-            overlays[i].element.style.display = 'none';
-          }
-        }
-
-        // Update label position based on the first new rect
-        if (label && newRects.length > 0) {
-          const firstNewRect = newRects[0];
-          const firstNewRectTop = firstNewRect.top + newIframeOffset.y;
-          const firstNewRectLeft = firstNewRect.left + newIframeOffset.x;
-
-          let newLabelTop = firstNewRectTop + 2;
-          let newLabelLeft = firstNewRectLeft + firstNewRect.width - labelWidth - 2;
-
-          if (firstNewRect.width < labelWidth + 4 || firstNewRect.height < labelHeight + 4) {
-            newLabelTop = firstNewRectTop - labelHeight - 2;
-            newLabelLeft = firstNewRectLeft + firstNewRect.width - labelWidth;
-            if (newLabelLeft < newIframeOffset.x) newLabelLeft = firstNewRectLeft;
-          }
-
-          // Ensure label stays within viewport bounds
-          newLabelTop = Math.max(0, Math.min(newLabelTop, window.innerHeight - labelHeight));
-          newLabelLeft = Math.max(0, Math.min(newLabelLeft, window.innerWidth - labelWidth));
+        const label = document.createElement("div");
+        label.className = "playwright-highlight-label";
+        label.style.position = "fixed";
+        label.style.background = baseColor;
+        label.style.color = "white";
+        label.style.padding = "1px 4px";
+        label.style.borderRadius = "4px";
+        label.style.fontSize = `${Math.min(12, Math.max(8, geometry.rects[0].height / 2))}px`;
+        label.textContent = item.index;
+        container.appendChild(label);
+
+        const entry = { item, overlays, label };
+        positionHighlight(entry, geometry, viewportWidth, viewportHeight);
+        entries.push(entry);
+      });
 
-          label.style.top = `${newLabelTop}px`;
-          label.style.left = `${newLabelLeft}px`;
-          label.style.display = 'block';
-        } else if (label) {
-          // Hide label if element has no rects anymore
-          label.style.display = 'none';
-        }
-      };
+      document.body.appendChild(container);
 
-      const throttleFunction = (func, delay) => {
-        let lastCall = 0;
-        return (...args) => {
-          const now = performance.now();
-          if (now - lastCall < delay) return;
-          lastCall = now;
-          return func(...args);
-        };
-      };
+      let lastUpdate = 0;
+      const updatePositions = () => {
+        const now = performance.now();
+        if (now - lastUpdate < 16) return; // ~60fps
+        lastUpdate = now;
 
-      const throttledUpdatePositions = throttleFunction(updatePositions, 16); // ~60fps
-      window.addEventListener('scroll', throttledUpdatePositions, true);
-      window.addEventListener('resize', throttledUpdatePositions);
-      
-      // Add cleanup function
-      cleanupFn = () => {
-        window.removeEventListener('scroll', throttledUpdatePositions, true);
-        window.removeEventListener('resize', throttledUpdatePositions);
-        // Remove overlay elements if needed
-        overlays.forEach(overlay => overlay.element.remove());
-        if (label) label.remove();
+        const fresh = entries.map(entry => measureHighlight(entry.item, false));
+        entries.forEach((entry, i) => positionHighlight(entry, fresh[i], window.innerWidth, window.innerHeight));
       };
-      
-      // Then add fragment to container in one operation
-      container.appendChild(fragment);
-      
-      return index + 1;
+      window.addEventListener('scroll', updatePositions, true);
+      window.addEventListener('resize', updatePositions);
+
+      // Keep a reference to the cleanup function in a global array
+      (window._highlightCleanupFunctions = window._highlightCleanupFunctions || []).push(() => {
+        window.removeEventListener('scroll', updatePositions, true);
+        window.removeEventListener('resize', updatePositions);
+        container.remove();
+      });
     } finally {
-      popTiming('highlighting');
-      // Store cleanup function for later use
-      if (cleanupFn) {
-        // Keep a reference to cleanup functions in a global array
-        (window._highlightCleanupFunctions = window._highlightCleanupFunctions || []).push(cleanupFn);
-      }
+      pendingHighlights.length = 0;
+      const duration = popTiming('highlighting');
+      if (debugMode && PERF_METRICS) PERF_METRICS.phases.highlightPass += duration;
     }
   }
 
@@ -645,7 +762,7 @@
    * 
    * One of the things we tried at the beginning was also to use event listeners, and other fancy class, style stuff -> what actually worked best was just combining most things with computed cursor style :)
    */
-  function isInteractiveElement(element,debugNode=false) {
+  function isInteractiveElement(element) {
     
     if (!element || element.nodeType !== Node_ELEMENT_NODE) {
       return false;
@@ -1161,10 +1278,7 @@
   /**
    * Handles the logic for deciding whether to highlight an element and performing the highlight.
    */
-  function handleHighlighting(nodeData, node, parentIframe, isParentHighlighted,debugNode=false) {
-    if(debugNode){
-      console.log("nodeData.isInteractive:", nodeData.isInteractive);
-    }
+  function handleHighlighting(nodeData, node, parentIframe, isParentHighlighted) {
     if (!nodeData.isInteractive) return false; // Not interactive, definitely don't highlight
 
     let shouldHighlight = false;
@@ -1189,6 +1303,7 @@
       // regardless of viewport status
       if (nodeData.isInViewport || viewportExpansion === -1) {
         nodeData.highlightIndex = highlightIndex++;
+        if (tracker) tracker.elements.set(nodeData.highlightIndex, node);
 
         if (doHighlightElements) {
           if (focusHighlightIndex >= 0) {
@@ -1214,12 +1329,6 @@
   function buildDomTree(node, parentIframe = null, isParentHighlighted = false) {
     // Fast rejection checks first
 
-    var debugNode = false
-    if ((node.tagName == "div" || node.tagName == "DIV") && (node.textContent == "协同邮箱" || node.textContent == "写邮件")) {
-      console.log("buildDomTree debugNode node:", node.tagName, node.nodeType,node.textContent,node);
-      debugNode = true
-    }
-    
     if (!node || node.id === HIGHLIGHT_CONTAINER_ID || 
         (node.nodeType !== Node_ELEMENT_NODE && node.nodeType !== Node_TEXT_NODE)) {
       if (debugMode) PERF_METRICS.nodeMetrics.skippedNodes++;
@@ -1338,10 +1447,11 @@
       nodeData.isVisible = isElementVisible(node); // isElementVisible uses offsetWidth/Height, which is fine
       if (nodeData.isVisible) {
         nodeData.isTopElement = isTopElement(node);
+        if (tracker && !nodeData.isTopElement && isInteractiveCandidate(node)) tracker.covered.add(node);
         if (nodeData.isTopElement) {
           nodeData.isInteractive = isInteractiveElement(node);
           // Call the dedicated highlighting function
-          nodeWasHighlighted = handleHighlighting(nodeData, node, parentIframe, isParentHighlighted,debugNode);
+          nodeWasHighlighted = handleHighlighting(nodeData, node, parentIframe, isParentHighlighted);
         }
       }
     }
@@ -1355,6 +1465,7 @@
         try {
           const iframeDoc = node.contentDocument || node.contentWindow?.document;
           if (iframeDoc) {
+            if (tracker) tracker.hasFrames = true;
             for (const child of iframeDoc.childNodes) {
               const domElement = buildDomTree(child, node, false);
               if (domElement) nodeData.children.push(domElement);
@@ -1419,7 +1530,98 @@
   isTextNodeVisible = measureTime(isTextNodeVisible);
   getEffectiveScroll = measureTime(getEffectiveScroll);
 
-  const rootId = buildDomTree(document.body);
+  /**
+   * Re-walks only the subtrees that changed since the previous call.
+   * Returns null when the changes cannot be expressed as subtree patches and a full walk is needed.
+   */
+  function buildIncrementalPatches() {
+    tracker.processRecords(tracker.observer.takeRecords());
+    if (tracker.layoutDirty || tracker.hasFrames) return null;
+
+    const dirty = [...tracker.dirty].filter(el => el.isConnected);
+    if (dirty.length > maxIncrementalRoots) return null;
+
+    // keep only the outermost dirty elements, their descendants are re-walked with them
+    const roots = dirty.filter(el => !dirty.some(other => other !== el && other.contains(el)));
+    for (const root of roots) {
+      // only light-DOM elements below <body> of the main document can be located by xpath in the cached tree
+      if (root === document.body || !document.body.contains(root) || root.getRootNode() !== document) return null;
+    }
+
+    // an overlay or modal that opens or closes changes which unchanged elements are on top, their cached
+    // flags are only kept if they still hold, otherwise the whole tree is walked again
+    const isUnchanged = (element) => element.isConnected && !roots.some(root => root.contains(element));
+    for (const element of tracker.elements.values()) {
+      if (isUnchanged(element) && !(isTopElement(element) && isInExpandedViewport(element, viewportExpansion))) return null;
+    }
+    for (const element of tracker.covered) {
+      if (!isUnchanged(element)) {
+        tracker.covered.delete(element);
+      } else if (isElementVisible(element) && isTopElement(element)) {
+        return null;
+      }
+    }
+
+    const highlighted = new Set();
+    for (const [index, element] of tracker.elements) {
+      if (roots.some(root => root.contains(element))) {
+        tracker.elements.delete(index);
+      } else {
+        highlighted.add(element);
+      }
+    }
+
+    highlightIndex = args.startHighlightIndex || 0;
+    const patches = [];
+    for (const root of roots) {
+      let isParentHighlighted = false;
+      for (let current = root.parentElement; current; current = current.parentElement) {
+        if (highlighted.has(current)) {
+          isParentHighlighted = true;
+          break;
+        }
+      }
+      patches.push({
+        xpath: getXPathTree(root, true),
+        rootId: buildDomTree(root, null, isParentHighlighted),
+      });
+    }
+
+    // overlays were removed before this call, restore them for the elements that did not change
+    if (doHighlightElements) {
+      for (const [index, element] of tracker.elements) {
+        if (!element.isConnected || roots.some(root => root.contains(element))) continue;
+        if (focusHighlightIndex >= 0 && focusHighlightIndex !== index) continue;
+        highlightElement(element, index, null);
+      }
+    }
+
+    return patches;
+  }
+
+  const readPassStart = performance.now();
+  let rootId = null;
+  let patches = null;
+  if (tracker && args.incremental) {
+    patches = buildIncrementalPatches();
+  }
+  if (patches === null) {
+    if (tracker) {
+      tracker.processRecords(tracker.observer.takeRecords());
+      tracker.elements.clear();
+      tracker.covered.clear();
+      tracker.hasFrames = false;
+    }
+    rootId = buildDomTree(document.body);
+  }
+  if (tracker) {
+    tracker.dirty.clear();
+    tracker.layoutDirty = false;
+  }
+  if (debugMode && PERF_METRICS) PERF_METRICS.phases.readPass = performance.now() - readPassStart;
+
+  // the write phase runs after all reads and still uses the rects cached by the walk
+  if (doHighlightElements) flushHighlights();
 
   // Clear the cache before starting
   DOM_CACHE.clearCache();
@@ -1431,6 +1633,10 @@
       PERF_METRICS.timings[key] = PERF_METRICS.timings[key] / 1000;
     });
 
+    Object.keys(PERF_METRICS.phases).forEach(key => {
+      PERF_METRICS.phases[key] = PERF_METRICS.phases[key] / 1000;
+    });
+
     Object.keys(PERF_METRICS.buildDomTreeBreakdown).forEach(key => {
       if (typeof PERF_METRICS.buildDomTreeBreakdown[key] === 'number') {
         PERF_METRICS.buildDomTreeBreakdown[key] = PERF_METRICS.buildDomTreeBreakdown[key] / 1000;
@@ -1474,7 +1680,86 @@
     }
   }
 
-  return debugMode ?
-    { rootId, map: DOM_HASH_MAP, perfMetrics: PERF_METRICS } :
-    { rootId, map: DOM_HASH_MAP };
+  /**
+   * Encodes DOM_HASH_MAP as parallel arrays indexed by node id.
+   *
+   * Node ids are dense (0..ID.current-1), so a node's position in every column is its id.
+   * Tag names and attribute keys go through a shared string table, attributes and children
+   * are flattened into one array each and addressed through offsets (node i owns the range
+   * offsets[i]..offsets[i + 1]). Text nodes have tag -1 and store their text in `values`,
+   * elements store their xpath there.
+   */
+  function encodeColumnar(rootId) {
+    const strings = [];
+    const stringIndex = new Map();
+    const intern = (value) => {
+      let index = stringIndex.get(value);
+      if (index === undefined) {
+        index = strings.length;
+        strings.push(value);
+        stringIndex.set(value, index);
+      }
+      return index;
+    };
+
+    const count = ID.current;
+    const tags = new Array(count);
+    const values = new Array(count);
+    const flags = new Array(count);
+    const highlightIndices = new Array(count);
+    const attributeOffsets = [0];
+    const attributeKeys = [];
+    const attributeValues = [];
+    const childOffsets = [0];
+    const children = [];
+
+    for (let i = 0; i < count; i++) {
+      const node = DOM_HASH_MAP[i];
+      if (node.type === "TEXT_NODE") {
+        tags[i] = -1;
+        values[i] = node.text;
+        flags[i] = node.isVisible ? 1 : 0;
+        highlightIndices[i] = -1;
+      } else {
+        tags[i] = intern(node.tagName);
+        values[i] = node.xpath;
+        flags[i] =
+          (node.isVisible ? 1 : 0) |
+          (node.isInteractive ? 2 : 0) |
+          (node.isTopElement ? 4 : 0) |
+          (node.isInViewport ? 8 : 0) |
+          (node.shadowRoot ? 16 : 0);
+        highlightIndices[i] = node.highlightIndex ?? -1;
+        for (const name in node.attributes) {
+          attributeKeys.push(intern(name));
+          attributeValues.push(node.attributes[name]);
+        }
+        for (const childId of node.children) {
+          children.push(+childId);
+        }
+      }
+      attributeOffsets.push(attributeKeys.length);
+      childOffsets.push(children.length);
+    }
+
+    return {
+      format: "columnar",
+      rootId: rootId === null ? null : +rootId,
+      strings,
+      tags,
+      values,
+      flags,
+      highlightIndices,
+      attributeOffsets,
+      attributeKeys,
+      attributeValues,
+      childOffsets,
+      children,
+    };
+  }
+
+  const result = args.compactOutput ? encodeColumnar(rootId) : { rootId, map: DOM_HASH_MAP };
+  if (patches !== null) result.patches = patches;
+  if (debugMode) result.perfMetrics = PERF_METRICS;
+  return result;
 };
@@ -0,0 +1,105 @@
+from collections import defaultdict
+
+from browser_use.dom.diff_processor.view import DOMElementChange, DOMStateDiff
+from browser_use.dom.views import DOMElementNode, DOMState
+
+
+class DOMDiffProcessor:
+	"""
+	Structural diff of the interactive elements of two DOM states
+
+	Elements are matched in three rounds, each only over the elements left unmatched by the previous one:
+	identical element hash, then same tag and xpath (changed), then same tag, parents and attributes (moved).
+	"""
+
+	@staticmethod
+	def diff(previous: DOMState | None, current: DOMState) -> DOMStateDiff:
+		result = DOMStateDiff()
+		current_elements = DOMDiffProcessor._interactive_elements(current)
+		if previous is None:
+			result.added = {element.hash: element for element in current_elements}
+			return result
+		previous_elements = DOMDiffProcessor._interactive_elements(previous)
+
+		# 1. identical hash, the element only moved if its highlight index changed
+		unmatched_previous = DOMDiffProcessor._group(previous_elements, lambda element: element.hash)
+		unmatched_current = []
+		for element in current_elements:
+			candidates = unmatched_previous.get(element.hash)
+			if not candidates:
+				unmatched_current.append(element)
+				continue
+			previous_element = candidates.pop(0)
+			result.counterparts[id(previous_element)] = element
+			if previous_element.highlight_index != element.highlight_index:
+				result.moved[element.hash] = DOMElementChange(previous_element, element)
+
+		# 2. same position, different attributes
+		unmatched_current = DOMDiffProcessor._match(
+			unmatched_previous,
+			unmatched_current,
+			DOMDiffProcessor._position_key,
+			result,
+			result.changed,
+		)
+
+		# 3. same element at another position, only for elements with attributes to tell them apart
+		unmatched_current = DOMDiffProcessor._match(
+			unmatched_previous,
+			unmatched_current,
+			DOMDiffProcessor._identity_key,
+			result,
+			result.moved,
+		)
+
+		result.added = {element.hash: element for element in unmatched_current}
+		result.removed = {element.hash: element for candidates in unmatched_previous.values() for element in candidates}
+		return result
+
+	@staticmethod
+	def _interactive_elements(state: DOMState) -> list[DOMElementNode]:
+		# hashes the whole tree once, DOMElementNode.hash is a cached lookup afterwards
+		state.element_hashes
+		return [state.selector_map[index] for index in sorted(state.selector_map)]
+
+	@staticmethod
+	def _position_key(element: DOMElementNode) -> tuple:
+		return element.tag_name, element.xpath
+
+	@staticmethod
+	def _identity_key(element: DOMElementNode) -> tuple | None:
+		if not element.attributes:
+			return None
+		return element.tag_name, element.hash.branch_path_hash, element.hash.attributes_hash
+
+	@staticmethod
+	def _group(elements: list[DOMElementNode], key) -> dict:
+		groups = defaultdict(list)
+		for element in elements:
+			groups[key(element)].append(element)
+		return groups
+
+	@staticmethod
+	def _match(
+		unmatched_previous: dict,
+		unmatched_current: list[DOMElementNode],
+		key,
+		result: DOMStateDiff,
+		changes: dict,
+	) -> list[DOMElementNode]:
+		"""Pair the left over elements by key, record the pairs in changes and return the current elements still unmatched"""
+		previous_by_key = DOMDiffProcessor._group(
+			[element for candidates in unmatched_previous.values() for element in candidates], key
+		)
+		still_unmatched = []
+		for element in unmatched_current:
+			element_key = key(element)
+			candidates = previous_by_key.get(element_key) if element_key is not None else None
+			if not candidates:
+				still_unmatched.append(element)
+				continue
+			previous_element = candidates.pop(0)
+			unmatched_previous[previous_element.hash].remove(previous_element)
+			result.counterparts[id(previous_element)] = element
+			changes[element.hash] = DOMElementChange(previous_element, element)
+		return still_unmatched
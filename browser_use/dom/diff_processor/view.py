@@ -0,0 +1,63 @@
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from browser_use.dom.history_tree_processor.view import HashedDomElement
+
+if TYPE_CHECKING:
+	from browser_use.dom.views import DOMElementNode
+
+
+@dataclass
+class DOMElementChange:
+	"""
+	The same interactive element in the previous and in the current state
+	"""
+
+	previous: 'DOMElementNode'
+	current: 'DOMElementNode'
+
+
+@dataclass
+class DOMStateDiff:
+	"""
+	Interactive elements that differ between two DOM states, see DOMDiffProcessor.diff
+
+	Removed elements are keyed by their hash in the previous state, all others by their hash in the current state.
+	"""
+
+	# no counterpart in the previous state
+	added: dict[HashedDomElement, 'DOMElementNode'] = field(default_factory=dict)
+	# no counterpart in the current state
+	removed: dict[HashedDomElement, 'DOMElementNode'] = field(default_factory=dict)
+	# same element at another highlight index or xpath
+	moved: dict[HashedDomElement, DOMElementChange] = field(default_factory=dict)
+	# same tag and xpath, different attributes or parents
+	changed: dict[HashedDomElement, DOMElementChange] = field(default_factory=dict)
+	# id() of every matched previous element -> its counterpart in the current state
+	counterparts: dict[int, 'DOMElementNode'] = field(default_factory=dict, repr=False)
+
+	@property
+	def has_changes(self) -> bool:
+		return bool(self.added or self.removed or self.moved or self.changed)
+
+	def get_counterpart(self, previous_element: 'DOMElementNode') -> 'DOMElementNode | None':
+		"""Element of the current state that previous_element became, None if it was removed"""
+		return self.counterparts.get(id(previous_element))
+
+	def is_new(self, element: 'DOMElementNode') -> bool:
+		"""Whether the LLM has not seen this element of the current state in this form before"""
+		return element.hash in self.added or element.hash in self.changed
+
+	def to_string(self) -> str:
+		"""Compact summary of the changes, one line per element"""
+		lines = [f'+[{element.highlight_index}]<{element.tag_name}>' for element in self.added.values()]
+		lines += [f'-[{element.highlight_index}]<{element.tag_name}>' for element in self.removed.values()]
+		lines += [
+			f'~[{change.current.highlight_index}]<{change.current.tag_name}> attributes changed'
+			for change in self.changed.values()
+		]
+		lines += [
+			f'>[{change.previous.highlight_index}]->[{change.current.highlight_index}]<{change.current.tag_name}>'
+			for change in self.moved.values()
+		]
+		return '\n'.join(lines)
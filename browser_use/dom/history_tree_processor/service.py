@@ -1,7 +1,13 @@
 import hashlib
+from difflib import SequenceMatcher
 
-from browser_use.dom.history_tree_processor.view import DOMHistoryElement, HashedDomElement
-from browser_use.dom.views import DOMElementNode
+from browser_use.dom.history_tree_processor.view import DOMHistoryElement, ElementHashIndex, HashedDomElement
+from browser_use.dom.views import DOMElementNode, SelectorMap
+
+# weighted similarity a candidate needs to replace a history element whose exact hash is gone
+SIMILAR_ELEMENT_MIN_SCORE = 0.7
+# lead the best candidate needs over the second best, repeated elements (e.g. one button per table row) are ambiguous
+SIMILAR_ELEMENT_MIN_MARGIN = 0.1
 
 
 class HistoryTreeProcessor:
@@ -28,32 +34,74 @@ class HistoryTreeProcessor:
 			page_coordinates=dom_element.page_coordinates,
 			viewport_coordinates=dom_element.viewport_coordinates,
 			viewport_info=dom_element.viewport_info,
+			text=dom_element.get_all_text_till_next_clickable_element(),
 		)
 
 	@staticmethod
-	def find_history_element_in_tree(dom_history_element: DOMHistoryElement, tree: DOMElementNode) -> DOMElementNode | None:
-		hashed_dom_history_element = HistoryTreeProcessor._hash_dom_history_element(dom_history_element)
-
-		def process_node(node: DOMElementNode):
-			if node.highlight_index is not None:
-				hashed_node = HistoryTreeProcessor._hash_dom_element(node)
-				if hashed_node == hashed_dom_history_element:
-					return node
-			for child in node.children:
-				if isinstance(child, DOMElementNode):
-					result = process_node(child)
-					if result is not None:
-						return result
+	def find_history_element_in_tree(
+		dom_history_element: DOMHistoryElement, tree: DOMElementNode, element_hashes: ElementHashIndex | None = None
+	) -> DOMElementNode | None:
+		"""
+		Highlighted element of the tree with the same hash as the history element.
+
+		Pass the element_hashes of the tree (DOMState.element_hashes) to look up several elements in the same tree,
+		otherwise the index is built for this call.
+		"""
+		if element_hashes is None:
+			element_hashes = HistoryTreeProcessor.build_element_hash_index(tree)
+
+		dom_element = element_hashes.get(HistoryTreeProcessor._hash_dom_history_element(dom_history_element))
+		if dom_element is None or dom_element.highlight_index is None:
 			return None
+		return dom_element
 
-		return process_node(tree)
+	@staticmethod
+	def find_similar_element(
+		dom_history_element: DOMHistoryElement,
+		selector_map: SelectorMap,
+		min_score: float = SIMILAR_ELEMENT_MIN_SCORE,
+		min_margin: float = SIMILAR_ELEMENT_MIN_MARGIN,
+	) -> DOMElementNode | None:
+		"""
+		Best matching highlighted element with the same tag, for when the exact hash is not in the tree anymore.
+
+		Candidates are ranked by xpath similarity, attribute overlap and, if the history element has one, text
+		similarity. Missing attributes or text are no evidence and score 0. Returns None if no candidate reaches
+		min_score, or if the runner-up is within min_margin of it, as replaying an action on a guess can be destructive.
+		"""
+		history_xpath = dom_history_element.xpath.split('/')
+		history_attributes = set(dom_history_element.attributes.items())
+
+		best_element, best_score, second_score = None, 0.0, 0.0
+		for dom_element in selector_map.values():
+			if dom_element.tag_name != dom_history_element.tag_name:
+				continue
+
+			xpath_score = SequenceMatcher(None, history_xpath, dom_element.xpath.split('/'), autojunk=False).ratio()
+			attributes = set(dom_element.attributes.items())
+			union = history_attributes | attributes
+			attributes_score = len(history_attributes & attributes) / len(union) if union else 0.0
+
+			if not dom_history_element.text:
+				score = 0.5 * xpath_score + 0.5 * attributes_score
+			else:
+				text = dom_element.get_all_text_till_next_clickable_element()
+				text_score = SequenceMatcher(None, dom_history_element.text, text).ratio() if text else 0.0
+				score = 0.4 * xpath_score + 0.3 * attributes_score + 0.3 * text_score
+
+			if score > best_score:
+				best_element, best_score, second_score = dom_element, score, best_score
+			elif score > second_score:
+				second_score = score
+
+		if best_score < min_score or best_score - second_score < min_margin:
+			return None
+		return best_element
 
 	@staticmethod
 	def compare_history_element_and_dom_element(dom_history_element: DOMHistoryElement, dom_element: DOMElementNode) -> bool:
 		hashed_dom_history_element = HistoryTreeProcessor._hash_dom_history_element(dom_history_element)
-		hashed_dom_element = HistoryTreeProcessor._hash_dom_element(dom_element)
-
-		return hashed_dom_history_element == hashed_dom_element
+		return hashed_dom_history_element == dom_element.hash
 
 	@staticmethod
 	def _hash_dom_history_element(dom_history_element: DOMHistoryElement) -> HashedDomElement:
@@ -67,12 +115,38 @@ class HistoryTreeProcessor:
 	def _hash_dom_element(dom_element: DOMElementNode) -> HashedDomElement:
 		parent_branch_path = HistoryTreeProcessor._get_parent_branch_path(dom_element)
 		branch_path_hash = HistoryTreeProcessor._parent_branch_path_hash(parent_branch_path)
+		return HistoryTreeProcessor._hash_with_branch_path(dom_element, branch_path_hash)
+
+	@staticmethod
+	def _hash_with_branch_path(dom_element: DOMElementNode, branch_path_hash: str) -> HashedDomElement:
 		attributes_hash = HistoryTreeProcessor._attributes_hash(dom_element.attributes)
 		xpath_hash = HistoryTreeProcessor._xpath_hash(dom_element.xpath)
 		# text_hash = DomTreeProcessor._text_hash(dom_element)
 
 		return HashedDomElement(branch_path_hash, attributes_hash, xpath_hash)
 
+	@staticmethod
+	def build_element_hash_index(tree: DOMElementNode) -> ElementHashIndex:
+		"""
+		Hash every element of the tree in one top-down pass and cache it on the element (DOMElementNode.hash).
+
+		The branch path hash of an element is derived from its parent's, so no element walks back to the root.
+		"""
+		index = ElementHashIndex()
+		root_branch_path_hash = HistoryTreeProcessor._parent_branch_path_hash(HistoryTreeProcessor._get_parent_branch_path(tree))
+		stack: list[tuple[DOMElementNode, str]] = [(tree, root_branch_path_hash)]
+		while stack:
+			node, branch_path_hash = stack.pop()
+			hashed = HistoryTreeProcessor._hash_with_branch_path(node, branch_path_hash)
+			node._hash = hashed
+			index.add(node, hashed)
+
+			for child in reversed(node.children):
+				if isinstance(child, DOMElementNode):
+					stack.append((child, HistoryTreeProcessor._extend_branch_path_hash(branch_path_hash, child.tag_name)))
+
+		return index
+
 	@staticmethod
 	def _get_parent_branch_path(dom_element: DOMElementNode) -> list[str]:
 		parents: list[DOMElementNode] = []
@@ -87,20 +161,34 @@ class HistoryTreeProcessor:
 
 	@staticmethod
 	def _parent_branch_path_hash(parent_branch_path: list[str]) -> str:
-		parent_branch_path_string = '/'.join(parent_branch_path)
-		return hashlib.sha256(parent_branch_path_string.encode()).hexdigest()
+		branch_path_hash = HistoryTreeProcessor._hash_string('')
+		for tag_name in parent_branch_path:
+			branch_path_hash = HistoryTreeProcessor._extend_branch_path_hash(branch_path_hash, tag_name)
+		return branch_path_hash
+
+	@staticmethod
+	def _extend_branch_path_hash(parent_branch_path_hash: str, tag_name: str) -> str:
+		return HistoryTreeProcessor._hash_string(f'{parent_branch_path_hash}/{tag_name}')
 
 	@staticmethod
 	def _attributes_hash(attributes: dict[str, str]) -> str:
 		attributes_string = ''.join(f'{key}={value}' for key, value in attributes.items())
-		return hashlib.sha256(attributes_string.encode()).hexdigest()
+		return HistoryTreeProcessor._hash_string(attributes_string)
 
 	@staticmethod
 	def _xpath_hash(xpath: str) -> str:
-		return hashlib.sha256(xpath.encode()).hexdigest()
+		return HistoryTreeProcessor._hash_string(xpath)
+
+	@staticmethod
+	def _hash_string(string: str) -> str:
+		"""
+		Short digest used to compare elements within a run, not for security. blake2b with an 8 byte digest is the
+		fastest hash in the standard library, for strings this short the call overhead dominates anyway.
+		"""
+		return hashlib.blake2b(string.encode(), digest_size=8).hexdigest()
 
 	@staticmethod
 	def _text_hash(dom_element: DOMElementNode) -> str:
 		""" """
 		text_string = dom_element.get_all_text_till_next_clickable_element()
-		return hashlib.sha256(text_string.encode()).hexdigest()
+		return HistoryTreeProcessor._hash_string(text_string)
@@ -1,9 +1,13 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
 from pydantic import BaseModel
 
+if TYPE_CHECKING:
+	from browser_use.dom.views import DOMElementNode
 
-@dataclass
+
+@dataclass(frozen=True)
 class HashedDomElement:
 	"""
 	Hash of the dom element to be used as a unique identifier
@@ -15,6 +19,30 @@ class HashedDomElement:
 	# text_hash: str
 
 
+@dataclass
+class ElementHashIndex:
+	"""
+	Hashes of all elements of a DOM tree, see HistoryTreeProcessor.build_element_hash_index
+	"""
+
+	elements: dict[HashedDomElement, 'DOMElementNode'] = field(default_factory=dict)
+
+	def add(self, dom_element: 'DOMElementNode', hashed: HashedDomElement) -> None:
+		# identical hashes keep the first element in document order, preferring highlighted ones like a tree search would
+		existing = self.elements.get(hashed)
+		if existing is None or (existing.highlight_index is None and dom_element.highlight_index is not None):
+			self.elements[hashed] = dom_element
+
+	def get(self, hashed: HashedDomElement) -> 'DOMElementNode | None':
+		return self.elements.get(hashed)
+
+	def __contains__(self, hashed: HashedDomElement) -> bool:
+		return hashed in self.elements
+
+	def __len__(self) -> int:
+		return len(self.elements)
+
+
 class Coordinates(BaseModel):
 	x: int
 	y: int
@@ -49,6 +77,8 @@ class DOMHistoryElement:
 	page_coordinates: CoordinateSet | None = None
 	viewport_coordinates: CoordinateSet | None = None
 	viewport_info: ViewportInfo | None = None
+	# text of the element, used to rank candidates when the exact hash is not found while replaying
+	text: str | None = None
 
 	def to_dict(self) -> dict:
 		page_coordinates = self.page_coordinates.model_dump() if self.page_coordinates else None
@@ -66,4 +96,5 @@ class DOMHistoryElement:
 			'page_coordinates': page_coordinates,
 			'viewport_coordinates': viewport_coordinates,
 			'viewport_info': viewport_info,
+			'text': self.text,
 		}
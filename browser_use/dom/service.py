@@ -1,19 +1,32 @@
+import asyncio
 import json
 import logging
+import sys
 from dataclasses import dataclass
+from functools import cache
 from importlib import resources
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Literal
 from urllib.parse import urlparse
 
 if TYPE_CHECKING:
-	from playwright.async_api import Page
+	from playwright.async_api import Frame, Page
 
+from browser_use.dom.ax_tree_processor.service import AXTreeProcessor
+from browser_use.dom.snapshot_processor.service import SNAPSHOT_COMPUTED_STYLES, SnapshotTreeProcessor, SnapshotViewport
 from browser_use.dom.views import (
+	EMPTY_ATTRIBUTES,
+	EMPTY_CHILDREN,
+	FLAG_IN_VIEWPORT,
+	FLAG_INTERACTIVE,
+	FLAG_SHADOW_ROOT,
+	FLAG_TOP_ELEMENT,
+	FLAG_VISIBLE,
 	DOMBaseNode,
 	DOMElementNode,
 	DOMState,
 	DOMTextNode,
 	SelectorMap,
+	intern_attributes,
 )
 from browser_use.utils import time_execution_async
 
@@ -26,12 +39,150 @@ class ViewportInfo:
 	height: int
 
 
+DomBackend = Literal['js', 'cdp_snapshot', 'ax_tree']
+HighlightRenderer = Literal['dom', 'canvas']
+
+# buildDomTree.js is registered on window once per document and afterwards invoked by name with only the args
+BUILD_DOM_TREE_FUNCTION = 'window._browserUseBuildDomTree'
+INVOKE_BUILD_DOM_TREE_JS = f"(args) => typeof {BUILD_DOM_TREE_FUNCTION} === 'function' ? {BUILD_DOM_TREE_FUNCTION}(args) : null"
+
+
+@cache
+def _load_build_dom_tree_js() -> str:
+	"""Source of buildDomTree.js, read from the package resources once per process"""
+	return resources.files('browser_use.dom').joinpath('buildDomTree.js').read_text().strip().rstrip(';')
+
+
+@cache
+def _register_build_dom_tree_js() -> str:
+	"""Registers buildDomTree.js in a document that does not have it yet and runs it"""
+	return f'(args) => {{ {BUILD_DOM_TREE_FUNCTION} = {_load_build_dom_tree_js()}; return {BUILD_DOM_TREE_FUNCTION}(args); }}'
+
+
+# draws highlight boxes from precomputed rects, for extractions that do not highlight inside buildDomTree.js
+HIGHLIGHT_RECTS_JS = """([rects, renderer]) => {
+	const colors = ['#FF0000', '#00FF00', '#0000FF', '#FFA500', '#800080', '#008080', '#FF69B4', '#4B0082', '#FF4500', '#2E8B57', '#DC143C', '#4682B4'];
+	document.getElementById('playwright-highlight-container')?.remove();
+	if (renderer === 'canvas') {
+		const ratio = window.devicePixelRatio || 1;
+		const canvas = document.createElement('canvas');
+		canvas.id = 'playwright-highlight-container';
+		canvas.style.cssText = 'position:fixed;pointer-events:none;top:0;left:0;width:100%;height:100%;z-index:2147483640';
+		canvas.width = Math.round(window.innerWidth * ratio);
+		canvas.height = Math.round(window.innerHeight * ratio);
+		const context = canvas.getContext('2d');
+		context.setTransform(ratio, 0, 0, ratio, 0, 0);
+		context.textBaseline = 'top';
+		context.lineWidth = 2;
+		for (const [index, x, y, width, height] of rects) {
+			const color = colors[index % colors.length];
+			const fontSize = Math.min(12, Math.max(8, height / 2));
+			const labelX = Math.max(0, x + width - 22);
+			const labelY = Math.max(0, y + 2);
+			context.fillStyle = `${color}1A`;
+			context.fillRect(x, y, width, height);
+			context.strokeStyle = color;
+			context.strokeRect(x + 1, y + 1, width - 2, height - 2);
+			context.font = `${fontSize}px sans-serif`;
+			context.fillStyle = color;
+			context.fillRect(labelX, labelY, context.measureText(String(index)).width + 8, fontSize + 2);
+			context.fillStyle = 'white';
+			context.fillText(String(index), labelX + 4, labelY + 1);
+		}
+		document.body.appendChild(canvas);
+		return;
+	}
+	const container = document.createElement('div');
+	container.id = 'playwright-highlight-container';
+	container.style.cssText = 'position:fixed;pointer-events:none;top:0;left:0;width:100%;height:100%;z-index:2147483640;background-color:transparent';
+	for (const [index, x, y, width, height] of rects) {
+		const color = colors[index % colors.length];
+		const overlay = document.createElement('div');
+		overlay.style.cssText = `position:fixed;pointer-events:none;box-sizing:border-box;border:2px solid ${color};background-color:${color}1A;top:${y}px;left:${x}px;width:${width}px;height:${height}px`;
+		const label = document.createElement('div');
+		label.className = 'playwright-highlight-label';
+		label.style.cssText = `position:fixed;background:${color};color:white;padding:1px 4px;border-radius:4px;font-size:${Math.min(12, Math.max(8, height / 2))}px;top:${Math.max(0, y + 2)}px;left:${Math.max(0, x + width - 22)}px`;
+		label.textContent = index;
+		container.append(overlay, label);
+	}
+	document.body.appendChild(container);
+}"""
+
+# xpath of an iframe element inside its own document, same rules as getXPathTree in buildDomTree.js
+IFRAME_XPATH_JS = """(element) => {
+	const segments = [];
+	let current = element;
+	while (current && current.nodeType === Node.ELEMENT_NODE) {
+		if (current.parentNode instanceof ShadowRoot || current.parentNode instanceof HTMLIFrameElement) break;
+		const tagName = current.nodeName.toLowerCase();
+		const siblings = current.parentElement ? Array.from(current.parentElement.children).filter((sibling) => sibling.nodeName.toLowerCase() === tagName) : [];
+		segments.unshift(siblings.length > 1 ? `${tagName}[${siblings.indexOf(current) + 1}]` : tagName);
+		current = current.parentNode;
+	}
+	return segments.join('/');
+}"""
+
+# highlights elements of a separately extracted frame with their global indices, inside the frame document
+HIGHLIGHT_XPATHS_JS = """([items, renderer]) => {
+	const rects = [];
+	for (const [xpath, index] of items) {
+		const element = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+		const rect = element?.getBoundingClientRect();
+		if (rect && rect.width > 0 && rect.height > 0) rects.push([index, rect.left, rect.top, rect.width, rect.height]);
+	}
+	(HIGHLIGHT_RECTS)([rects, renderer]);
+}""".replace('HIGHLIGHT_RECTS', HIGHLIGHT_RECTS_JS)
+
+# viewport size and bounding rects of elements by xpath, null where the xpath does not resolve from the document
+XPATH_RECTS_JS = """(xpaths) => ({
+	width: window.innerWidth,
+	height: window.innerHeight,
+	rects: xpaths.map((xpath) => {
+		const element = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+		if (!element) return null;
+		const rect = element.getBoundingClientRect();
+		return [rect.left, rect.top, rect.width, rect.height];
+	}),
+})"""
+
+AD_NETWORK_DOMAINS = ('doubleclick.net', 'adroll.com', 'googletagmanager.com')
+
+
+def _is_ad_url(url: str) -> bool:
+	return any(domain in urlparse(url).netloc for domain in AD_NETWORK_DOMAINS)
+
+
+def _origin(url: str) -> tuple[str, str]:
+	"""Scheme and host with port, documents of different origins cannot access each other"""
+	parsed = urlparse(url)
+	return parsed.scheme, parsed.netloc
+
+
 class DomService:
-	def __init__(self, page: 'Page'):
+	def __init__(
+		self,
+		page: 'Page',
+		incremental: bool = False,
+		compact_output: bool = False,
+		backend: DomBackend = 'js',
+		cross_origin_iframes: bool = False,
+		highlight_renderer: HighlightRenderer = 'dom',
+	):
 		self.page = page
 		self.xpath_cache = {}
-
-		self.js_code = resources.files('browser_use.dom').joinpath('buildDomTree.js').read_text()
+		# 'js' walks the DOM with buildDomTree.js, 'cdp_snapshot' builds the tree from DOMSnapshot.captureSnapshot,
+		# 'ax_tree' from the accessibility tree
+		self.backend = backend
+		# extract cross-origin iframes in their own execution context and stitch them into the main tree
+		self.cross_origin_iframes = cross_origin_iframes
+		# install the in-page mutation tracker and allow patching a previous state instead of a full rebuild
+		self.incremental = incremental
+		# ask buildDomTree.js for the columnar encoding instead of the per-node dict map
+		self.compact_output = compact_output
+		# 'dom' draws a div and a label per highlighted element, 'canvas' paints all of them onto one canvas
+		self.highlight_renderer = highlight_renderer
+
+		self.js_code = _load_build_dom_tree_js()
 
 	# region - Clickable elements
 	@time_execution_async('--get_clickable_elements')
@@ -40,26 +191,166 @@ class DomService:
 		highlight_elements: bool = True,
 		focus_element: int = -1,
 		viewport_expansion: int = 0,
+		previous_state: DOMState | None = None,
 	) -> DOMState:
-		element_tree, selector_map = await self._build_dom_tree(highlight_elements, focus_element, viewport_expansion)
+		"""
+		previous_state: DOMState | None
+			State previously extracted from the same document. With incremental=True only the subtrees
+			that changed since then are re-extracted and patched into it.
+		"""
+		frames = await self._get_cross_origin_frames() if self.cross_origin_iframes else []
+		if not frames:
+			element_tree, selector_map = await self._build_dom_tree(
+				highlight_elements,
+				focus_element,
+				viewport_expansion,
+				previous_state if self.incremental else None,
+			)
+			return DOMState(element_tree=element_tree, selector_map=selector_map)
+
+		# every frame is extracted concurrently, so the step costs the latency of the slowest frame.
+		# stitched frame subtrees are not tracked by the mutation observer, so always extract fully
+		main_result, *frame_results = await asyncio.gather(
+			self._build_dom_tree(highlight_elements, focus_element, viewport_expansion),
+			*(self._build_frame_dom_tree(frame, viewport_expansion) for frame in frames),
+			return_exceptions=True,
+		)
+		if isinstance(main_result, BaseException):
+			raise main_result
+
+		element_tree, selector_map = main_result
+		stitched = self._stitch_frame_trees(element_tree, selector_map, frames, frame_results)
+
+		if highlight_elements and stitched:
+			await asyncio.gather(
+				*(
+					frame.evaluate(
+						HIGHLIGHT_XPATHS_JS,
+						[
+							[[node.xpath, index] for index, node in frame_nodes if focus_element < 0 or index == focus_element],
+							self.highlight_renderer,
+						],
+					)
+					for frame, frame_nodes in stitched
+				),
+				return_exceptions=True,
+			)
+
 		return DOMState(element_tree=element_tree, selector_map=selector_map)
 
+	async def _get_cross_origin_frames(self) -> list['Frame']:
+		"""Frames the in-page walk cannot descend into, parents always come before their children"""
+		# invisible cross-origin iframes are used for ads and tracking, dont extract those
+		hidden_frame_urls = await self.page.locator('iframe').filter(visible=False).evaluate_all('e => e.map(e => e.src)')
+
+		frames = []
+		extracted = {self.page.main_frame}
+		for frame in self.page.frames:
+			parent = frame.parent_frame
+			if (
+				parent in extracted
+				and urlparse(frame.url).netloc  # exclude data:urls and about:blank
+				and _origin(frame.url) != _origin(parent.url)  # same-origin iframes are walked in-page
+				and frame.url not in hidden_frame_urls
+				and not _is_ad_url(frame.url)
+			):
+				frames.append(frame)
+				extracted.add(frame)
+		return frames
+
+	@time_execution_async('--build_frame_dom_tree')
+	async def _build_frame_dom_tree(
+		self,
+		frame: 'Frame',
+		viewport_expansion: int,
+	) -> tuple[str, DOMElementNode, SelectorMap]:
+		"""Extracts one frame in its own execution context, highlight indices are local to the frame"""
+		frame_element = await frame.frame_element()
+		iframe_xpath = await frame_element.evaluate(IFRAME_XPATH_JS)
+
+		args = {
+			'doHighlightElements': False,
+			'focusHighlightIndex': -1,
+			'viewportExpansion': viewport_expansion,
+			'debugMode': False,
+			'compactOutput': self.compact_output,
+		}
+		eval_page = await frame.evaluate(INVOKE_BUILD_DOM_TREE_JS, args)
+		if eval_page is None:
+			eval_page = await frame.evaluate(_register_build_dom_tree_js(), args)
+
+		element_tree, selector_map = await self._construct_dom_tree(eval_page)
+		return iframe_xpath, element_tree, selector_map
+
+	def _stitch_frame_trees(
+		self,
+		element_tree: DOMElementNode,
+		selector_map: SelectorMap,
+		frames: list['Frame'],
+		frame_results: list,
+	) -> list[tuple['Frame', list[tuple[int, DOMElementNode]]]]:
+		"""
+		Hangs every extracted frame tree below its iframe element and renumbers its highlight indices
+		after the ones already in selector_map, which is extended in place.
+
+		Returns the stitched frames with their (global index, node) pairs for highlighting.
+		"""
+		trees: dict['Frame', DOMElementNode] = {self.page.main_frame: element_tree}
+		stitched = []
+		next_index = max(selector_map, default=-1) + 1
+
+		for frame, result in zip(frames, frame_results):
+			if isinstance(result, BaseException):
+				logger.debug('Failed to extract frame %s: %s', frame.url, result)
+				continue
+
+			iframe_xpath, frame_tree, frame_selector_map = result
+			parent_tree = trees.get(frame.parent_frame)  # type: ignore
+			iframe_node = self._find_iframe_node(parent_tree, iframe_xpath) if parent_tree is not None else None
+			if iframe_node is None:
+				logger.debug('No iframe element found for frame %s', frame.url)
+				continue
+
+			frame_tree.parent = iframe_node
+			iframe_node.children = [*iframe_node.children, frame_tree]
+			trees[frame] = frame_tree
+
+			frame_nodes = []
+			for local_index in sorted(frame_selector_map):
+				node = frame_selector_map[local_index]
+				node.highlight_index = next_index
+				selector_map[next_index] = node
+				frame_nodes.append((next_index, node))
+				next_index += 1
+			stitched.append((frame, frame_nodes))
+
+		return stitched
+
+	@staticmethod
+	def _find_iframe_node(tree: DOMElementNode, xpath: str) -> DOMElementNode | None:
+		"""Iframe element with the given xpath in the document of tree, without descending into nested frames"""
+		stack = [tree]
+		while stack:
+			node = stack.pop()
+			if node.tag_name == 'iframe':
+				if node.xpath == xpath:
+					return node
+				continue
+			stack.extend(child for child in node.children if isinstance(child, DOMElementNode))
+		return None
+
 	@time_execution_async('--get_cross_origin_iframes')
 	async def get_cross_origin_iframes(self) -> list[str]:
 		# invisible cross-origin iframes are used for ads and tracking, dont open those
 		hidden_frame_urls = await self.page.locator('iframe').filter(visible=False).evaluate_all('e => e.map(e => e.src)')
 
-		is_ad_url = lambda url: any(
-			domain in urlparse(url).netloc for domain in ('doubleclick.net', 'adroll.com', 'googletagmanager.com')
-		)
-
 		return [
 			frame.url
 			for frame in self.page.frames
 			if urlparse(frame.url).netloc  # exclude data:urls and about:blank
 			and urlparse(frame.url).netloc != urlparse(self.page.url).netloc  # exclude same-origin iframes
 			and frame.url not in hidden_frame_urls  # exclude hidden frames
-			and not is_ad_url(frame.url)  # exclude most common ad network tracker frame URLs
+			and not _is_ad_url(frame.url)  # exclude most common ad network tracker frame URLs
 		]
 
 	@time_execution_async('--build_dom_tree')
@@ -68,6 +359,7 @@ class DomService:
 		highlight_elements: bool,
 		focus_element: int,
 		viewport_expansion: int,
+		previous_state: DOMState | None = None,
 	) -> tuple[DOMElementNode, SelectorMap]:
 		if await self.page.evaluate('1+1') != 2:
 			raise ValueError('The page cannot evaluate javascript code properly')
@@ -86,6 +378,19 @@ class DomService:
 				{},
 			)
 
+		if self.backend == 'cdp_snapshot':
+			try:
+				return await self._build_dom_tree_from_snapshot(highlight_elements, focus_element, viewport_expansion)
+			except Exception as e:
+				# DOMSnapshot is only available on chromium, fall back to the in-page walk
+				logger.warning('CDP DOM snapshot failed, falling back to buildDomTree.js: %s', e)
+
+		if self.backend == 'ax_tree':
+			try:
+				return await self._build_dom_tree_from_ax_tree(highlight_elements, focus_element, viewport_expansion)
+			except Exception as e:
+				logger.warning('Accessibility tree extraction failed, falling back to buildDomTree.js: %s', e)
+
 		# NOTE: We execute JS code in the browser to extract important DOM information.
 		#       The returned hash map contains information about the DOM tree and the
 		#       relationship between the DOM elements.
@@ -95,13 +400,19 @@ class DomService:
 			'focusHighlightIndex': focus_element,
 			'viewportExpansion': viewport_expansion,
 			'debugMode': debug_mode,
+			'trackMutations': self.incremental,
+			'compactOutput': self.compact_output,
+			'highlightRenderer': self.highlight_renderer,
 		}
+		if previous_state is not None:
+			args['incremental'] = True
+			args['startHighlightIndex'] = max(previous_state.selector_map, default=-1) + 1
 
 		try:
-			eval_page: dict = await self.page.evaluate(self.js_code, args)
-			for key, value in eval_page.get('map', {}).items():
-				if value.get('text') == "协同邮箱" or value.get('text') == "写邮件":
-					print(f'{key}: {value}')
+			eval_page: dict | None = await self.page.evaluate(INVOKE_BUILD_DOM_TREE_JS, args)
+			if eval_page is None:
+				# first extraction in this document, ship the script source once
+				eval_page = await self.page.evaluate(_register_build_dom_tree_js(), args)
 		except Exception as e:
 			logger.error('Error evaluating JavaScript: %s', e)
 			raise
@@ -114,16 +425,253 @@ class DomService:
 				json.dumps(eval_page['perfMetrics'], indent=2),
 			)
 
+		if 'patches' in eval_page and previous_state is not None:
+			patched = await self._patch_dom_tree(previous_state, eval_page)
+			if patched is not None:
+				return patched
+
+			# the cached tree does not match the page anymore, fall back to a full walk
+			logger.debug('Incremental DOM update could not be applied, rebuilding the full tree')
+			if highlight_elements:
+				await self.page.evaluate("document.getElementById('playwright-highlight-container')?.remove()")
+			return await self._build_dom_tree(highlight_elements, focus_element, viewport_expansion)
+
 		return await self._construct_dom_tree(eval_page)
 
+	@time_execution_async('--build_dom_tree_from_snapshot')
+	async def _build_dom_tree_from_snapshot(
+		self,
+		highlight_elements: bool,
+		focus_element: int,
+		viewport_expansion: int,
+	) -> tuple[DOMElementNode, SelectorMap]:
+		"""Builds the tree from a single DOMSnapshot.captureSnapshot call instead of walking the DOM in the page"""
+		cdp_session = await self.page.context.new_cdp_session(self.page)  # type: ignore
+		try:
+			snapshot = await cdp_session.send(
+				'DOMSnapshot.captureSnapshot',
+				{'computedStyles': SNAPSHOT_COMPUTED_STYLES, 'includePaintOrder': True, 'includeDOMRects': True},
+			)
+			layout_metrics = await cdp_session.send('Page.getLayoutMetrics')
+		finally:
+			await cdp_session.detach()
+
+		css_viewport = layout_metrics['cssLayoutViewport']
+		viewport = SnapshotViewport(width=css_viewport['clientWidth'], height=css_viewport['clientHeight'])
+		processor = SnapshotTreeProcessor(snapshot, viewport, viewport_expansion)
+		element_tree, selector_map = processor.build()
+
+		if highlight_elements:
+			rects = [
+				[index, *rect] for index, rect in processor.highlight_rects.items() if focus_element < 0 or index == focus_element
+			]
+			await self.page.evaluate(HIGHLIGHT_RECTS_JS, [rects, self.highlight_renderer])
+
+		return element_tree, selector_map
+
+	@time_execution_async('--build_dom_tree_from_ax_tree')
+	async def _build_dom_tree_from_ax_tree(
+		self,
+		highlight_elements: bool,
+		focus_element: int,
+		viewport_expansion: int,
+	) -> tuple[DOMElementNode, SelectorMap]:
+		"""Builds the tree from the accessibility tree, only interactive roles and static text are kept"""
+		cdp_session = await self.page.context.new_cdp_session(self.page)  # type: ignore
+		try:
+			ax_tree, document = await asyncio.gather(
+				cdp_session.send('Accessibility.getFullAXTree'),
+				cdp_session.send('DOM.getDocument', {'depth': -1, 'pierce': True}),
+			)
+		finally:
+			await cdp_session.detach()
+
+		processor = AXTreeProcessor(ax_tree['nodes'], document['root'])
+		if viewport_expansion == -1 and not highlight_elements:
+			return processor.build()
+
+		# the accessibility tree has no layout, measure the candidates in one round trip
+		xpaths = processor.interactive_xpaths()
+		measured = await self.page.evaluate(XPATH_RECTS_JS, xpaths)
+		rects = dict(zip(xpaths, measured['rects']))
+		in_viewport = {
+			# xpaths inside shadow roots do not resolve from the document, keep those elements
+			xpath: rect is None or self._rect_in_viewport(rect, measured['width'], measured['height'], viewport_expansion)
+			for xpath, rect in rects.items()
+		}
+		element_tree, selector_map = processor.build(in_viewport)
+
+		if highlight_elements:
+			highlight_rects = [
+				[index, *rects[element.xpath]]
+				for index, element in selector_map.items()
+				if rects.get(element.xpath) and (focus_element < 0 or index == focus_element)
+			]
+			await self.page.evaluate(HIGHLIGHT_RECTS_JS, [highlight_rects, self.highlight_renderer])
+
+		return element_tree, selector_map
+
+	@staticmethod
+	def _rect_in_viewport(rect: list[float], width: float, height: float, viewport_expansion: int) -> bool:
+		x, y, rect_width, rect_height = rect
+		if rect_width <= 0 or rect_height <= 0:
+			return False
+		if viewport_expansion == -1:
+			return True
+		return (
+			y < height + viewport_expansion
+			and y + rect_height > -viewport_expansion
+			and x < width + viewport_expansion
+			and x + rect_width > -viewport_expansion
+		)
+
 	@time_execution_async('--construct_dom_tree')
 	async def _construct_dom_tree(
 		self,
 		eval_page: dict,
 	) -> tuple[DOMElementNode, SelectorMap]:
-		js_node_map = eval_page['map']
 		js_root_id = eval_page['rootId']
 
+		node_map, selector_map = self._parse_eval_page(eval_page)
+
+		html_to_dict = self._lookup_node(node_map, js_root_id)
+
+		del node_map
+		del js_root_id
+
+		if html_to_dict is None or not isinstance(html_to_dict, DOMElementNode):
+			raise ValueError('Failed to parse HTML to dictionary')
+
+		return html_to_dict, selector_map
+
+	@time_execution_async('--patch_dom_tree')
+	async def _patch_dom_tree(
+		self,
+		previous_state: DOMState,
+		eval_page: dict,
+	) -> tuple[DOMElementNode, SelectorMap] | None:
+		"""
+		Replaces the changed subtrees of previous_state with the freshly extracted ones.
+
+		Returns None if a patch root cannot be located unambiguously in the cached tree.
+		The cached tree is patched in place, the returned selector map is a new dict.
+		"""
+		xpath_index: dict[str, DOMElementNode | None] = {}
+		stack: list[DOMElementNode] = [previous_state.element_tree]
+		while stack:
+			node = stack.pop()
+			# xpaths restart at shadow roots and iframes, so the same xpath can appear twice
+			xpath_index[node.xpath] = None if node.xpath in xpath_index else node
+			if node.tag_name == 'iframe':
+				continue
+			stack.extend(child for child in node.children if isinstance(child, DOMElementNode))
+
+		node_map, new_selector_map = self._parse_eval_page(eval_page)
+
+		replacements: list[tuple[DOMElementNode, DOMElementNode | None]] = []
+		for patch in eval_page['patches']:
+			old_node = xpath_index.get(patch['xpath'])
+			if old_node is None or old_node.parent is None:
+				return None
+
+			new_node = self._lookup_node(node_map, patch['rootId']) if patch['rootId'] is not None else None
+			if new_node is not None and not isinstance(new_node, DOMElementNode):
+				return None
+			replacements.append((old_node, new_node))
+
+		removed_indices: set[int] = set()
+		for old_node, new_node in replacements:
+			stack = [old_node]
+			while stack:
+				node = stack.pop()
+				if node.highlight_index is not None:
+					removed_indices.add(node.highlight_index)
+				stack.extend(child for child in node.children if isinstance(child, DOMElementNode))
+
+			parent = old_node.parent
+			position = next(i for i, child in enumerate(parent.children) if child is old_node)
+			if new_node is None:
+				del parent.children[position]
+			else:
+				new_node.parent = parent
+				parent.children[position] = new_node
+
+		selector_map = {index: node for index, node in previous_state.selector_map.items() if index not in removed_indices}
+		selector_map.update(new_selector_map)
+
+		return previous_state.element_tree, selector_map
+
+	def _parse_eval_page(self, eval_page: dict) -> tuple[dict[str, DOMBaseNode] | list[DOMBaseNode], SelectorMap]:
+		if eval_page.get('format') == 'columnar':
+			return self._parse_node_columns(eval_page)
+		return self._parse_node_map(eval_page['map'])
+
+	@staticmethod
+	def _lookup_node(nodes: dict[str, DOMBaseNode] | list[DOMBaseNode], node_id: int | str) -> DOMBaseNode | None:
+		if isinstance(nodes, list):
+			return nodes[int(node_id)]
+		return nodes.get(str(node_id))
+
+	def _parse_node_columns(self, eval_page: dict) -> tuple[list[DOMBaseNode], SelectorMap]:
+		"""Decode the columnar buildDomTree.js output, node ids are positions in every column."""
+		strings = [sys.intern(string) for string in eval_page['strings']]
+		values = eval_page['values']
+		flags = eval_page['flags']
+		highlight_indices = eval_page['highlightIndices']
+		attribute_offsets = eval_page['attributeOffsets']
+		attribute_keys = eval_page['attributeKeys']
+		attribute_values = eval_page['attributeValues']
+		child_offsets = eval_page['childOffsets']
+		children = eval_page['children']
+
+		selector_map = {}
+		nodes: list[DOMBaseNode] = []
+
+		for i, tag in enumerate(eval_page['tags']):
+			node_flags = flags[i]
+
+			if tag == -1:
+				nodes.append(DOMTextNode(text=values[i], is_visible=bool(node_flags & FLAG_VISIBLE), parent=None))
+				continue
+
+			attribute_start, attribute_end = attribute_offsets[i], attribute_offsets[i + 1]
+			child_start, child_end = child_offsets[i], child_offsets[i + 1]
+			highlight_index = highlight_indices[i]
+
+			# leaves and nodes without attributes share one empty container
+			attributes = EMPTY_ATTRIBUTES
+			if attribute_end > attribute_start:
+				attributes = {strings[attribute_keys[j]]: attribute_values[j] for j in range(attribute_start, attribute_end)}
+
+			# NOTE: ids are assigned bottom up, so all children are already decoded
+			child_nodes = EMPTY_CHILDREN
+			if child_end > child_start:
+				child_nodes = [nodes[child_id] for child_id in children[child_start:child_end]]
+
+			element_node = DOMElementNode(
+				tag_name=strings[tag],
+				xpath=values[i],
+				attributes=attributes,
+				children=child_nodes,
+				is_visible=bool(node_flags & FLAG_VISIBLE),
+				is_interactive=bool(node_flags & FLAG_INTERACTIVE),
+				is_top_element=bool(node_flags & FLAG_TOP_ELEMENT),
+				is_in_viewport=bool(node_flags & FLAG_IN_VIEWPORT),
+				highlight_index=highlight_index if highlight_index >= 0 else None,
+				shadow_root=bool(node_flags & FLAG_SHADOW_ROOT),
+				parent=None,
+			)
+			for child in element_node.children:
+				child.parent = element_node
+
+			if element_node.highlight_index is not None:
+				selector_map[element_node.highlight_index] = element_node
+
+			nodes.append(element_node)
+
+		return nodes, selector_map
+
+	def _parse_node_map(self, js_node_map: dict) -> tuple[dict[str, DOMBaseNode], SelectorMap]:
 		selector_map = {}
 		node_map = {}
 
@@ -140,25 +688,13 @@ class DomService:
 			# NOTE: We know that we are building the tree bottom up
 			#       and all children are already processed.
 			if isinstance(node, DOMElementNode):
-				for child_id in children_ids:
-					if child_id not in node_map:
-						continue
-
-					child_node = node_map[child_id]
-
+				children = [node_map[child_id] for child_id in children_ids if child_id in node_map]
+				for child_node in children:
 					child_node.parent = node
-					node.children.append(child_node)
+				# leaves share one empty list instead of allocating their own
+				node.children = children if children else EMPTY_CHILDREN
 
-		html_to_dict = node_map[str(js_root_id)]
-
-		del node_map
-		del js_node_map
-		del js_root_id
-
-		if html_to_dict is None or not isinstance(html_to_dict, DOMElementNode):
-			raise ValueError('Failed to parse HTML to dictionary')
-
-		return html_to_dict, selector_map
+		return node_map, selector_map
 
 	def _parse_node(
 		self,
@@ -189,7 +725,7 @@ class DomService:
 		element_node = DOMElementNode(
 			tag_name=node_data['tagName'],
 			xpath=node_data['xpath'],
-			attributes=node_data.get('attributes', {}),
+			attributes=intern_attributes(node_data.get('attributes', {})),
 			children=[],
 			is_visible=node_data.get('isVisible', False),
 			is_interactive=node_data.get('isInteractive', False),
@@ -0,0 +1,542 @@
+import sys
+from dataclasses import dataclass, field
+
+from browser_use.dom.views import EMPTY_ATTRIBUTES, EMPTY_CHILDREN, DOMBaseNode, DOMElementNode, DOMTextNode, SelectorMap
+
+# order of the computed styles requested from DOMSnapshot.captureSnapshot, the layout styles arrays follow it
+SNAPSHOT_COMPUTED_STYLES = ['display', 'visibility', 'opacity', 'cursor', 'position', 'pointer-events']
+
+ELEMENT_NODE = 1
+TEXT_NODE = 3
+DOCUMENT_FRAGMENT_NODE = 11
+
+HIGHLIGHT_CONTAINER_ID = 'playwright-highlight-container'
+
+# the constants below mirror the heuristics of buildDomTree.js, keep them in sync
+ALWAYS_ACCEPTED_TAGS = {'body', 'div', 'main', 'article', 'section', 'nav', 'header', 'footer'}
+LEAF_ELEMENT_DENY_LIST = {'svg', 'script', 'style', 'link', 'meta', 'noscript', 'template'}
+INTERACTIVE_CANDIDATE_TAGS = {'a', 'button', 'input', 'select', 'textarea', 'details', 'summary'}
+INTERACTIVE_CURSORS = {
+	'pointer',
+	'move',
+	'text',
+	'grab',
+	'grabbing',
+	'cell',
+	'copy',
+	'alias',
+	'all-scroll',
+	'col-resize',
+	'context-menu',
+	'crosshair',
+	'e-resize',
+	'ew-resize',
+	'help',
+	'n-resize',
+	'ne-resize',
+	'nesw-resize',
+	'ns-resize',
+	'nw-resize',
+	'nwse-resize',
+	'row-resize',
+	's-resize',
+	'se-resize',
+	'sw-resize',
+	'vertical-text',
+	'w-resize',
+	'zoom-in',
+	'zoom-out',
+}
+NON_INTERACTIVE_CURSORS = {'not-allowed', 'no-drop', 'wait', 'progress', 'initial', 'inherit'}
+INTERACTIVE_TAGS = {
+	'a',
+	'button',
+	'input',
+	'select',
+	'textarea',
+	'details',
+	'summary',
+	'label',
+	'option',
+	'optgroup',
+	'fieldset',
+	'legend',
+}
+INTERACTIVE_ROLES = {
+	'button',
+	'menuitemradio',
+	'menuitemcheckbox',
+	'radio',
+	'checkbox',
+	'tab',
+	'switch',
+	'slider',
+	'spinbutton',
+	'combobox',
+	'searchbox',
+	'textbox',
+	'option',
+	'scrollbar',
+}
+DISTINCT_INTERACTIVE_TAGS = {'a', 'button', 'input', 'select', 'textarea', 'summary', 'details', 'label', 'option'}
+DISTINCT_INTERACTIVE_ROLES = INTERACTIVE_ROLES | {'link', 'menuitem', 'listbox'}
+MOUSE_EVENT_ATTRIBUTES = ('onclick', 'onmousedown', 'onmouseup', 'ondblclick', 'onhover')
+INTERACTION_EVENT_ATTRIBUTES = (
+	'onmousedown',
+	'onmouseup',
+	'onkeydown',
+	'onkeyup',
+	'onsubmit',
+	'onchange',
+	'oninput',
+	'onfocus',
+	'onblur',
+)
+
+# cell size of the spatial grid used to answer elementFromPoint-style hit tests
+HIT_TEST_CELL_SIZE = 100
+
+
+@dataclass
+class SnapshotViewport:
+	width: float
+	height: float
+
+
+@dataclass
+class _LayoutBox:
+	x: float
+	y: float
+	width: float
+	height: float
+	styles: dict[str, str]
+	paint_order: int
+
+
+@dataclass
+class _Document:
+	index: int
+	parent_index: list[int]
+	node_type: list[int]
+	node_name: list[int]
+	node_value: list[int]
+	attributes: list[list[int]]
+	children: list[list[int]]
+	layout: dict[int, _LayoutBox]
+	content_documents: dict[int, int]
+	clickable: set[int]
+	scroll_x: float
+	scroll_y: float
+	hit_grid: dict[tuple[int, int], list[int]] = field(default_factory=dict)
+
+
+class SnapshotTreeProcessor:
+	"""
+	Builds the DOMElementNode tree and selector map from a CDP DOMSnapshot.captureSnapshot result.
+
+	Follows the same walk order and heuristics as buildDomTree.js, so highlight indices are identical
+	wherever the layout data from the snapshot matches what the in-page script would measure.
+	Event listeners are detected through the snapshot's isClickable flag instead of getEventListenersForNode.
+	"""
+
+	def __init__(self, snapshot: dict, viewport: SnapshotViewport, viewport_expansion: int = 0):
+		self.strings: list[str] = [sys.intern(string) for string in snapshot['strings']]
+		self.viewport = viewport
+		self.viewport_expansion = viewport_expansion
+		self.documents = [self._parse_document(i, document) for i, document in enumerate(snapshot['documents'])]
+
+		self.highlight_index = 0
+		self.selector_map: SelectorMap = {}
+		# highlight index -> viewport rect (x, y, width, height), offset by parent iframes
+		self.highlight_rects: dict[int, tuple[float, float, float, float]] = {}
+
+	def build(self) -> tuple[DOMElementNode, SelectorMap]:
+		document = self.documents[0]
+		body = self._find_body(document)
+		root = DOMElementNode(tag_name='body', xpath='/body', attributes={}, children=[], is_visible=False, parent=None)
+		if body is None:
+			return root, {}
+
+		for child in document.children[body]:
+			node = self._build_node(document, child, (0.0, 0.0), False)
+			if node is not None:
+				node.parent = root
+				root.children.append(node)
+
+		return root, self.selector_map
+
+	# region - parsing
+	def _parse_document(self, index: int, document: dict) -> _Document:
+		nodes = document['nodes']
+		parent_index: list[int] = nodes['parentIndex']
+
+		children: list[list[int]] = [[] for _ in parent_index]
+		for node_index, parent in enumerate(parent_index):
+			if parent >= 0:
+				children[parent].append(node_index)
+
+		layout_data = document['layout']
+		paint_orders = layout_data.get('paintOrders') or []
+		layout = {}
+		for layout_index, node_index in enumerate(layout_data['nodeIndex']):
+			x, y, width, height = layout_data['bounds'][layout_index]
+			styles = {
+				name: self._string(value) for name, value in zip(SNAPSHOT_COMPUTED_STYLES, layout_data['styles'][layout_index])
+			}
+			paint_order = paint_orders[layout_index] if layout_index < len(paint_orders) else layout_index
+			layout[node_index] = _LayoutBox(x, y, width, height, styles, paint_order)
+
+		content_document_data = nodes.get('contentDocumentIndex') or {'index': [], 'value': []}
+
+		return _Document(
+			index=index,
+			parent_index=parent_index,
+			node_type=nodes['nodeType'],
+			node_name=nodes['nodeName'],
+			node_value=nodes['nodeValue'],
+			attributes=nodes.get('attributes') or [[] for _ in parent_index],
+			children=children,
+			layout=layout,
+			content_documents=dict(zip(content_document_data['index'], content_document_data['value'])),
+			clickable=set((nodes.get('isClickable') or {}).get('index', [])),
+			scroll_x=document.get('scrollOffsetX', 0),
+			scroll_y=document.get('scrollOffsetY', 0),
+		)
+
+	def _string(self, index: int) -> str:
+		return self.strings[index] if index >= 0 else ''
+
+	def _tag_name(self, document: _Document, node: int) -> str:
+		return self._string(document.node_name[node]).lower()
+
+	def _attributes(self, document: _Document, node: int) -> dict[str, str]:
+		values = document.attributes[node]
+		return {self._string(values[i]): self._string(values[i + 1]) for i in range(0, len(values), 2)}
+
+	def _find_body(self, document: _Document) -> int | None:
+		for node, node_type in enumerate(document.node_type):
+			if node_type == ELEMENT_NODE and self._tag_name(document, node) == 'body':
+				return node
+		return None
+
+	# endregion
+
+	# region - geometry
+	def _viewport_rect(self, document: _Document, node: int) -> tuple[float, float, float, float] | None:
+		"""Rect relative to the node's own frame viewport, like getClientRects() inside that frame"""
+		box = document.layout.get(node)
+		if box is None:
+			return None
+		return box.x - document.scroll_x, box.y - document.scroll_y, box.width, box.height
+
+	def _is_outside_viewport(self, rect: tuple[float, float, float, float]) -> bool:
+		x, y, width, height = rect
+		expansion = self.viewport_expansion
+		return (
+			y + height < -expansion
+			or y > self.viewport.height + expansion
+			or x + width < -expansion
+			or x > self.viewport.width + expansion
+		)
+
+	def _is_in_expanded_viewport(self, document: _Document, node: int) -> bool:
+		if self.viewport_expansion == -1:
+			return True
+		rect = self._viewport_rect(document, node)
+		if rect is None or rect[2] == 0 or rect[3] == 0:
+			return False
+		return not self._is_outside_viewport(rect)
+
+	def _hit_test(self, document: _Document, x: float, y: float) -> int | None:
+		"""Element painted on top at the given viewport point, like document.elementFromPoint()"""
+		if not document.hit_grid:
+			for node, box in document.layout.items():
+				if box.width <= 0 or box.height <= 0 or box.styles.get('pointer-events') == 'none':
+					continue
+				if box.styles.get('visibility') == 'hidden':
+					continue
+				rect = (box.x - document.scroll_x, box.y - document.scroll_y, box.width, box.height)
+				if self._is_outside_viewport(rect):
+					continue
+				for cell_x in range(int(rect[0] // HIT_TEST_CELL_SIZE), int((rect[0] + rect[2]) // HIT_TEST_CELL_SIZE) + 1):
+					for cell_y in range(int(rect[1] // HIT_TEST_CELL_SIZE), int((rect[1] + rect[3]) // HIT_TEST_CELL_SIZE) + 1):
+						document.hit_grid.setdefault((cell_x, cell_y), []).append(node)
+
+		best_node, best_order = None, (-1, -1)
+		for node in document.hit_grid.get((int(x // HIT_TEST_CELL_SIZE), int(y // HIT_TEST_CELL_SIZE)), []):
+			box = document.layout[node]
+			left, top = box.x - document.scroll_x, box.y - document.scroll_y
+			if left <= x < left + box.width and top <= y < top + box.height:
+				order = (box.paint_order, node)
+				if order > best_order:
+					best_node, best_order = node, order
+
+		# text runs are hit through their parent element
+		if best_node is not None and document.node_type[best_node] != ELEMENT_NODE:
+			best_node = document.parent_index[best_node]
+		return best_node
+
+	def _is_top_element(self, document: _Document, node: int) -> bool:
+		if self.viewport_expansion == -1:
+			return True
+
+		rect = self._viewport_rect(document, node)
+		if rect is None or rect[2] <= 0 or rect[3] <= 0 or self._is_outside_viewport(rect):
+			return False
+
+		# elements inside iframes are considered top by default
+		if document.index != 0:
+			return True
+
+		top_node = self._hit_test(document, rect[0] + rect[2] / 2, rect[1] + rect[3] / 2)
+		while top_node is not None and top_node >= 0:
+			if top_node == node:
+				return True
+			top_node = document.parent_index[top_node]
+		return False
+
+	# endregion
+
+	# region - element heuristics
+	def _xpath(self, document: _Document, node: int) -> str:
+		segments = []
+		current = node
+		while current >= 0 and document.node_type[current] == ELEMENT_NODE:
+			tag_name = self._tag_name(document, current)
+			parent = document.parent_index[current]
+			position = 0
+			if parent >= 0 and document.node_type[parent] == ELEMENT_NODE:
+				siblings = [
+					sibling
+					for sibling in document.children[parent]
+					if document.node_type[sibling] == ELEMENT_NODE and self._tag_name(document, sibling) == tag_name
+				]
+				if len(siblings) > 1:
+					position = siblings.index(current) + 1
+			segments.append(f'{tag_name}[{position}]' if position > 0 else tag_name)
+			# xpaths restart at shadow roots and documents
+			current = parent
+		return '/'.join(reversed(segments))
+
+	def _is_visible(self, document: _Document, node: int) -> bool:
+		box = document.layout.get(node)
+		return (
+			box is not None
+			and box.width > 0
+			and box.height > 0
+			and box.styles.get('visibility') != 'hidden'
+			and box.styles.get('display') != 'none'
+		)
+
+	def _is_interactive_candidate(self, tag_name: str, attributes: dict[str, str]) -> bool:
+		if tag_name in INTERACTIVE_CANDIDATE_TAGS:
+			return True
+		return (
+			'onclick' in attributes
+			or 'role' in attributes
+			or 'tabindex' in attributes
+			or 'aria-' in attributes
+			or 'data-action' in attributes
+			or attributes.get('contenteditable') == 'true'
+		)
+
+	def _is_interactive(self, document: _Document, node: int, tag_name: str, attributes: dict[str, str]) -> bool:
+		box = document.layout.get(node)
+		cursor = box.styles.get('cursor', '') if box else ''
+
+		if tag_name != 'html' and cursor in INTERACTIVE_CURSORS:
+			return True
+
+		if tag_name in INTERACTIVE_TAGS:
+			if cursor in NON_INTERACTIVE_CURSORS:
+				return False
+			if any(attribute in attributes for attribute in ('disabled', 'readonly', 'inert')):
+				return False
+			return True
+
+		if attributes.get('contenteditable') in ('true', ''):
+			return True
+
+		classes = attributes.get('class', '').split()
+		if (
+			'button' in classes
+			or 'dropdown-toggle' in classes
+			or attributes.get('data-index')
+			or attributes.get('data-toggle') == 'dropdown'
+			or attributes.get('aria-haspopup') == 'true'
+		):
+			return True
+
+		if attributes.get('role') in INTERACTIVE_ROLES or attributes.get('aria-role') in INTERACTIVE_ROLES:
+			return True
+
+		# the snapshot knows about click listeners attached from javascript
+		if node in document.clickable:
+			return True
+
+		return any(attribute in attributes for attribute in MOUSE_EVENT_ATTRIBUTES)
+
+	def _is_distinct_interaction(self, document: _Document, node: int, tag_name: str, attributes: dict[str, str]) -> bool:
+		if tag_name == 'iframe' or tag_name in DISTINCT_INTERACTIVE_TAGS:
+			return True
+		if attributes.get('role') in DISTINCT_INTERACTIVE_ROLES:
+			return True
+		if attributes.get('contenteditable') in ('true', ''):
+			return True
+		if any(attribute in attributes for attribute in ('data-testid', 'data-cy', 'data-test', 'onclick')):
+			return True
+		if node in document.clickable:
+			return True
+		return any(attribute in attributes for attribute in INTERACTION_EVENT_ATTRIBUTES)
+
+	# endregion
+
+	# region - walk
+	def _build_text_node(self, document: _Document, node: int) -> DOMTextNode | None:
+		text = self._string(document.node_value[node]).strip()
+		if not text:
+			return None
+
+		parent = document.parent_index[node]
+		if parent < 0 or document.node_type[parent] != ELEMENT_NODE or self._tag_name(document, parent) == 'script':
+			return None
+
+		is_visible = True
+		if self.viewport_expansion != -1:
+			rect = self._viewport_rect(document, node)
+			is_visible = rect is not None and rect[2] > 0 and rect[3] > 0 and not self._is_outside_viewport(rect)
+
+		parent_box = document.layout.get(parent)
+		is_visible = (
+			is_visible
+			and parent_box is not None
+			and parent_box.styles.get('display') != 'none'
+			and parent_box.styles.get('visibility') != 'hidden'
+			and parent_box.styles.get('opacity') != '0'
+		)
+
+		return DOMTextNode(text=text, is_visible=is_visible, parent=None)
+
+	def _build_node(
+		self,
+		document: _Document,
+		node: int,
+		frame_offset: tuple[float, float],
+		is_parent_highlighted: bool,
+	) -> DOMBaseNode | None:
+		node_type = document.node_type[node]
+		if node_type == TEXT_NODE:
+			return self._build_text_node(document, node)
+		if node_type != ELEMENT_NODE:
+			return None
+
+		tag_name = self._tag_name(document, node)
+		all_attributes = self._attributes(document, node)
+		if all_attributes.get('id') == HIGHLIGHT_CONTAINER_ID:
+			return None
+		if tag_name not in ALWAYS_ACCEPTED_TAGS and tag_name in LEAF_ELEMENT_DENY_LIST:
+			return None
+
+		# quick check - only drop elements that are clearly outside the viewport
+		box = document.layout.get(node)
+		if self.viewport_expansion != -1 and box is not None:
+			rect = self._viewport_rect(document, node)
+			is_fixed_or_sticky = box.styles.get('position') in ('fixed', 'sticky')
+			has_size = box.width > 0 or box.height > 0
+			if rect is not None and not is_fixed_or_sticky and not has_size and self._is_outside_viewport(rect):
+				return None
+
+		attributes = EMPTY_ATTRIBUTES
+		if all_attributes and (self._is_interactive_candidate(tag_name, all_attributes) or tag_name in ('iframe', 'body')):
+			attributes = all_attributes
+
+		element = DOMElementNode(
+			tag_name=tag_name,
+			xpath=self._xpath(document, node),
+			attributes=attributes,
+			children=[],
+			is_visible=self._is_visible(document, node),
+			parent=None,
+		)
+
+		node_was_highlighted = False
+		if element.is_visible:
+			element.is_top_element = self._is_top_element(document, node)
+			if element.is_top_element:
+				element.is_interactive = self._is_interactive(document, node, tag_name, all_attributes)
+				node_was_highlighted = self._handle_highlighting(
+					document, node, element, all_attributes, frame_offset, is_parent_highlighted
+				)
+
+		child_groups: list[tuple[_Document, list[int], tuple[float, float], bool]] = []
+		if tag_name == 'iframe':
+			content_document = document.content_documents.get(node)
+			if content_document is not None:
+				iframe_rect = self._viewport_rect(document, node) or (0, 0, 0, 0)
+				iframe_offset = (frame_offset[0] + iframe_rect[0], frame_offset[1] + iframe_rect[1])
+				frame_document = self.documents[content_document]
+				roots = [index for index, parent in enumerate(frame_document.parent_index) if parent == -1]
+				for root in roots:
+					child_groups.append((frame_document, frame_document.children[root], iframe_offset, False))
+		elif all_attributes.get('contenteditable') == 'true' or all_attributes.get('id') == 'tinymce':
+			child_groups.append((document, document.children[node], frame_offset, node_was_highlighted))
+		else:
+			pass_highlight_status = node_was_highlighted or is_parent_highlighted
+			light_children = []
+			for child in document.children[node]:
+				if document.node_type[child] == DOCUMENT_FRAGMENT_NODE:
+					element.shadow_root = True
+					child_groups.append((document, document.children[child], frame_offset, node_was_highlighted))
+				else:
+					light_children.append(child)
+			child_groups.append((document, light_children, frame_offset, pass_highlight_status))
+
+		children: list[DOMBaseNode] = []
+		for child_document, child_indices, offset, highlighted in child_groups:
+			for child in child_indices:
+				child_node = self._build_node(child_document, child, offset, highlighted)
+				if child_node is not None:
+					child_node.parent = element
+					children.append(child_node)
+		element.children = children if children else EMPTY_CHILDREN
+
+		# skip empty anchor tags
+		if tag_name == 'a' and not element.children and not attributes.get('href'):
+			return None
+
+		return element
+
+	def _handle_highlighting(
+		self,
+		document: _Document,
+		node: int,
+		element: DOMElementNode,
+		attributes: dict[str, str],
+		frame_offset: tuple[float, float],
+		is_parent_highlighted: bool,
+	) -> bool:
+		if not element.is_interactive:
+			return False
+
+		if is_parent_highlighted and not self._is_distinct_interaction(document, node, element.tag_name, attributes):
+			return False
+
+		element.is_in_viewport = self._is_in_expanded_viewport(document, node)
+		if not element.is_in_viewport and self.viewport_expansion != -1:
+			return False
+
+		element.highlight_index = self.highlight_index
+		self.highlight_index += 1
+		self.selector_map[element.highlight_index] = element
+
+		rect = self._viewport_rect(document, node)
+		if rect is not None:
+			self.highlight_rects[element.highlight_index] = (
+				rect[0] + frame_offset[0],
+				rect[1] + frame_offset[1],
+				rect[2],
+				rect[3],
+			)
+		return True
+
+	# endregion
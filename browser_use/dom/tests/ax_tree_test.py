@@ -0,0 +1,92 @@
+from browser_use.dom.ax_tree_processor.service import AXTreeProcessor
+from browser_use.dom.views import DOMElementNode, DOMTextNode
+
+
+def _dom(backend_node_id: int, name: str, children: list | None = None, attributes: list | None = None, **extra) -> dict:
+	return {
+		'backendNodeId': backend_node_id,
+		'nodeType': 1,
+		'nodeName': name.upper(),
+		'attributes': attributes or [],
+		'children': children or [],
+		**extra,
+	}
+
+
+DOCUMENT = {
+	'backendNodeId': 1,
+	'nodeType': 9,
+	'nodeName': '#document',
+	'children': [
+		_dom(
+			2,
+			'html',
+			[
+				_dom(
+					3,
+					'body',
+					[
+						{'backendNodeId': 4, 'nodeType': 3, 'nodeName': '#text'},
+						_dom(5, 'input', attributes=['name', 'email', 'type', 'email']),
+						_dom(6, 'button', attributes=['type', 'submit']),
+						_dom(7, 'button', attributes=['disabled', '']),
+						_dom(8, 'my-picker', shadowRoots=[{'nodeType': 11, 'children': [_dom(9, 'button')]}]),
+					],
+				)
+			],
+		)
+	],
+}
+
+
+def _ax(node_id: str, role: str, name: str = '', children: list | None = None, backend_node_id: int | None = None, **extra):
+	return {
+		'nodeId': node_id,
+		'role': {'type': 'role', 'value': role},
+		'name': {'type': 'computedString', 'value': name},
+		'childIds': children or [],
+		'backendDOMNodeId': backend_node_id,
+		**extra,
+	}
+
+
+AX_NODES = [
+	_ax('1', 'RootWebArea', 'Sign up', ['2']),
+	_ax('2', 'generic', children=['3', '4', '5', '7', '8'], ignored=True, parentId='1'),
+	_ax('3', 'StaticText', 'Create your account', ['31'], parentId='2'),
+	_ax('31', 'InlineTextBox', 'Create your account', parentId='3'),
+	_ax('4', 'textbox', 'Email', backend_node_id=5, parentId='2'),
+	_ax('5', 'button', 'Continue', ['6'], backend_node_id=6, parentId='2'),
+	_ax('6', 'StaticText', 'Continue', parentId='5'),
+	_ax(
+		'7',
+		'button',
+		'Back',
+		backend_node_id=7,
+		parentId='2',
+		properties=[{'name': 'disabled', 'value': {'type': 'boolean', 'value': True}}],
+	),
+	_ax('8', 'button', 'Pick a date', backend_node_id=9, parentId='2'),
+]
+
+
+def test_ax_tree_maps_interactive_roles_to_dom_elements():
+	processor = AXTreeProcessor(AX_NODES, DOCUMENT)
+
+	assert processor.interactive_xpaths() == ['html/body/input', 'html/body/button[1]', 'button']
+
+	root, selector_map = processor.build({'html/body/button[1]': False})
+
+	assert [(index, element.tag_name, element.xpath) for index, element in selector_map.items()] == [
+		(0, 'input', 'html/body/input'),
+		(1, 'button', 'button'),
+	]
+	assert selector_map[0].attributes == {'name': 'email', 'type': 'email'}
+	assert selector_map[0].parent is root
+
+	offscreen = root.children[2]
+	assert isinstance(offscreen, DOMElementNode) and offscreen.highlight_index is None and not offscreen.is_in_viewport
+	assert root.clickable_elements_to_string() == '\n'.join(
+		['Create your account', '[0]<input >Email />', 'Continue', '[1]<button >Pick a date />']
+	)
+	assert isinstance(selector_map[1].children[0], DOMTextNode)
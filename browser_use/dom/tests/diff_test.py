@@ -0,0 +1,69 @@
+from browser_use.dom.diff_processor.service import DOMDiffProcessor
+from browser_use.dom.views import DOMElementNode, DOMState
+
+
+def _element(
+	tag_name: str, xpath: str, children: list | None = None, highlight_index: int | None = None, attributes: dict | None = None
+) -> DOMElementNode:
+	node = DOMElementNode(
+		tag_name=tag_name,
+		xpath=xpath,
+		attributes=attributes or {},
+		children=children or [],
+		is_visible=True,
+		parent=None,
+		highlight_index=highlight_index,
+	)
+	for child in node.children:
+		child.parent = node
+	return node
+
+
+def _state(*elements: DOMElementNode) -> DOMState:
+	tree = _element('body', '/body', list(elements))
+	return DOMState(element_tree=tree, selector_map={element.highlight_index: element for element in elements})  # type: ignore
+
+
+def test_diff_classifies_interactive_elements():
+	previous = _state(
+		_element('a', 'html/body/a[1]', highlight_index=0, attributes={'href': '/home'}),
+		_element('input', 'html/body/input', highlight_index=1, attributes={'name': 'q', 'aria-expanded': 'false'}),
+		_element('button', 'html/body/button[1]', highlight_index=2, attributes={'id': 'save'}),
+		_element('a', 'html/body/a[2]', highlight_index=3, attributes={'href': '/logout'}),
+	)
+	current = _state(
+		_element('div', 'html/body/div', highlight_index=0, attributes={'role': 'dialog'}),
+		_element('a', 'html/body/a[1]', highlight_index=1, attributes={'href': '/home'}),
+		_element('input', 'html/body/input', highlight_index=2, attributes={'name': 'q', 'aria-expanded': 'true'}),
+		_element('button', 'html/body/button[2]', highlight_index=3, attributes={'id': 'save'}),
+	)
+
+	diff = DOMDiffProcessor.diff(previous, current)
+
+	assert [element.tag_name for element in diff.added.values()] == ['div']
+	assert [element.attributes['href'] for element in diff.removed.values()] == ['/logout']
+	assert [change.current.tag_name for change in diff.changed.values()] == ['input']
+	assert [(change.previous.highlight_index, change.current.highlight_index) for change in diff.moved.values()] == [
+		(0, 1),
+		(2, 3),
+	]
+
+	assert diff.get_counterpart(previous.selector_map[1]) is current.selector_map[2]
+	assert diff.get_counterpart(previous.selector_map[3]) is None
+	assert [index for index, element in current.selector_map.items() if diff.is_new(element)] == [0, 2]
+	assert diff.to_string().splitlines() == [
+		'+[0]<div>',
+		'-[3]<a>',
+		'~[2]<input> attributes changed',
+		'>[0]->[1]<a>',
+		'>[2]->[3]<button>',
+	]
+
+
+def test_diff_against_no_previous_state_adds_everything():
+	current = _state(_element('button', 'html/body/button', highlight_index=0))
+
+	diff = DOMDiffProcessor.diff(None, current)
+
+	assert list(diff.added.values()) == [current.selector_map[0]]
+	assert not DOMDiffProcessor.diff(current, current).has_changes
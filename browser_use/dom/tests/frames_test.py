@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+
+from browser_use.dom.service import DomService
+from browser_use.dom.views import DOMElementNode
+
+
+def _element(tag_name: str, xpath: str, children: list | None = None, highlight_index: int | None = None) -> DOMElementNode:
+	node = DOMElementNode(
+		tag_name=tag_name,
+		xpath=xpath,
+		attributes={},
+		children=children or [],
+		is_visible=True,
+		parent=None,
+		highlight_index=highlight_index,
+	)
+	for child in node.children:
+		child.parent = node
+	return node
+
+
+class _Frame:
+	def __init__(self, url: str, parent_frame: '_Frame | None'):
+		self.url = url
+		self.parent_frame = parent_frame
+
+
+class _Locator:
+	def filter(self, visible: bool) -> '_Locator':
+		return self
+
+	async def evaluate_all(self, expression: str) -> list[str]:
+		return []
+
+
+class _Page:
+	def __init__(self, main_frame: _Frame, frames: list[_Frame]):
+		self.main_frame = main_frame
+		self.frames = [main_frame, *frames]
+
+	def locator(self, selector: str) -> _Locator:
+		return _Locator()
+
+
+async def test_frames_of_another_scheme_or_port_are_cross_origin():
+	main_frame = _Frame('https://shop.example.com/', None)
+	same_origin = _Frame('https://shop.example.com/reviews', main_frame)
+	other_scheme = _Frame('http://shop.example.com/legacy', main_frame)
+	other_port = _Frame('https://shop.example.com:8443/admin', main_frame)
+	blank = _Frame('about:blank', main_frame)
+
+	page = _Page(main_frame, [same_origin, other_scheme, other_port, blank])
+	frames = await DomService(page=page, cross_origin_iframes=True)._get_cross_origin_frames()  # type: ignore
+
+	assert frames == [other_scheme, other_port]
+
+
+def test_frame_trees_are_stitched_below_their_iframe_with_global_indices():
+	main_frame = _Frame('https://shop.example.com/', None)
+	payment_frame = _Frame('https://pay.example.net/', main_frame)
+	captcha_frame = _Frame('https://captcha.example.org/', payment_frame)
+	broken_frame = _Frame('https://chat.example.io/', main_frame)
+
+	button = _element('button', 'html/body/button', highlight_index=0)
+	payment_iframe = _element('iframe', 'html/body/iframe[1]', highlight_index=1)
+	tree = _element('body', '/body', [button, payment_iframe, _element('iframe', 'html/body/iframe[2]')])
+	selector_map = {0: button, 1: payment_iframe}
+
+	card_input = _element('input', 'html/body/input', highlight_index=0)
+	captcha_iframe = _element('iframe', 'html/body/iframe')
+	payment_tree = _element('body', '/body', [card_input, captcha_iframe])
+	checkbox = _element('div', 'html/body/div', highlight_index=0)
+	captcha_tree = _element('body', '/body', [checkbox])
+
+	dom_service = DomService(page=SimpleNamespace(main_frame=main_frame), cross_origin_iframes=True)  # type: ignore
+	stitched = dom_service._stitch_frame_trees(
+		tree,
+		selector_map,
+		[payment_frame, broken_frame, captcha_frame],  # type: ignore
+		[
+			('html/body/iframe[1]', payment_tree, {0: card_input}),
+			TimeoutError('frame did not respond'),
+			('html/body/iframe', captcha_tree, {0: checkbox}),
+		],
+	)
+
+	assert payment_iframe.children == [payment_tree] and payment_tree.parent is payment_iframe
+	assert captcha_iframe.children == [captcha_tree] and captcha_tree.parent is captcha_iframe
+	assert {index: node.xpath for index, node in selector_map.items()} == {
+		0: 'html/body/button',
+		1: 'html/body/iframe[1]',
+		2: 'html/body/input',
+		3: 'html/body/div',
+	}
+	assert (card_input.highlight_index, checkbox.highlight_index) == (2, 3)
+	assert [(frame.url, [index for index, _ in nodes]) for frame, nodes in stitched] == [
+		('https://pay.example.net/', [2]),
+		('https://captcha.example.org/', [3]),
+	]
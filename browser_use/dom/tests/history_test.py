@@ -0,0 +1,93 @@
+from browser_use.dom.history_tree_processor.service import HistoryTreeProcessor
+from browser_use.dom.views import DOMElementNode, DOMState, DOMTextNode
+
+
+def _element(
+	tag_name: str, xpath: str, children: list | None = None, highlight_index: int | None = None, attributes: dict | None = None
+) -> DOMElementNode:
+	node = DOMElementNode(
+		tag_name=tag_name,
+		xpath=xpath,
+		attributes=attributes or {},
+		children=children or [],
+		is_visible=True,
+		parent=None,
+		highlight_index=highlight_index,
+	)
+	for child in node.children:
+		child.parent = node
+	return node
+
+
+def _state(checkout_attributes: dict) -> DOMState:
+	search = _element('input', 'html/body/form/input', highlight_index=0, attributes={'name': 'q'})
+	checkout = _element(
+		'button',
+		'html/body/div/button',
+		[DOMTextNode(text='Checkout', is_visible=True, parent=None)],
+		highlight_index=1,
+		attributes=checkout_attributes,
+	)
+	tree = _element('body', '/body', [_element('form', 'html/body/form', [search]), _element('div', 'html/body/div', [checkout])])
+	return DOMState(element_tree=tree, selector_map={0: search, 1: checkout})
+
+
+def test_history_element_is_found_through_the_hash_index():
+	recorded = _state({'class': 'btn primary', 'type': 'submit'})
+	history_element = HistoryTreeProcessor.convert_dom_element_to_history_element(recorded.selector_map[1])
+	assert history_element.text == 'Checkout'
+
+	replayed = _state({'class': 'btn primary', 'type': 'submit'})
+	found = HistoryTreeProcessor.find_history_element_in_tree(history_element, replayed.element_tree, replayed.element_hashes)
+	assert found is replayed.selector_map[1]
+	assert HistoryTreeProcessor.find_history_element_in_tree(history_element, replayed.element_tree) is found
+
+
+def test_changed_element_falls_back_to_the_closest_match():
+	history_element = HistoryTreeProcessor.convert_dom_element_to_history_element(
+		_state({'class': 'btn primary', 'type': 'submit'}).selector_map[1]
+	)
+
+	replayed = _state({'class': 'btn primary', 'type': 'submit', 'data-loading': 'false'})
+	assert HistoryTreeProcessor.find_history_element_in_tree(history_element, replayed.element_tree) is None
+	assert HistoryTreeProcessor.find_similar_element(history_element, replayed.selector_map) is replayed.selector_map[1]
+
+	history_element.tag_name = 'a'
+	assert HistoryTreeProcessor.find_similar_element(history_element, replayed.selector_map) is None
+
+
+def _rows_state(row_numbers: list[int]) -> DOMState:
+	buttons = [
+		_element(
+			'button',
+			f'html/body/table/tbody/tr[{row}]/td/button',
+			[DOMTextNode(text='Remove', is_visible=True, parent=None)],
+			highlight_index=index,
+			attributes={'class': 'remove'},
+		)
+		for index, row in enumerate(row_numbers)
+	]
+	tree = _element(
+		'body', '/body', [_element('tr', f'html/body/table/tbody/tr[{row}]', [b]) for row, b in zip(row_numbers, buttons)]
+	)
+	return DOMState(element_tree=tree, selector_map=dict(enumerate(buttons)))
+
+
+def test_repeated_elements_are_ambiguous():
+	history_element = HistoryTreeProcessor.convert_dom_element_to_history_element(_rows_state([1, 2, 3]).selector_map[2])
+
+	# row 3 was deleted, the remove buttons of rows 1 and 2 match equally well
+	replayed = _rows_state([1, 2])
+	assert HistoryTreeProcessor.find_history_element_in_tree(history_element, replayed.element_tree) is None
+	assert HistoryTreeProcessor.find_similar_element(history_element, replayed.selector_map) is None
+
+
+def test_history_without_text_needs_matching_attributes():
+	recorded = _element('button', 'html/body/div[2]/button', highlight_index=0)
+	history_element = HistoryTreeProcessor.convert_dom_element_to_history_element(recorded)
+	# saved by an older version, before the text was recorded
+	history_element.text = None
+
+	# an attribute-less button elsewhere is no evidence for the element that is gone
+	other = _element('button', 'html/body/div[1]/button', highlight_index=0)
+	assert HistoryTreeProcessor.find_similar_element(history_element, {0: other}) is None
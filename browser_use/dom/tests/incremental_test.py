@@ -0,0 +1,71 @@
+from browser_use.dom.service import DomService
+from browser_use.dom.views import DOMElementNode, DOMState, DOMTextNode
+
+
+def _element(tag_name: str, xpath: str, children: list | None = None, highlight_index: int | None = None) -> DOMElementNode:
+	node = DOMElementNode(
+		tag_name=tag_name,
+		xpath=xpath,
+		attributes={},
+		children=children or [],
+		is_visible=True,
+		parent=None,
+		highlight_index=highlight_index,
+	)
+	for child in node.children:
+		child.parent = node
+	return node
+
+
+def _previous_state() -> DOMState:
+	button = _element('button', 'html/body/div/button', highlight_index=0)
+	menu = _element('ul', 'html/body/ul', [_element('li', 'html/body/ul/li', highlight_index=1)])
+	link = _element('a', 'html/body/a', highlight_index=2)
+	body = _element('body', '/body', [_element('div', 'html/body/div', [button]), menu, link])
+	return DOMState(element_tree=body, selector_map={0: button, 1: menu.children[0], 2: link})
+
+
+async def test_patch_replaces_changed_subtree():
+	previous_state = _previous_state()
+	eval_page = {
+		'rootId': None,
+		'map': {
+			'0': {'type': 'TEXT_NODE', 'text': 'Settings', 'isVisible': True},
+			'1': {'tagName': 'li', 'xpath': 'html/body/ul/li[1]', 'children': ['0'], 'highlightIndex': 3},
+			'2': {'tagName': 'li', 'xpath': 'html/body/ul/li[2]', 'children': [], 'highlightIndex': 4},
+			'3': {'tagName': 'ul', 'xpath': 'html/body/ul', 'children': ['1', '2']},
+		},
+		'patches': [{'xpath': 'html/body/ul', 'rootId': '3'}],
+	}
+
+	element_tree, selector_map = await DomService(page=None, incremental=True)._patch_dom_tree(previous_state, eval_page)  # type: ignore
+
+	assert element_tree is previous_state.element_tree
+	assert sorted(selector_map) == [0, 2, 3, 4]
+	new_menu = element_tree.children[1]
+	assert isinstance(new_menu, DOMElementNode)
+	assert new_menu.parent is element_tree
+	assert [child.xpath for child in new_menu.children if isinstance(child, DOMElementNode)] == [
+		'html/body/ul/li[1]',
+		'html/body/ul/li[2]',
+	]
+	assert isinstance(selector_map[3].children[0], DOMTextNode)
+	# the previous selector map must stay untouched, multi_act compares against it
+	assert sorted(previous_state.selector_map) == [0, 1, 2]
+
+
+async def test_patch_removes_subtree_that_disappeared():
+	previous_state = _previous_state()
+	eval_page = {'rootId': None, 'map': {}, 'patches': [{'xpath': 'html/body/ul', 'rootId': None}]}
+
+	element_tree, selector_map = await DomService(page=None, incremental=True)._patch_dom_tree(previous_state, eval_page)  # type: ignore
+
+	assert [child.tag_name for child in element_tree.children if isinstance(child, DOMElementNode)] == ['div', 'a']
+	assert sorted(selector_map) == [0, 2]
+
+
+async def test_patch_gives_up_on_unknown_xpath():
+	previous_state = _previous_state()
+	eval_page = {'rootId': None, 'map': {}, 'patches': [{'xpath': 'html/body/section', 'rootId': None}]}
+
+	assert await DomService(page=None, incremental=True)._patch_dom_tree(previous_state, eval_page) is None  # type: ignore
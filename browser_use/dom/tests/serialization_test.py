@@ -0,0 +1,79 @@
+from browser_use.dom.views import TRUNCATED_ELEMENTS_MARKER, DOMElementNode, DOMTextNode
+
+
+def _element(
+	tag_name: str, children: list | None = None, highlight_index: int | None = None, attributes: dict | None = None
+) -> DOMElementNode:
+	node = DOMElementNode(
+		tag_name=tag_name,
+		xpath=tag_name,
+		attributes=attributes or {},
+		children=children or [],
+		is_visible=True,
+		parent=None,
+		is_top_element=True,
+		highlight_index=highlight_index,
+	)
+	for child in node.children:
+		child.parent = node
+	return node
+
+
+def _text(text: str) -> DOMTextNode:
+	return DOMTextNode(text=text, is_visible=True, parent=None)
+
+
+def _page() -> DOMElementNode:
+	rows = [
+		_element(
+			'tr',
+			[_element('td', [_text(f'Order {i}')]), _element('td', [_element('a', [_text('Open')], highlight_index=i + 1)])],
+			highlight_index=None if i % 2 else i + 100,
+		)
+		for i in range(3)
+	]
+	return _element(
+		'body',
+		[
+			_text('Orders'),
+			_element('button', [_text('Filter')], highlight_index=0, attributes={'aria-label': 'Filter', 'role': 'button'}),
+			_element('table', rows),
+			_element('input', highlight_index=50, attributes={'placeholder': 'Search'}),
+		],
+	)
+
+
+def test_elements_string_matches_per_element_text_walk():
+	page = _page()
+
+	assert page.clickable_elements_to_string(include_attributes=['aria-label', 'role', 'placeholder']) == '\n'.join(
+		[
+			'Orders',
+			'[0]<button >Filter />',
+			'[100]<tr >Order 0 />',
+			'\t[1]<a >Open />',
+			'Order 1',
+			'[2]<a >Open />',
+			'[102]<tr >Order 2 />',
+			'\t[3]<a >Open />',
+			"[50]<input placeholder='Search' />",
+		]
+	)
+
+	texts = page._get_highlighted_texts()
+	stack: list = [page]
+	while stack:
+		node = stack.pop()
+		if isinstance(node, DOMElementNode):
+			if node.highlight_index is not None:
+				assert texts[id(node)] == node.get_all_text_till_next_clickable_element()
+			stack.extend(node.children)
+
+
+def test_elements_string_stops_at_token_budget():
+	page = _page()
+	full = page.clickable_elements_to_string()
+
+	assert page.clickable_elements_to_string(max_tokens=10_000) == full
+	truncated = page.clickable_elements_to_string(max_tokens=10, characters_per_token=3)
+	assert truncated == f'Orders\n[0]<button >Filter />\n{TRUNCATED_ELEMENTS_MARKER}'
@@ -0,0 +1,131 @@
+from browser_use.dom.snapshot_processor.service import SnapshotTreeProcessor, SnapshotViewport
+from browser_use.dom.views import DOMElementNode, DOMTextNode
+
+VISIBLE_STYLES = {'display': 'block', 'visibility': 'visible', 'opacity': '1', 'cursor': 'auto', 'position': 'static'}
+
+
+def _snapshot(documents: list[list[tuple]]) -> dict:
+	"""
+	Encodes documents given as (parent, node_type, name, value, attributes, bounds, styles, extra) rows
+	the way DOMSnapshot.captureSnapshot does, with a shared string table.
+	"""
+	strings: list[str] = []
+
+	def string(value: str | None) -> int:
+		if value is None:
+			return -1
+		if value not in strings:
+			strings.append(value)
+		return strings.index(value)
+
+	encoded = []
+	for rows in documents:
+		nodes = {
+			'parentIndex': [],
+			'nodeType': [],
+			'nodeName': [],
+			'nodeValue': [],
+			'attributes': [],
+			'isClickable': {'index': []},
+			'contentDocumentIndex': {'index': [], 'value': []},
+		}
+		layout = {'nodeIndex': [], 'bounds': [], 'styles': [], 'paintOrders': []}
+		for index, (parent, node_type, name, value, attributes, bounds, styles, extra) in enumerate(rows):
+			nodes['parentIndex'].append(parent)
+			nodes['nodeType'].append(node_type)
+			nodes['nodeName'].append(string(name))
+			nodes['nodeValue'].append(string(value))
+			nodes['attributes'].append([string(item) for pair in attributes.items() for item in pair])
+			if extra.get('clickable'):
+				nodes['isClickable']['index'].append(index)
+			if 'content_document' in extra:
+				nodes['contentDocumentIndex']['index'].append(index)
+				nodes['contentDocumentIndex']['value'].append(extra['content_document'])
+			if bounds is not None:
+				all_styles = {**VISIBLE_STYLES, **styles}
+				layout['nodeIndex'].append(index)
+				layout['bounds'].append(list(bounds))
+				layout['styles'].append(
+					[
+						string(all_styles.get(name, ''))
+						for name in ('display', 'visibility', 'opacity', 'cursor', 'position', 'pointer-events')
+					]
+				)
+				layout['paintOrders'].append(extra.get('paint_order', index))
+		encoded.append({'nodes': nodes, 'layout': layout, 'scrollOffsetX': 0, 'scrollOffsetY': 0})
+
+	return {'documents': encoded, 'strings': strings}
+
+
+PAGE = [
+	# 0
+	(-1, 9, '#document', None, {}, None, {}, {}),
+	(0, 1, 'HTML', None, {}, (0, 0, 800, 600), {}, {}),
+	(1, 1, 'BODY', None, {}, (0, 0, 800, 600), {}, {}),
+	(2, 1, 'DIV', None, {}, (0, 0, 800, 100), {}, {}),
+	(3, 1, 'BUTTON', None, {'type': 'submit'}, (10, 10, 80, 20), {'cursor': 'pointer'}, {}),
+	# 5
+	(4, 3, '#text', 'Sign in', {}, (12, 12, 40, 16), {}, {}),
+	(2, 1, 'DIV', None, {}, (0, 100, 800, 100), {}, {'clickable': True}),
+	(2, 1, 'DIV', None, {'style': 'display: none'}, None, {}, {}),
+	(7, 1, 'BUTTON', None, {}, None, {}, {}),
+	(2, 1, 'A', None, {'class': 'empty'}, (0, 0, 0, 0), {}, {}),
+	# 10 - covered by the overlay at 11
+	(2, 1, 'BUTTON', None, {}, (0, 300, 100, 30), {}, {'paint_order': 10}),
+	(2, 1, 'DIV', None, {}, (0, 250, 800, 200), {'position': 'fixed'}, {'paint_order': 50}),
+	(2, 1, 'BUTTON', None, {}, (0, 2000, 100, 30), {}, {}),
+	(2, 1, 'IFRAME', None, {'src': 'frame.html'}, (100, 500, 300, 100), {}, {'content_document': 1}),
+]
+
+FRAME = [
+	(-1, 9, '#document', None, {}, None, {}, {}),
+	(0, 1, 'HTML', None, {}, (0, 0, 300, 100), {}, {}),
+	(1, 1, 'BODY', None, {}, (0, 0, 300, 100), {}, {}),
+	(2, 1, 'INPUT', None, {'name': 'q'}, (5, 5, 100, 20), {}, {}),
+]
+
+
+def test_snapshot_builds_tree_and_selector_map():
+	processor = SnapshotTreeProcessor(_snapshot([PAGE, FRAME]), SnapshotViewport(width=800, height=600))
+	root, selector_map = processor.build()
+
+	assert root.tag_name == 'body' and root.xpath == '/body'
+	assert [child.xpath for child in root.children if isinstance(child, DOMElementNode)] == [
+		'html/body/div[1]',
+		'html/body/div[2]',
+		'html/body/div[3]',
+		'html/body/button[1]',
+		'html/body/div[4]',
+		'html/body/button[2]',
+		'html/body/iframe',
+	]
+
+	# indices follow the walk order, the covered, hidden and offscreen buttons are skipped
+	assert {index: node.xpath for index, node in selector_map.items()} == {
+		0: 'html/body/div[1]/button',
+		1: 'html/body/div[2]',
+		2: 'html/body/input',
+	}
+
+	button = selector_map[0]
+	assert button.attributes == {'type': 'submit'}
+	assert isinstance(button.children[0], DOMTextNode) and button.children[0].text == 'Sign in'
+	assert button.children[0].parent is button
+
+	hidden_button = root.children[2].children[0]
+	assert isinstance(hidden_button, DOMElementNode) and not hidden_button.is_visible
+
+	covered_button = root.children[3]
+	assert isinstance(covered_button, DOMElementNode) and covered_button.is_visible and not covered_button.is_top_element
+
+	# iframe content is nested under the iframe element and highlighted relative to the top viewport
+	frame_html = root.children[-1].children[0]
+	assert isinstance(frame_html, DOMElementNode) and frame_html.tag_name == 'html'
+	assert selector_map[2].parent.parent is frame_html
+	assert processor.highlight_rects[2] == (105, 505, 100, 20)
+
+
+def test_snapshot_viewport_expansion_minus_one_keeps_offscreen_elements():
+	_, selector_map = SnapshotTreeProcessor(_snapshot([PAGE, FRAME]), SnapshotViewport(width=800, height=600), -1).build()
+
+	assert 'html/body/button[2]' in [node.xpath for node in selector_map.values()]
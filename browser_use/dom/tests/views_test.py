@@ -0,0 +1,59 @@
+import pytest
+
+from browser_use.dom.diff_processor.service import DOMDiffProcessor
+from browser_use.dom.history_tree_processor.service import HistoryTreeProcessor
+from browser_use.dom.service import DomService
+from browser_use.dom.tests.wire_format_test import EVAL_PAGE_COLUMNS, EVAL_PAGE_MAP
+from browser_use.dom.views import EMPTY_ATTRIBUTES, EMPTY_CHILDREN, DOMElementNode, DOMState, DOMTreeArrays
+
+
+async def test_leaves_share_read_only_empty_containers():
+	for eval_page in (EVAL_PAGE_MAP, EVAL_PAGE_COLUMNS):
+		_, selector_map = await DomService(page=None)._construct_dom_tree(eval_page)  # type: ignore
+		div = selector_map[0].parent
+		assert isinstance(div, DOMElementNode)
+		assert div.attributes is EMPTY_ATTRIBUTES
+		assert not hasattr(div, '__dict__')
+
+	with pytest.raises(TypeError):
+		EMPTY_CHILDREN.append(div)
+	with pytest.raises(TypeError):
+		EMPTY_ATTRIBUTES['id'] = 'main'
+
+
+async def test_tree_arrays_round_trip():
+	tree, selector_map = await DomService(page=None)._construct_dom_tree(EVAL_PAGE_MAP)  # type: ignore
+
+	arrays = DOMTreeArrays.from_tree(tree)
+	assert len(arrays) == 5
+	assert list(arrays.parent_indices) == [-1, 0, 1, 1, 2]
+
+	restored_tree, restored_selector_map = arrays.to_tree()
+	assert restored_tree.__json__() == tree.__json__()
+	assert list(restored_selector_map) == list(selector_map)
+	assert restored_selector_map[0].parent.parent is restored_tree  # type: ignore
+
+
+async def test_tree_arrays_state_diffs_like_the_original():
+	tree, selector_map = await DomService(page=None)._construct_dom_tree(EVAL_PAGE_MAP)  # type: ignore
+
+	restored_state = DOMTreeArrays.from_tree(tree).to_state()
+	diff = DOMDiffProcessor.diff(restored_state, DOMState(element_tree=tree, selector_map=selector_map))
+
+	assert not diff.has_changes
+	assert diff.get_counterpart(restored_state.selector_map[0]) is selector_map[0]
+
+
+async def test_element_hash_index_matches_per_element_hashes():
+	tree, selector_map = await DomService(page=None)._construct_dom_tree(EVAL_PAGE_MAP)  # type: ignore
+	state = DOMState(element_tree=tree, selector_map=selector_map)
+
+	index = state.element_hashes
+	assert len(index) == 3
+	button = selector_map[0]
+	assert button._hash is not None
+	assert button.hash == HistoryTreeProcessor._hash_dom_element(button)
+	assert index.get(button.hash) is button
+
+	history_element = HistoryTreeProcessor.convert_dom_element_to_history_element(button)
+	assert HistoryTreeProcessor._hash_dom_history_element(history_element) in index
@@ -0,0 +1,53 @@
+from browser_use.dom.service import DomService
+from browser_use.dom.views import DOMElementNode
+
+EVAL_PAGE_MAP = {
+	'rootId': '4',
+	'map': {
+		'0': {'type': 'TEXT_NODE', 'text': 'Sign in', 'isVisible': True},
+		'1': {
+			'tagName': 'button',
+			'xpath': 'html/body/div/button',
+			'attributes': {'type': 'submit', 'aria-label': 'Sign in'},
+			'children': ['0'],
+			'isVisible': True,
+			'isInteractive': True,
+			'isTopElement': True,
+			'isInViewport': True,
+			'highlightIndex': 0,
+		},
+		'2': {'type': 'TEXT_NODE', 'text': 'hidden', 'isVisible': False},
+		'3': {'tagName': 'div', 'xpath': 'html/body/div', 'attributes': {}, 'children': ['1', '2'], 'isVisible': True},
+		'4': {'tagName': 'body', 'xpath': '/body', 'attributes': {}, 'children': ['3']},
+	},
+}
+
+EVAL_PAGE_COLUMNS = {
+	'format': 'columnar',
+	'rootId': 4,
+	'strings': ['button', 'type', 'aria-label', 'div', 'body'],
+	'tags': [-1, 0, -1, 3, 4],
+	'values': ['Sign in', 'html/body/div/button', 'hidden', 'html/body/div', '/body'],
+	'flags': [1, 15, 0, 1, 0],
+	'highlightIndices': [-1, 0, -1, -1, -1],
+	'attributeOffsets': [0, 0, 2, 2, 2, 2],
+	'attributeKeys': [1, 2],
+	'attributeValues': ['submit', 'Sign in'],
+	'childOffsets': [0, 0, 1, 1, 3, 4],
+	'children': [0, 1, 2, 3],
+}
+
+
+async def test_columnar_output_decodes_to_the_same_tree():
+	dom_service = DomService(page=None)  # type: ignore
+
+	map_tree, map_selector_map = await dom_service._construct_dom_tree(EVAL_PAGE_MAP)
+	columns_tree, columns_selector_map = await dom_service._construct_dom_tree(EVAL_PAGE_COLUMNS)
+
+	assert columns_tree.__json__() == map_tree.__json__()
+	assert list(columns_selector_map) == list(map_selector_map) == [0]
+
+	button = columns_selector_map[0]
+	assert isinstance(button.parent, DOMElementNode) and button.parent.tag_name == 'div'
+	assert button.children[0].parent is button
+	assert (button.is_visible, button.is_interactive, button.is_top_element, button.is_in_viewport) == (True, True, True, True)
@@ -1,8 +1,11 @@
-from dataclasses import dataclass
+import sys
+from array import array
+from collections.abc import Iterator
+from dataclasses import dataclass, field
 from functools import cached_property
 from typing import TYPE_CHECKING, Optional
 
-from browser_use.dom.history_tree_processor.view import CoordinateSet, HashedDomElement, ViewportInfo
+from browser_use.dom.history_tree_processor.view import CoordinateSet, ElementHashIndex, HashedDomElement, ViewportInfo
 from browser_use.utils import time_execution_sync
 
 # Avoid circular import issues
@@ -10,7 +13,51 @@ if TYPE_CHECKING:
 	from .views import DOMElementNode
 
 
-@dataclass(frozen=False)
+# bit flags of DOMElementNode booleans, shared by the columnar buildDomTree.js output and DOMTreeArrays
+FLAG_VISIBLE = 1
+FLAG_INTERACTIVE = 2
+FLAG_TOP_ELEMENT = 4
+FLAG_IN_VIEWPORT = 8
+FLAG_SHADOW_ROOT = 16
+
+# last line of clickable_elements_to_string when max_tokens cut the element list short
+TRUNCATED_ELEMENTS_MARKER = (
+	'... more elements not shown to stay within the token limit - scroll or extract content to see more ...'
+)
+
+
+class _ReadOnlyList(list):
+	"""Shared empty children list of leaf nodes, mutating it in place would leak into every other leaf"""
+
+	def _read_only(self, *args, **kwargs):
+		raise TypeError('Shared empty container is read-only, assign a new list instead')
+
+	append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+	__setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+
+
+class _ReadOnlyDict(dict):
+	"""Shared empty attributes dict of nodes without attributes"""
+
+	def _read_only(self, *args, **kwargs):
+		raise TypeError('Shared empty container is read-only, assign a new dict instead')
+
+	update = pop = popitem = clear = setdefault = _read_only
+	__setitem__ = __delitem__ = __ior__ = _read_only
+
+
+EMPTY_CHILDREN: list['DOMBaseNode'] = _ReadOnlyList()
+EMPTY_ATTRIBUTES: dict[str, str] = _ReadOnlyDict()
+
+
+def intern_attributes(attributes: dict[str, str]) -> dict[str, str]:
+	"""Interns the attribute keys, empty attributes share EMPTY_ATTRIBUTES"""
+	if not attributes:
+		return EMPTY_ATTRIBUTES
+	return {sys.intern(key): value for key, value in attributes.items()}
+
+
+@dataclass(frozen=False, slots=True)
 class DOMBaseNode:
 	is_visible: bool
 	# Use None as default and set parent later to avoid circular reference issues
@@ -20,7 +67,7 @@ class DOMBaseNode:
 		raise NotImplementedError('DOMBaseNode is an abstract class')
 
 
-@dataclass(frozen=False)
+@dataclass(frozen=False, slots=True)
 class DOMTextNode(DOMBaseNode):
 	text: str
 	type: str = 'TEXT_NODE'
@@ -52,7 +99,7 @@ class DOMTextNode(DOMBaseNode):
 		}
 
 
-@dataclass(frozen=False)
+@dataclass(frozen=False, slots=True)
 class DOMElementNode(DOMBaseNode):
 	"""
 	xpath: the xpath of the element from the last root node (shadow root or iframe OR document if no shadow root or iframe).
@@ -79,6 +126,12 @@ class DOMElementNode(DOMBaseNode):
 	"""
 	is_new: bool | None = None
 
+	_hash: HashedDomElement | None = field(default=None, init=False, repr=False, compare=False)
+
+	def __post_init__(self) -> None:
+		# thousands of nodes share a handful of tag names
+		self.tag_name = sys.intern(self.tag_name)
+
 	def __json__(self) -> dict:
 		return {
 			'tag_name': self.tag_name,
@@ -121,13 +174,15 @@ class DOMElementNode(DOMBaseNode):
 
 		return tag_str
 
-	@cached_property
+	@property
 	def hash(self) -> HashedDomElement:
-		from browser_use.dom.history_tree_processor.service import (
-			HistoryTreeProcessor,
-		)
+		if self._hash is None:
+			from browser_use.dom.history_tree_processor.service import (
+				HistoryTreeProcessor,
+			)
 
-		return HistoryTreeProcessor._hash_dom_element(self)
+			self._hash = HistoryTreeProcessor._hash_dom_element(self)
+		return self._hash
 
 	def get_all_text_till_next_clickable_element(self, max_depth: int = -1) -> str:
 		text_parts = []
@@ -137,7 +192,7 @@ class DOMElementNode(DOMBaseNode):
 				return
 
 			# Skip this branch if we hit a highlighted element (except for the current node)
-			if isinstance(node, DOMElementNode) and node != self and node.highlight_index is not None:
+			if isinstance(node, DOMElementNode) and node is not self and node.highlight_index is not None:
 				return
 
 			if isinstance(node, DOMTextNode):
@@ -150,88 +205,82 @@ class DOMElementNode(DOMBaseNode):
 		return '\n'.join(text_parts).strip()
 
 	@time_execution_sync('--clickable_elements_to_string')
-	def clickable_elements_to_string(self, include_attributes: list[str] | None = None) -> str:
-		"""Convert the processed DOM content to HTML."""
+	def clickable_elements_to_string(
+		self, include_attributes: list[str] | None = None, max_tokens: int | None = None, characters_per_token: int = 3
+	) -> str:
+		"""
+		Convert the processed DOM content to HTML.
+
+		With max_tokens the serialization stops before the first line that would exceed the budget and ends with
+		TRUNCATED_ELEMENTS_MARKER, so an oversized page is cut at an element boundary instead of mid-line.
+		"""
+		lines = self.iter_clickable_elements_lines(include_attributes)
+		if max_tokens is None:
+			return '\n'.join(lines)
+
+		remaining_characters = max_tokens * characters_per_token
 		formatted_text = []
+		for line in lines:
+			remaining_characters -= len(line) + 1
+			if remaining_characters < 0:
+				formatted_text.append(TRUNCATED_ELEMENTS_MARKER)
+				break
+			formatted_text.append(line)
+		return '\n'.join(formatted_text)
 
-		def process_node(node: DOMBaseNode, depth: int) -> None:
-			next_depth = int(depth)
-			depth_str = depth * '\t'
+	def iter_clickable_elements_lines(self, include_attributes: list[str] | None = None) -> Iterator[str]:
+		"""Lines of clickable_elements_to_string in document order, generated lazily by an iterative pre-order walk"""
+		texts = self._get_highlighted_texts()
 
-			if isinstance(node, DOMElementNode):
-				# Add element with highlight_index
-				if node.highlight_index is not None:
-					next_depth += 1
-
-					text = node.get_all_text_till_next_clickable_element()
-					attributes_html_str = ''
-					if include_attributes:
-						attributes_to_include = {
-							key: str(value) for key, value in node.attributes.items() if key in include_attributes
-						}
-
-						# Easy LLM optimizations
-						# if tag == role attribute, don't include it
-						if node.tag_name == attributes_to_include.get('role'):
-							del attributes_to_include['role']
-
-						# if aria-label == text of the node, don't include it
-						if (
-							attributes_to_include.get('aria-label')
-							and attributes_to_include.get('aria-label', '').strip() == text.strip()
-						):
-							del attributes_to_include['aria-label']
-
-						# if placeholder == text of the node, don't include it
-						if (
-							attributes_to_include.get('placeholder')
-							and attributes_to_include.get('placeholder', '').strip() == text.strip()
-						):
-							del attributes_to_include['placeholder']
-
-						if attributes_to_include:
-							# Format as key1='value1' key2='value2'
-							attributes_html_str = ' '.join(f"{key}='{value}'" for key, value in attributes_to_include.items())
-
-					# Build the line
-					if node.is_new:
-						highlight_indicator = f'*[{node.highlight_index}]*'
-					else:
-						highlight_indicator = f'[{node.highlight_index}]'
-
-					line = f'{depth_str}{highlight_indicator}<{node.tag_name}'
-
-					if attributes_html_str:
-						line += f' {attributes_html_str}'
-
-					if text:
-						# Add space before >text only if there were NO attributes added before
-						if not attributes_html_str:
-							line += ' '
-						line += f'>{text}'
-					# Add space before /> only if neither attributes NOR text were added
-					elif not attributes_html_str:
-						line += ' '
-
-					line += ' />'  # 1 token
-					formatted_text.append(line)
-
-				# Process children regardless
-				for child in node.children:
-					process_node(child, next_depth)
+		# text nodes below a highlighted ancestor are part of that element's line, even if it is outside this subtree
+		below_highlight = False
+		ancestor = self.parent
+		while ancestor is not None and not below_highlight:
+			below_highlight = ancestor.highlight_index is not None
+			ancestor = ancestor.parent
 
-			elif isinstance(node, DOMTextNode):
+		stack: list[tuple[DOMBaseNode, int, bool]] = [(self, 0, below_highlight)]
+		while stack:
+			node, depth, below_highlight = stack.pop()
+
+			if isinstance(node, DOMTextNode):
 				# Add text only if it doesn't have a highlighted parent
-				if (
-					not node.has_parent_with_highlight_index()
-					and node.parent
-					and node.parent.is_visible
-					and node.parent.is_top_element
-				):  # and node.is_parent_top_element()
-					formatted_text.append(f'{depth_str}{node.text}')
-
-		process_node(self, 0)
-		return '\n'.join(formatted_text)
+				if not below_highlight and node.parent and node.parent.is_visible and node.parent.is_top_element:
+					depth_str = depth * '\t'
+					yield f'{depth_str}{node.text}'
+				continue
+
+			if not isinstance(node, DOMElementNode):
+				continue
+
+			if node.highlight_index is not None:
+				yield _format_clickable_element(node, texts[id(node)], depth, include_attributes)
+				depth += 1
+				below_highlight = True
+
+			# Process children regardless, reversed so they are popped in document order
+			stack.extend((child, depth, below_highlight) for child in reversed(node.children))
+
+	def _get_highlighted_texts(self) -> dict[int, str]:
+		"""
+		Text of every highlighted element in this subtree keyed by id(), computed in a single walk.
+
+		Every text node belongs to its nearest highlighted ancestor, so this gives the same result as calling
+		get_all_text_till_next_clickable_element on each highlighted element without re-walking nested subtrees.
+		"""
+		text_parts: dict[int, list[str]] = {}
+		stack: list[tuple[DOMBaseNode, list[str] | None]] = [(self, None)]
+		while stack:
+			node, owner_parts = stack.pop()
+			if isinstance(node, DOMTextNode):
+				if owner_parts is not None:
+					owner_parts.append(node.text)
+			elif isinstance(node, DOMElementNode):
+				if node.highlight_index is not None:
+					owner_parts = text_parts[id(node)] = []
+				stack.extend((child, owner_parts) for child in reversed(node.children))
+
+		return {node_id: '\n'.join(parts).strip() for node_id, parts in text_parts.items()}
 
 	def get_file_upload_element(self, check_siblings: bool = True) -> Optional['DOMElementNode']:
 		# Check if current element is a file input
@@ -256,6 +305,54 @@ class DOMElementNode(DOMBaseNode):
 		return None
 
 
+def _format_clickable_element(node: DOMElementNode, text: str, depth: int, include_attributes: list[str] | None = None) -> str:
+	"""Line of a highlighted element in clickable_elements_to_string, text is its get_all_text_till_next_clickable_element"""
+	depth_str = depth * '\t'
+	attributes_html_str = ''
+	if include_attributes:
+		attributes_to_include = {key: str(value) for key, value in node.attributes.items() if key in include_attributes}
+
+		# Easy LLM optimizations
+		# if tag == role attribute, don't include it
+		if node.tag_name == attributes_to_include.get('role'):
+			del attributes_to_include['role']
+
+		# if aria-label == text of the node, don't include it
+		if attributes_to_include.get('aria-label') and attributes_to_include.get('aria-label', '').strip() == text.strip():
+			del attributes_to_include['aria-label']
+
+		# if placeholder == text of the node, don't include it
+		if attributes_to_include.get('placeholder') and attributes_to_include.get('placeholder', '').strip() == text.strip():
+			del attributes_to_include['placeholder']
+
+		if attributes_to_include:
+			# Format as key1='value1' key2='value2'
+			attributes_html_str = ' '.join(f"{key}='{value}'" for key, value in attributes_to_include.items())
+
+	# Build the line
+	if node.is_new:
+		highlight_indicator = f'*[{node.highlight_index}]*'
+	else:
+		highlight_indicator = f'[{node.highlight_index}]'
+
+	line = f'{depth_str}{highlight_indicator}<{node.tag_name}'
+
+	if attributes_html_str:
+		line += f' {attributes_html_str}'
+
+	if text:
+		# Add space before >text only if there were NO attributes added before
+		if not attributes_html_str:
+			line += ' '
+		line += f'>{text}'
+	# Add space before /> only if neither attributes NOR text were added
+	elif not attributes_html_str:
+		line += ' '
+
+	line += ' />'  # 1 token
+	return line
+
+
 SelectorMap = dict[int, DOMElementNode]
 
 
@@ -263,3 +360,108 @@ SelectorMap = dict[int, DOMElementNode]
 class DOMState:
 	element_tree: DOMElementNode
 	selector_map: SelectorMap
+
+	@cached_property
+	def element_hashes(self) -> ElementHashIndex:
+		"""Hash index of the whole element tree, built on first use. Also caches DOMElementNode.hash of every element."""
+		from browser_use.dom.history_tree_processor.service import HistoryTreeProcessor
+
+		return HistoryTreeProcessor.build_element_hash_index(self.element_tree)
+
+
+@dataclass(slots=True)
+class DOMTreeArrays:
+	"""
+	Array-backed copy of a DOM tree for states that are kept around but rarely read.
+
+	Nodes are stored in breadth-first order with the root at 0, so the children of node i are the
+	consecutive nodes child_offsets[i] to child_offsets[i + 1]. Text nodes have tag_name None and keep
+	their text in values, elements keep their xpath there. Coordinates, viewport info and is_new are not kept.
+	"""
+
+	tag_names: list[str | None]
+	values: list[str]
+	attributes: list[dict[str, str]]
+	flags: bytearray
+	highlight_indices: array  # -1 = not highlighted
+	parent_indices: array  # -1 = root
+	child_offsets: array
+
+	def __len__(self) -> int:
+		return len(self.tag_names)
+
+	@classmethod
+	def from_tree(cls, root: DOMElementNode) -> 'DOMTreeArrays':
+		tree = cls([], [], [], bytearray(), array('i'), array('i'), array('I', [1]))
+
+		queue: list[tuple[DOMBaseNode, int]] = [(root, -1)]
+		for index, (node, parent_index) in enumerate(queue):
+			tree.parent_indices.append(parent_index)
+
+			if isinstance(node, DOMTextNode):
+				tree.tag_names.append(None)
+				tree.values.append(node.text)
+				tree.attributes.append(EMPTY_ATTRIBUTES)
+				tree.flags.append(FLAG_VISIBLE if node.is_visible else 0)
+				tree.highlight_indices.append(-1)
+				tree.child_offsets.append(tree.child_offsets[-1])
+				continue
+
+			assert isinstance(node, DOMElementNode)
+			tree.tag_names.append(node.tag_name)
+			tree.values.append(node.xpath)
+			tree.attributes.append(node.attributes or EMPTY_ATTRIBUTES)
+			tree.flags.append(
+				(FLAG_VISIBLE if node.is_visible else 0)
+				| (FLAG_INTERACTIVE if node.is_interactive else 0)
+				| (FLAG_TOP_ELEMENT if node.is_top_element else 0)
+				| (FLAG_IN_VIEWPORT if node.is_in_viewport else 0)
+				| (FLAG_SHADOW_ROOT if node.shadow_root else 0)
+			)
+			tree.highlight_indices.append(node.highlight_index if node.highlight_index is not None else -1)
+			tree.child_offsets.append(tree.child_offsets[-1] + len(node.children))
+			queue.extend((child, index) for child in node.children)
+
+		return tree
+
+	def to_tree(self) -> tuple[DOMElementNode, SelectorMap]:
+		"""Materializes the nodes again, children are built before their parents"""
+		nodes: list[DOMBaseNode | None] = [None] * len(self)
+		selector_map: SelectorMap = {}
+
+		for index in range(len(self) - 1, -1, -1):
+			tag_name = self.tag_names[index]
+			node_flags = self.flags[index]
+
+			if tag_name is None:
+				nodes[index] = DOMTextNode(text=self.values[index], is_visible=bool(node_flags & FLAG_VISIBLE), parent=None)
+				continue
+
+			children = nodes[self.child_offsets[index] : self.child_offsets[index + 1]]
+			highlight_index = self.highlight_indices[index]
+			element = DOMElementNode(
+				tag_name=tag_name,
+				xpath=self.values[index],
+				attributes=self.attributes[index],
+				children=children if children else EMPTY_CHILDREN,  # type: ignore
+				is_visible=bool(node_flags & FLAG_VISIBLE),
+				is_interactive=bool(node_flags & FLAG_INTERACTIVE),
+				is_top_element=bool(node_flags & FLAG_TOP_ELEMENT),
+				is_in_viewport=bool(node_flags & FLAG_IN_VIEWPORT),
+				shadow_root=bool(node_flags & FLAG_SHADOW_ROOT),
+				highlight_index=highlight_index if highlight_index >= 0 else None,
+				parent=None,
+			)
+			for child in element.children:
+				child.parent = element
+			if element.highlight_index is not None:
+				selector_map[element.highlight_index] = element
+			nodes[index] = element
+
+		root = nodes[0]
+		assert isinstance(root, DOMElementNode)
+		return root, dict(sorted(selector_map.items()))
+
+	def to_state(self) -> DOMState:
+		element_tree, selector_map = self.to_tree()
+		return DOMState(element_tree=element_tree, selector_map=selector_map)
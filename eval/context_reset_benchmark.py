@@ -0,0 +1,228 @@
+# ==============================================================================================================
+# Browser context reset benchmark.
+#
+# Runs a small task in a BrowserContext over and over and resets the context between tasks, either with
+# BrowserContext.soft_reset (clear cookies, storage, service workers and cache via CDP, one fresh tab) or by closing
+# the context and creating a new one. Per strategy it reports p50/p95 latency of:
+#   - reset: resetting the context after a task
+#   - first_navigation: the first page load of the next task
+# and whether any cookie, localStorage, IndexedDB data or service worker of the previous tasks survived the reset.
+
+# Here is the command to run the benchmark:
+# python eval/context_reset_benchmark.py --runs 20 --output context_reset_benchmark.json
+# options:
+# --runs: Measured tasks per strategy (after one warmup task)
+# --tabs: Extra tabs every task opens, a reset has to close them
+# --strategies: Reset strategies to compare, any of soft and recreate
+# ==============================================================================================================
+import argparse
+import asyncio
+import json
+import logging
+import math
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from browser_use.browser.browser import Browser, BrowserConfig
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('soft', 'recreate')
+STAGES = ('reset', 'first_navigation')
+
+# leaves a cookie, localStorage, IndexedDB and a service worker behind, like a logged in web app would
+TASK_PAGE = """<!doctype html>
+<html>
+<body>
+<h1>Task page</h1>
+<script>
+	document.cookie = 'session=task; max-age=3600';
+	localStorage.setItem('draft', 'x'.repeat(10000));
+	indexedDB.open('task-db', 1).onupgradeneeded = (event) => event.target.result.createObjectStore('items');
+	navigator.serviceWorker?.register('/worker.js');
+</script>
+</body>
+</html>
+"""
+
+LEAKED_STATE_JS = """async () => ({
+	cookies: document.cookie,
+	local_storage: localStorage.length,
+	indexed_db: (await indexedDB.databases()).map((db) => db.name),
+	service_workers: (await navigator.serviceWorker.getRegistrations()).length,
+})"""
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+	def log_message(self, format, *args):
+		pass
+
+
+def start_static_server(directory: Path) -> ThreadingHTTPServer:
+	server = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory=str(directory)))
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	return server
+
+
+def percentile(values: list[float], p: float) -> float:
+	"""Nearest-rank percentile, stable for the small sample sizes of a benchmark run"""
+	ordered = sorted(values)
+	return ordered[max(0, math.ceil(p * len(ordered)) - 1)]
+
+
+def summarize(timings: list[float]) -> dict:
+	return {
+		'p50_ms': round(percentile(timings, 0.5), 3),
+		'p95_ms': round(percentile(timings, 0.95), 3),
+		'mean_ms': round(sum(timings) / len(timings), 3),
+	}
+
+
+def git_commit() -> str | None:
+	try:
+		return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+async def run_task(context: BrowserContext, url: str, tabs: int) -> float:
+	"""Loads the task page in the agent tab and in extra tabs, returns the first navigation time"""
+	page = await context.get_agent_current_page()
+	start = time.perf_counter()
+	await page.goto(url, wait_until='load')
+	first_navigation = time.perf_counter() - start
+
+	session = await context.get_session()
+	for _ in range(tabs):
+		tab = await session.context.new_page()
+		await tab.goto(url, wait_until='load')
+	# give the service worker registration a moment to finish
+	await page.wait_for_timeout(100)
+	return first_navigation
+
+
+async def reset(context: BrowserContext, strategy: str) -> None:
+	if strategy == 'soft':
+		await context.soft_reset()
+	else:
+		await context.close()
+		await context.get_session()
+
+
+async def leaked_state(context: BrowserContext, url: str) -> dict:
+	"""State of the previous tasks visible on the task origin after a reset"""
+	page = await context.get_agent_current_page()
+	# a page of the same origin that does not write any state itself
+	await page.goto(url.replace('index.html', 'check.html'), wait_until='load')
+	state = await page.evaluate(LEAKED_STATE_JS)
+	return {key: value for key, value in state.items() if value}
+
+
+async def benchmark_strategy(browser: Browser, strategy: str, url: str, runs: int, tabs: int) -> dict:
+	context = BrowserContext(browser=browser, config=BrowserContextConfig())
+	timings: dict[str, list[float]] = {stage: [] for stage in STAGES}
+	try:
+		await context.get_session()
+		# the first task warms up the browser process and the server
+		for run in range(runs + 1):
+			first_navigation = await run_task(context, url, tabs)
+
+			start = time.perf_counter()
+			await reset(context, strategy)
+			reset_time = time.perf_counter() - start
+
+			if run == 0:
+				continue
+			# every navigation but the warmup one follows a reset
+			timings['first_navigation'].append(first_navigation * 1000)
+			timings['reset'].append(reset_time * 1000)
+
+		leaks = await leaked_state(context, url)
+	finally:
+		await context.close()
+
+	return {
+		'latency': {stage: summarize(values) for stage, values in timings.items() if values},
+		'leaked_state': leaks,
+	}
+
+
+async def run_benchmark(strategies: list[str], runs: int, tabs: int, headless: bool) -> dict:
+	with tempfile.TemporaryDirectory() as directory:
+		(Path(directory) / 'index.html').write_text(TASK_PAGE)
+		(Path(directory) / 'check.html').write_text('<!doctype html><title>Check</title>')
+		(Path(directory) / 'worker.js').write_text("self.addEventListener('fetch', () => {});")
+		server = start_static_server(Path(directory))
+		url = f'http://127.0.0.1:{server.server_address[1]}/index.html'
+
+		browser = Browser(config=BrowserConfig(headless=headless))
+		results = {}
+		try:
+			playwright_browser = await browser.get_playwright_browser()
+			for strategy in strategies:
+				logger.info(f'Benchmarking {strategy} reset')
+				results[strategy] = await benchmark_strategy(browser, strategy, url, runs, tabs)
+			browser_version = playwright_browser.version
+		finally:
+			await browser.close()
+			server.shutdown()
+
+	return {
+		'meta': {
+			'commit': git_commit(),
+			'timestamp': datetime.now().isoformat(timespec='seconds'),
+			'python': platform.python_version(),
+			'browser': browser_version,
+			'runs': runs,
+			'tabs': tabs,
+		},
+		'strategies': results,
+	}
+
+
+def compare(results: dict) -> list[str]:
+	"""One line per stage with the p50 of every strategy, relative to the first one"""
+	strategies = list(results['strategies'])
+	lines = []
+	for stage in STAGES:
+		base = results['strategies'][strategies[0]]['latency'].get(stage)
+		for strategy in strategies:
+			latency = results['strategies'][strategy]['latency'].get(stage)
+			if not latency or not base:
+				continue
+			ratio = latency['p50_ms'] / base['p50_ms'] if base['p50_ms'] else 0.0
+			lines.append(f'{stage:<18} {strategy:<10} {latency["p50_ms"]:>9.2f}ms ({ratio:.2f}x {strategies[0]})')
+	for strategy in strategies:
+		if leaks := results['strategies'][strategy]['leaked_state']:
+			lines.append(f'{strategy}: state survived the reset: {leaks}')
+	return lines
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Benchmark soft context reset against closing and recreating the context')
+	parser.add_argument('--runs', type=int, default=10, help='Measured tasks per strategy')
+	parser.add_argument('--tabs', type=int, default=2, help='Extra tabs every task opens')
+	parser.add_argument('--strategies', nargs='+', choices=STRATEGIES, default=list(STRATEGIES), help='Reset strategies')
+	parser.add_argument('--headful', action='store_true', help='Show the browser window')
+	parser.add_argument('--output', type=Path, default=None, help='Write the results JSON to this file')
+	args = parser.parse_args()
+
+	results = asyncio.run(run_benchmark(args.strategies, args.runs, args.tabs, not args.headful))
+
+	output = json.dumps(results, indent=2)
+	if args.output:
+		args.output.write_text(output)
+		logger.info(f'Results saved to {args.output}')
+	else:
+		print(output)
+
+	print('\n'.join(compare(results)))
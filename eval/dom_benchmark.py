@@ -0,0 +1,231 @@
+# ==============================================================================================================
+# Offline DOM extraction benchmark.
+#
+# Serves the saved pages in eval/dom_corpus from a local static server and measures the DOM pipeline per page:
+#   - DomService.get_clickable_elements (in-page extraction + tree construction, end to end)
+#   - DomService._construct_dom_tree (python side parsing of the buildDomTree.js payload)
+#   - DOMElementNode.clickable_elements_to_string (prompt serialization)
+#   - ClickableElementProcessor.get_clickable_elements_hashes
+# and reports p50/p95 latency, payload bytes, node counts and estimated prompt tokens as JSON.
+
+# Here is the command to run the benchmark:
+# python eval/dom_benchmark.py --runs 20 --output dom_benchmark.json
+# options:
+# --corpus: Directory with the saved .html pages
+# --runs: Measured runs per page (after one warmup run)
+# --viewport-expansion: Passed to get_clickable_elements, -1 includes the whole page
+# --highlight: Draw highlights while extracting
+# --compare: Previous results file, prints the p50 change per page and stage
+
+# Compare two commits. The base commit may not have this script or the corpus yet, so run a copy from outside the tree:
+# cp -r eval/dom_benchmark.py eval/dom_corpus /tmp/
+# git checkout <base-commit> && PYTHONPATH=. python /tmp/dom_benchmark.py --corpus /tmp/dom_corpus --output /tmp/base.json
+# git checkout my-branch && python eval/dom_benchmark.py --compare /tmp/base.json
+# ==============================================================================================================
+import argparse
+import asyncio
+import json
+import logging
+import math
+import platform
+import subprocess
+import threading
+import time
+from datetime import datetime
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from playwright.async_api import async_playwright
+
+from browser_use.agent.message_manager.service import MessageManagerSettings
+from browser_use.agent.views import AgentSettings
+from browser_use.dom.clickable_element_processor.service import ClickableElementProcessor
+from browser_use.dom.service import DomService
+from browser_use.dom.views import DOMElementNode, DOMTextNode
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CORPUS_DIR = Path(__file__).parent / 'dom_corpus'
+STAGES = ('get_clickable_elements', 'construct_dom_tree', 'clickable_elements_to_string', 'get_clickable_elements_hashes')
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+	def log_message(self, format, *args):
+		pass
+
+
+def start_static_server(directory: Path) -> ThreadingHTTPServer:
+	server = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory=str(directory)))
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	return server
+
+
+def percentile(values: list[float], p: float) -> float:
+	"""Nearest-rank percentile, stable for the small sample sizes of a benchmark run"""
+	ordered = sorted(values)
+	return ordered[max(0, math.ceil(p * len(ordered)) - 1)]
+
+
+def summarize(timings: list[float]) -> dict:
+	return {
+		'p50_ms': round(percentile(timings, 0.5), 3),
+		'p95_ms': round(percentile(timings, 0.95), 3),
+		'mean_ms': round(sum(timings) / len(timings), 3),
+	}
+
+
+def count_nodes(root: DOMElementNode) -> dict:
+	elements = texts = 0
+	stack = [root]
+	while stack:
+		node = stack.pop()
+		if isinstance(node, DOMTextNode):
+			texts += 1
+			continue
+		elements += 1
+		stack.extend(node.children)  # type: ignore
+	return {'elements': elements, 'text_nodes': texts}
+
+
+def git_commit() -> str | None:
+	try:
+		return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+async def benchmark_page(page, url: str, runs: int, viewport_expansion: int, highlight: bool) -> dict:
+	await page.goto(url, wait_until='load')
+	dom_service = DomService(page)
+	settings = MessageManagerSettings()
+	# serialize with the attributes the agent includes by default
+	include_attributes = AgentSettings().include_attributes
+
+	args = {
+		'doHighlightElements': False,
+		'focusHighlightIndex': -1,
+		'viewportExpansion': viewport_expansion,
+		'debugMode': False,
+	}
+
+	timings: dict[str, list[float]] = {stage: [] for stage in STAGES}
+	result = {}
+
+	# the first run registers buildDomTree.js in the document and warms up both sides
+	for run in range(runs + 1):
+		await page.evaluate("document.getElementById('playwright-highlight-container')?.remove()")
+
+		start = time.perf_counter()
+		state = await dom_service.get_clickable_elements(highlight_elements=highlight, viewport_expansion=viewport_expansion)
+		get_clickable_elements_time = time.perf_counter() - start
+
+		# the full script source, so the copy of this file also runs against older commits
+		eval_page = await page.evaluate(dom_service.js_code, args)
+		start = time.perf_counter()
+		await dom_service._construct_dom_tree(eval_page)
+		construct_time = time.perf_counter() - start
+
+		start = time.perf_counter()
+		prompt = state.element_tree.clickable_elements_to_string(include_attributes=include_attributes)
+		to_string_time = time.perf_counter() - start
+
+		start = time.perf_counter()
+		ClickableElementProcessor.get_clickable_elements_hashes(state.element_tree)
+		hashes_time = time.perf_counter() - start
+
+		if run == 0:
+			result = {
+				'payload_bytes': len(json.dumps(eval_page, ensure_ascii=False).encode()),
+				'nodes': {**count_nodes(state.element_tree), 'interactive': len(state.selector_map)},
+				'prompt_chars': len(prompt),
+				'prompt_tokens_estimate': len(prompt) // settings.estimated_characters_per_token,
+			}
+			continue
+
+		timings['get_clickable_elements'].append(get_clickable_elements_time * 1000)
+		timings['construct_dom_tree'].append(construct_time * 1000)
+		timings['clickable_elements_to_string'].append(to_string_time * 1000)
+		timings['get_clickable_elements_hashes'].append(hashes_time * 1000)
+
+	result['latency'] = {stage: summarize(values) for stage, values in timings.items()}
+	return result
+
+
+async def run_benchmark(
+	corpus: Path, pages: list[Path], runs: int, viewport_expansion: int, highlight: bool, headless: bool
+) -> dict:
+	server = start_static_server(corpus)
+	base_url = f'http://127.0.0.1:{server.server_address[1]}'
+	results = {}
+	try:
+		async with async_playwright() as playwright:
+			browser = await playwright.chromium.launch(headless=headless)
+			context = await browser.new_context(viewport={'width': 1280, 'height': 1100})
+			page = await context.new_page()
+			for path in pages:
+				logger.info(f'Benchmarking {path.name}')
+				results[path.name] = await benchmark_page(page, f'{base_url}/{path.name}', runs, viewport_expansion, highlight)
+			browser_version = browser.version
+			await browser.close()
+	finally:
+		server.shutdown()
+
+	return {
+		'meta': {
+			'commit': git_commit(),
+			'timestamp': datetime.now().isoformat(timespec='seconds'),
+			'python': platform.python_version(),
+			'browser': browser_version,
+			'runs': runs,
+			'viewport_expansion': viewport_expansion,
+			'highlight': highlight,
+		},
+		'pages': results,
+	}
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+	"""One line per page and stage with the p50 change against the baseline"""
+	lines = [f'Compared with {baseline["meta"].get("commit")} ({baseline["meta"].get("timestamp")})']
+	for name, page in results['pages'].items():
+		base_page = baseline['pages'].get(name)
+		if base_page is None:
+			lines.append(f'{name}: not in baseline')
+			continue
+		for stage in STAGES:
+			new, old = page['latency'][stage]['p50_ms'], base_page['latency'][stage]['p50_ms']
+			change = (new - old) / old * 100 if old else 0.0
+			lines.append(f'{name:<24} {stage:<30} {old:>9.2f}ms -> {new:>9.2f}ms ({change:+.1f}%)')
+		if page['payload_bytes'] != base_page['payload_bytes']:
+			lines.append(f'{name:<24} payload_bytes {base_page["payload_bytes"]} -> {page["payload_bytes"]}')
+	return lines
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Benchmark DOM extraction over a saved page corpus')
+	parser.add_argument('--corpus', type=Path, default=CORPUS_DIR, help='Directory with the saved .html pages')
+	parser.add_argument('--runs', type=int, default=10, help='Measured runs per page')
+	parser.add_argument('--viewport-expansion', type=int, default=0, help='Viewport expansion, -1 for the whole page')
+	parser.add_argument('--highlight', action='store_true', help='Draw highlights while extracting')
+	parser.add_argument('--headful', action='store_true', help='Show the browser window')
+	parser.add_argument('--output', type=Path, default=None, help='Write the results JSON to this file')
+	parser.add_argument('--compare', type=Path, default=None, help='Previous results JSON to compare against')
+	args = parser.parse_args()
+
+	pages = sorted(args.corpus.glob('*.html'))
+	if not pages:
+		raise SystemExit(f'No .html pages found in {args.corpus}')
+
+	results = asyncio.run(run_benchmark(args.corpus, pages, args.runs, args.viewport_expansion, args.highlight, not args.headful))
+
+	output = json.dumps(results, indent=2)
+	if args.output:
+		args.output.write_text(output)
+		logger.info(f'Results saved to {args.output}')
+	else:
+		print(output)
+
+	if args.compare:
+		print('\n'.join(compare(results, json.loads(args.compare.read_text()))))
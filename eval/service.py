@@ -300,6 +300,9 @@ from langchain_openai import ChatOpenAI
 from pydantic.types import SecretStr
 
 from browser_use import Agent, Browser, BrowserConfig
+from browser_use.browser.context import BrowserContext
+from browser_use.browser.pool import BrowserPool, BrowserPoolConfig
+from browser_use.browser.screenshot_store import ScreenshotStore
 
 SUPPORTED_MODELS = {
 	# Anthropic
@@ -448,6 +451,8 @@ class TaskTracker:
 		self.step_results = []
 		self.step_counter = 0
 		self.screenshots = []
+		# steps that end on the same screen share one file
+		self.screenshot_store = ScreenshotStore(self.trajectory_folder)
 		self.setup_folders()
 
 	def setup_folders(self):
@@ -463,12 +468,10 @@ class TaskTracker:
 		"""Record information at the end of a step"""
 		# Take screenshot
 		browser_context = agent.browser_context
-		screenshot_b64 = await browser_context.take_screenshot()
-		screenshot_path = self.trajectory_folder / f'step_{self.step_counter}.png'
+		screenshot = await browser_context.capture_screenshot()
 
 		# Save screenshot to file
-		async with await anyio.open_file(screenshot_path, 'wb') as f:
-			await f.write(base64.b64decode(screenshot_b64))
+		screenshot_path = await anyio.to_thread.run_sync(self.screenshot_store.save, screenshot.data, screenshot.mime_type)
 
 		# Save screenshot path
 		self.screenshots.append(str(screenshot_path))
@@ -535,7 +538,13 @@ class TaskTracker:
 
 
 async def run_agent_with_tracing(
-	task: Task, llm: BaseChatModel, run_id: str, browser: Browser | None = None, max_steps: int = 25, use_vision: bool = True
+	task: Task,
+	llm: BaseChatModel,
+	run_id: str,
+	browser: Browser | None = None,
+	browser_context: BrowserContext | None = None,
+	max_steps: int = 25,
+	use_vision: bool = True,
 ):
 	try:
 		# Create task tracker
@@ -547,6 +556,7 @@ async def run_agent_with_tracing(
 			task=task.confirmed_task,
 			llm=llm,
 			browser=browser,
+			browser_context=browser_context,
 			use_vision=use_vision,
 			source='eval_platform',  # Override source detection
 		)
@@ -718,6 +728,7 @@ async def run_task_with_semaphore(
 	headless: bool,
 	use_vision: bool,
 	semaphore_runs: asyncio.Semaphore,  # Pass semaphore as argument
+	browser_pool: BrowserPool | None = None,
 ) -> dict:
 	"""Run a single task with semaphore, sequential execution, and robust error handling"""
 	# Acquire semaphore before starting any task-specific logic
@@ -803,17 +814,30 @@ async def run_task_with_semaphore(
 				logger.info(f'Task {task.task_id}: Starting execution.')
 				browser = None  # Ensure browser is defined for finally block
 				try:
-					browserConfig = BrowserConfig(headless=headless)
-					browser = Browser(config=browserConfig)
-					# Pass the llm to run_agent_with_tracing
-					result = await run_agent_with_tracing(
-						task=task,
-						llm=llm,
-						browser=browser,
-						max_steps=max_steps_per_task,
-						use_vision=use_vision,
-						run_id=run_id,  # run_agent_with_tracing handles saving result.json
-					)
+					if browser_pool:
+						# a warm browser from the pool, its context is reset when the lease is returned
+						async with browser_pool.lease() as lease:
+							result = await run_agent_with_tracing(
+								task=task,
+								llm=llm,
+								browser=lease.browser,
+								browser_context=lease.context,
+								max_steps=max_steps_per_task,
+								use_vision=use_vision,
+								run_id=run_id,
+							)
+					else:
+						browserConfig = BrowserConfig(headless=headless)
+						browser = Browser(config=browserConfig)
+						# Pass the llm to run_agent_with_tracing
+						result = await run_agent_with_tracing(
+							task=task,
+							llm=llm,
+							browser=browser,
+							max_steps=max_steps_per_task,
+							use_vision=use_vision,
+							run_id=run_id,  # run_agent_with_tracing handles saving result.json
+						)
 					logger.info(f'Task {task.task_id}: Execution completed.')
 					execution_succeeded = True
 					evaluation_needed = True  # Need to evaluate the new result
@@ -964,24 +988,37 @@ async def run_multiple_tasks(
 	semaphore_runs = asyncio.Semaphore(max_parallel_runs)
 	tasks_to_run = tasks[start_index:end_index] if end_index else tasks[start_index:]
 
-	# Run all tasks in parallel with additional parameters
-	task_results = await asyncio.gather(
-		*(
-			run_task_with_semaphore(
-				task=task,
-				run_id=run_id,
-				convex_url=convex_url,
-				secret_key=secret_key,
-				eval_model=eval_model,
-				llm=llm,  # Pass the agent LLM
-				max_steps_per_task=max_steps_per_task,
-				headless=headless,
-				use_vision=use_vision,
-				semaphore_runs=semaphore_runs,  # Pass the semaphore
-			)
-			for task in tasks_to_run
+	# one warm browser per parallel run instead of launching a browser for every task
+	browser_pool = BrowserPool(
+		BrowserPoolConfig(
+			browsers=min(max_parallel_runs, len(tasks_to_run)) or 1,
+			browser_config=BrowserConfig(headless=headless),
 		)
 	)
+	try:
+		await browser_pool.start()
+
+		# Run all tasks in parallel with additional parameters
+		task_results = await asyncio.gather(
+			*(
+				run_task_with_semaphore(
+					task=task,
+					run_id=run_id,
+					convex_url=convex_url,
+					secret_key=secret_key,
+					eval_model=eval_model,
+					llm=llm,  # Pass the agent LLM
+					max_steps_per_task=max_steps_per_task,
+					headless=headless,
+					use_vision=use_vision,
+					semaphore_runs=semaphore_runs,  # Pass the semaphore
+					browser_pool=browser_pool,
+				)
+				for task in tasks_to_run
+			)
+		)
+	finally:
+		await browser_pool.close()
 
 	# After all tasks are complete, calculate a local summary
 	logger.info('All tasks completed. Calculating result summary...')